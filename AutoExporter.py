@@ -2,20 +2,28 @@ import adsk.core
 import traceback
 
 import os
+import sys
 
 from . import app_context
 
 try:
     from . import config
+    # Optional third party packages (e.g. Pillow) can be placed in the lib folder
+    if config.lib_path not in sys.path:
+        sys.path.append(config.lib_path)
     from .apper import apper
     
     # ************Samples**************
     # Basic Fusion 360 Command Base samples
     from .commands.ExportVisibleStlPngCommand import ExportVisibleStlPngCommand
     from .commands.ExportAllStlPngCommand import ExportAllStlPngCommand
+    from .commands.BatchExportCommand import BatchExportCommand
+    from .commands.CancelDeferredExportCommand import CancelDeferredExportCommand
 
     # Various Application event samples
-    from .commands.ExportDocumentSavedEvents import ExportDocumentSavedEvent
+    from .commands.ExportDocumentSavedEvents import ExportDocumentSavedEvent, DeferredExportEvent
+    from .commands.deferred_export import DEFERRED_EXPORT_EVENT_ID, deferred_export
+    from .commands.DesignChangedEvents import DesignChangedEvent, DocumentOpenedEvent
 
     # Create our addin definition object
     my_addin: apper.FusionApp = apper.FusionApp(config.app_name, config.company_name, config.DEBUG)
@@ -76,12 +84,46 @@ try:
             'debug': config.DEBUG,
         }
     )
+    my_addin.add_command(
+        'Batch export STL/PNG',
+        BatchExportCommand,
+        {
+            'cmd_description': 'Export several designs one after another with the options of the last export',
+            'workspace': 'FusionSolidEnvironment', # Add to solid modeling environment
+            'toolbar_tab_id': 'ToolsTab', # Add to default tools tab
+            'toolbar_panel_id': 'SolidScriptsAddinsPanel', # Add to Add in section in tools tab
+            'cmd_resources': 'cards', # Path to icon resources
+            'command_promoted': False,
+            'cmd_id': BatchExportCommand.CMD_ID,
+            'debug': config.DEBUG,
+        }
+    )
+    my_addin.add_command(
+        'Cancel pending export',
+        CancelDeferredExportCommand,
+        {
+            'cmd_description': 'Cancel the export scheduled by saving the document',
+            'workspace': 'FusionSolidEnvironment', # Add to solid modeling environment
+            'toolbar_tab_id': 'ToolsTab', # Add to default tools tab
+            'toolbar_panel_id': 'SolidScriptsAddinsPanel', # Add to Add in section in tools tab
+            'cmd_resources': 'cards', # Path to icon resources
+            'command_promoted': False,
+            'cmd_id': CancelDeferredExportCommand.CMD_ID,
+            'debug': config.DEBUG,
+        }
+    )
 
 
     app = adsk.core.Application.cast(adsk.core.Application.get())
     ui = app.userInterface
 
     my_addin.add_document_event("auto_exporter_save_event", app.documentSaved, ExportDocumentSavedEvent)
+    # Deferred exports after saving run from this event once Fusion is idle
+    my_addin.add_custom_event_no_thread(DEFERRED_EXPORT_EVENT_ID, DeferredExportEvent)
+    # Track the components changed by every finished command
+    my_addin.add_command_event("auto_exporter_command_terminated", ui.commandTerminated, DesignChangedEvent)
+    # Known timeline length of opened documents, for the first command on them
+    my_addin.add_document_event("auto_exporter_document_opened", app.documentOpened, DocumentOpenedEvent)
     app_context.set_app(my_addin)
 
 
@@ -124,6 +166,64 @@ def run(context):
             pref[config.INCLUDE_FLAGGED_COMPONENTS_KEY] = config.INCLUDE_FLAGGED_COMPONENTS_DEFAULT_VALUE
         if not config.INCLUDE_REFERENCED_COMPONENTS_KEY in pref:
             pref[config.INCLUDE_REFERENCED_COMPONENTS_KEY] = config.INCLUDE_REFERENCED_COMPONENTS_DEFAULT_VALUE
+        if not config.STL_MODE_KEY in pref:
+            pref[config.STL_MODE_KEY] = config.STL_MODE_DEFAULT_VALUE
+        if not config.INCREMENTAL_EXPORT_KEY in pref:
+            pref[config.INCREMENTAL_EXPORT_KEY] = config.INCREMENTAL_EXPORT_DEFAULT_VALUE
+        if not config.PROFILE_EXPORT_KEY in pref:
+            pref[config.PROFILE_EXPORT_KEY] = config.PROFILE_EXPORT_DEFAULT_VALUE
+        if not config.PNG_TRIM_KEY in pref:
+            pref[config.PNG_TRIM_KEY] = config.PNG_TRIM_DEFAULT_VALUE
+        if not config.PNG_TRANSPARENT_KEY in pref:
+            pref[config.PNG_TRANSPARENT_KEY] = config.PNG_TRANSPARENT_DEFAULT_VALUE
+        if not config.PNG_COMPRESS_KEY in pref:
+            pref[config.PNG_COMPRESS_KEY] = config.PNG_COMPRESS_DEFAULT_VALUE
+        if not config.STL_STATS_KEY in pref:
+            pref[config.STL_STATS_KEY] = config.STL_STATS_DEFAULT_VALUE
+        if not config.STL_LOD_KEY in pref:
+            pref[config.STL_LOD_KEY] = config.STL_LOD_DEFAULT_VALUE
+        if not config.STL_LOD_SUB_PATH_KEY in pref:
+            pref[config.STL_LOD_SUB_PATH_KEY] = config.STL_LOD_SUB_PATH_DEFAULT_VALUE
+        if not config.STL_LOD_LEVELS_KEY in pref:
+            pref[config.STL_LOD_LEVELS_KEY] = config.STL_LOD_LEVELS_DEFAULT_VALUE
+        if not config.CONTACT_SHEET_KEY in pref:
+            pref[config.CONTACT_SHEET_KEY] = config.CONTACT_SHEET_DEFAULT_VALUE
+        if not config.CONTACT_SHEET_COLUMNS_KEY in pref:
+            pref[config.CONTACT_SHEET_COLUMNS_KEY] = config.CONTACT_SHEET_COLUMNS_DEFAULT_VALUE
+        if not config.FIT_CAMERA_KEY in pref:
+            pref[config.FIT_CAMERA_KEY] = config.FIT_CAMERA_DEFAULT_VALUE
+        if not config.RESUME_EXPORT_KEY in pref:
+            pref[config.RESUME_EXPORT_KEY] = config.RESUME_EXPORT_DEFAULT_VALUE
+        if not config.EXPORT_FORMATS_KEY in pref:
+            pref[config.EXPORT_FORMATS_KEY] = config.EXPORT_FORMATS_DEFAULT_VALUE
+        if not config.ARCHIVE_FORMAT_KEY in pref:
+            pref[config.ARCHIVE_FORMAT_KEY] = config.ARCHIVE_FORMAT_DEFAULT_VALUE
+        if not config.BATCH_SOURCE_KEY in pref:
+            pref[config.BATCH_SOURCE_KEY] = config.BATCH_SOURCE_DEFAULT_VALUE
+        if not config.BATCH_SUBFOLDERS_KEY in pref:
+            pref[config.BATCH_SUBFOLDERS_KEY] = config.BATCH_SUBFOLDERS_DEFAULT_VALUE
+        if not config.EXPORT_BOM_KEY in pref:
+            pref[config.EXPORT_BOM_KEY] = config.EXPORT_BOM_DEFAULT_VALUE
+        if not config.EXPORT_ON_SAVE_KEY in pref:
+            pref[config.EXPORT_ON_SAVE_KEY] = config.EXPORT_ON_SAVE_DEFAULT_VALUE
+        if not config.EXPORT_ON_SAVE_DELAY_KEY in pref:
+            pref[config.EXPORT_ON_SAVE_DELAY_KEY] = config.EXPORT_ON_SAVE_DELAY_DEFAULT_VALUE
+        if not config.LAST_EXPORT_FOLDER_KEY in pref:
+            pref[config.LAST_EXPORT_FOLDER_KEY] = config.LAST_EXPORT_FOLDER_DEFAULT_VALUE
+        if not config.ONLY_EDITED_KEY in pref:
+            pref[config.ONLY_EDITED_KEY] = config.ONLY_EDITED_DEFAULT_VALUE
+        if not config.GIT_STAGE_KEY in pref:
+            pref[config.GIT_STAGE_KEY] = config.GIT_STAGE_DEFAULT_VALUE
+        if not config.PNG_SIZES_KEY in pref:
+            pref[config.PNG_SIZES_KEY] = config.PNG_SIZES_DEFAULT_VALUE
+        if not config.PNG_VIEWS_KEY in pref:
+            pref[config.PNG_VIEWS_KEY] = config.PNG_VIEWS_DEFAULT_VALUE
+        if not config.STL_ENGINE_KEY in pref:
+            pref[config.STL_ENGINE_KEY] = config.STL_ENGINE_DEFAULT_VALUE
+        if not config.STL_REFINEMENT_KEY in pref:
+            pref[config.STL_REFINEMENT_KEY] = config.STL_REFINEMENT_DEFAULT_VALUE
+        if not config.STL_UNITS_KEY in pref:
+            pref[config.STL_UNITS_KEY] = config.STL_UNITS_DEFAULT_VALUE
 
         app_context.set_preferences(pref)
     
@@ -143,6 +243,7 @@ def stop(context):
         my_addin = app_context.get_app()
         pref: dict = app_context.get_preferences()
 
+        deferred_export.cancel()
         my_addin.stop_app()
         my_addin.save_preferences(config.GROUP_PREFERENCES, pref, False)
     except Exception:
@@ -0,0 +1,136 @@
+"""Benchmark ``export_components`` against synthetic assemblies.
+
+Runs the export pipeline on the fake Fusion object model from
+``fake_fusion`` and reports wall time and API-call counts per phase.
+
+    python benchmarks/bench_export.py --depth 4 --fanout 5 --reuse 0.5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_fusion  # noqa: E402
+
+# export_helpers functions timed as separate phases
+PHASE_FUNCTIONS = {
+    'export_root_stl_to_file': 'root stl',
+    'export_root_png_to_file': 'root png',
+    'export_full_assembly_image': 'full assembly',
+    'export_stl_to_file': 'stl',
+    'export_png_to_file': 'png',
+}
+
+
+class PhaseRecorder:
+    """Wraps export_helpers functions to measure time and API calls per phase."""
+
+    def __init__(self, module):
+        self.times = defaultdict(float)
+        self.calls = Counter()
+        self.api_calls = defaultdict(Counter)
+        self._depth = 0
+        for function_name, phase in PHASE_FUNCTIONS.items():
+            setattr(module, function_name, self._wrap(getattr(module, function_name), phase))
+
+    def _wrap(self, function, phase):
+        def wrapper(*args, **kwargs):
+            if self._depth > 0:
+                return function(*args, **kwargs)
+            self._depth += 1
+            before = Counter(fake_fusion.API_CALLS)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.times[phase] += time.perf_counter() - start
+                self.calls[phase] += 1
+                self.api_calls[phase].update(fake_fusion.API_CALLS - before)
+                self._depth -= 1
+        return wrapper
+
+
+def selection_of_all(design):
+    """Flat list of all occurrences, like the "Export all" command selects them."""
+    return list(design.rootComponent.allOccurrences)
+
+
+def run(args) -> int:
+    export_helpers = fake_fusion.load_addin('commands.export_helpers')
+    recorder = PhaseRecorder(export_helpers)
+
+    design = fake_fusion.generate_design(args.parts, args.depth, args.fanout, args.reuse, args.seed)
+    app = fake_fusion.set_design(design)
+    components = selection_of_all(design)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        paths = {name: base / name for name in ('stl', 'png', 'zsb')}
+        for path in paths.values():
+            path.mkdir()
+
+        start = time.perf_counter()
+        export_helpers.export_components(
+            components,
+            True, True,
+            'root',
+            not args.no_stl, paths['stl'],
+            not args.no_png, paths['zsb'],
+            not args.no_png, 'full',
+            not args.no_png, paths['png'],
+            args.width, args.height,
+            stl_mode=args.stl_mode,
+            fit_camera=args.fit_camera)
+        total = time.perf_counter() - start
+
+    total_api = fake_fusion.API_CALLS
+    light_bulb_writes = total_api['Occurrence.isLightBulbOn=']
+
+    print(f"Design: {len(components)} occurrences, depth {args.depth}, fanout {args.fanout}, reuse {args.reuse}")
+    print(f"{'phase':<16}{'calls':>8}{'seconds':>10}{'api calls':>12}{'bulb writes':>13}")
+    phase_time = 0.0
+    phase_api = Counter()
+    for phase in PHASE_FUNCTIONS.values():
+        if recorder.calls[phase] == 0:
+            continue
+        api = recorder.api_calls[phase]
+        phase_time += recorder.times[phase]
+        phase_api.update(api)
+        print(f"{phase:<16}{recorder.calls[phase]:>8}{recorder.times[phase]:>10.3f}{sum(api.values()):>12}{api['Occurrence.isLightBulbOn=']:>13}")
+    other_api = total_api - phase_api
+    print(f"{'other':<16}{'':>8}{total - phase_time:>10.3f}{sum(other_api.values()):>12}{other_api['Occurrence.isLightBulbOn=']:>13}")
+    print(f"{'total':<16}{'':>8}{total:>10.3f}{sum(total_api.values()):>12}{light_bulb_writes:>13}")
+
+    if args.verbose:
+        print()
+        for name, count in total_api.most_common(args.verbose):
+            print(f"{count:>10}  {name}")
+        print()
+        print(app.userInterface._messages[-1])
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--parts', type=int, default=50, help='size of the part pool')
+    parser.add_argument('--depth', type=int, default=3, help='assembly nesting depth')
+    parser.add_argument('--fanout', type=int, default=4, help='children per assembly')
+    parser.add_argument('--reuse', type=float, default=0.3, help='probability of instancing an existing part')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--width', type=int, default=200)
+    parser.add_argument('--height', type=int, default=150)
+    parser.add_argument('--stl-mode', default='visibility', choices=['visibility', 'direct', 'verify'])
+    parser.add_argument('--fit-camera', action='store_true', help='fit the view for every picture')
+    parser.add_argument('--no-stl', action='store_true', help='skip STL export')
+    parser.add_argument('--no-png', action='store_true', help='skip all PNG exports')
+    parser.add_argument('--verbose', type=int, default=0, metavar='N', help='list the N most frequent API calls')
+    return run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,792 @@
+"""Offline stand-in for the parts of the Fusion 360 API used by the add-in.
+
+``install()`` registers fake ``adsk.core``/``adsk.fusion`` modules and
+``load_addin()`` imports the add-in package against them, together with a
+minimal ``apper`` replacement. ``generate_design()`` builds synthetic
+assemblies of configurable size, depth and instance reuse.
+
+Every attribute read or write on a fake API object is counted in
+``API_CALLS`` (``'Class.attr'`` for reads and calls, ``'Class.attr='`` for
+writes), so benchmarks can report how many Fusion round-trips an export
+would have issued.
+"""
+
+import importlib
+import math
+import os
+import random
+import struct
+import sys
+import types
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional
+
+ADDIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDIN_PACKAGE = 'fusion_exporter'
+
+API_CALLS: Counter = Counter()
+_current_app: Optional['Application'] = None
+
+
+class ApiObject:
+    """Base class counting every public attribute access."""
+
+    def __getattribute__(self, name):
+        if not name.startswith('_'):
+            API_CALLS[f"{type(self).__name__}.{name}"] += 1
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            API_CALLS[f"{type(self).__name__}.{name}="] += 1
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+
+class _Names:
+    """Enumeration stand-in: every attribute evaluates to its own name."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return f"{self._name}.{name}"
+
+
+class Collection(ApiObject):
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    def item(self, index: int):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class Point3D(ApiObject):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self._xyz = (x, y, z)
+
+    @property
+    def x(self):
+        return self._xyz[0]
+
+    @property
+    def y(self):
+        return self._xyz[1]
+
+    @property
+    def z(self):
+        return self._xyz[2]
+
+    def asArray(self):
+        return list(self._xyz)
+
+    @classmethod
+    def create(cls, x=0.0, y=0.0, z=0.0):
+        return cls(x, y, z)
+
+
+class Vector3D(Point3D):
+    pass
+
+
+class BoundingBox3D(ApiObject):
+    def __init__(self, min_point: Point3D, max_point: Point3D):
+        self._min = min_point
+        self._max = max_point
+
+    @property
+    def minPoint(self):
+        return self._min
+
+    @property
+    def maxPoint(self):
+        return self._max
+
+    @property
+    def isValid(self):
+        return True
+
+    def combine(self, other: 'BoundingBox3D'):
+        lo = [min(a, b) for a, b in zip(self._min._xyz, other._min._xyz)]
+        hi = [max(a, b) for a, b in zip(self._max._xyz, other._max._xyz)]
+        self._min = Point3D(*lo)
+        self._max = Point3D(*hi)
+        return True
+
+    def copy(self):
+        return BoundingBox3D(Point3D(*self._min._xyz), Point3D(*self._max._xyz))
+
+
+class Matrix3D(ApiObject):
+    def __init__(self, translation=(0.0, 0.0, 0.0)):
+        self._translation = tuple(translation)
+
+    def asArray(self):
+        tx, ty, tz = self._translation
+        return [1, 0, 0, tx, 0, 1, 0, ty, 0, 0, 1, tz, 0, 0, 0, 1]
+
+
+class Appearance(ApiObject):
+    def __init__(self, name: str):
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+
+class _Counted(ApiObject):
+    def __init__(self, count: int):
+        self._count = count
+
+    @property
+    def count(self):
+        return self._count
+
+
+class TriangleMesh(ApiObject):
+    def __init__(self, triangles):
+        self._triangles = triangles
+
+    @property
+    def triangleCount(self):
+        return len(self._triangles)
+
+    @property
+    def nodeCoordinatesAsFloat(self):
+        return [c for tri in self._triangles for v in tri for c in v]
+
+    @property
+    def nodeIndices(self):
+        return list(range(3 * len(self._triangles)))
+
+
+class TriangleMeshCalculator(ApiObject):
+    def __init__(self, body: 'BRepBody'):
+        self._body = body
+        self.quality = None
+
+    def setQuality(self, quality):
+        self.quality = quality
+
+    def calculate(self):
+        tx, ty, tz = self._body._translation
+        return TriangleMesh([[(x + tx, y + ty, z + tz) for x, y, z in tri] for tri in self._body._triangles()])
+
+
+class MeshManager(ApiObject):
+    def __init__(self, body: 'BRepBody'):
+        self._body = body
+
+    def createMeshCalculator(self):
+        return TriangleMeshCalculator(self._body)
+
+
+class BRepBody(ApiObject):
+    def __init__(self, name: str, offset: float, size: float, translation=(0.0, 0.0, 0.0)):
+        self._name = name
+        self._offset = offset
+        self._size = size
+        self._translation = translation
+
+    def _proxy(self, translation) -> 'BRepBody':
+        """The body in the context of an occurrence."""
+        return BRepBody(self._name, self._offset, self._size, translation)
+
+    @property
+    def isLightBulbOn(self):
+        return True
+
+    @property
+    def meshManager(self):
+        return MeshManager(self)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def faces(self):
+        return _Counted(6)
+
+    @property
+    def edges(self):
+        return _Counted(12)
+
+    @property
+    def vertices(self):
+        return _Counted(8)
+
+    @property
+    def volume(self):
+        return self._size ** 3
+
+    @property
+    def area(self):
+        return 6 * self._size ** 2
+
+    @property
+    def boundingBox(self):
+        o, s = self._offset, self._size
+        return BoundingBox3D(Point3D(o, o, o), Point3D(o + s, o + s, o + s))
+
+    @property
+    def appearance(self):
+        return Appearance('Steel - Satin')
+
+    def _triangles(self):
+        """Twelve triangles of an axis aligned cube."""
+        o, s = self._offset, self._size
+        c = [(o + s * x, o + s * y, o + s * z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+        quads = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+        for a, b, cc, d in quads:
+            yield c[a], c[b], c[cc]
+            yield c[a], c[cc], c[d]
+
+
+class Component(ApiObject):
+    _next_id = 0
+
+    def __init__(self, name: str, body_count: int = 0):
+        Component._next_id += 1
+        self._id = f"component-{Component._next_id}"
+        self._name = name
+        self._bodies = [BRepBody(f"Body{i + 1}", i * 2.0, 1.0 + i) for i in range(body_count)]
+        self._occurrences: List['Occurrence'] = []
+        self._folders: Dict[str, bool] = {}
+        self._is_referenced = False
+
+    def __getattr__(self, name):
+        if name.endswith('FolderLightBulbOn'):
+            return self._folders.get(name, True)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name.endswith('FolderLightBulbOn'):
+            API_CALLS[f"Component.{name}="] += 1
+            self._folders[name] = value
+        else:
+            super().__setattr__(name, value)
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def bRepBodies(self):
+        return Collection(self._bodies)
+
+    @property
+    def occurrences(self):
+        return Collection(self._occurrences)
+
+    @property
+    def allOccurrences(self):
+        return Collection(self._all_occurrences())
+
+    def _all_occurrences(self):
+        result = []
+        for occ in self._occurrences:
+            result.append(occ)
+            result.extend(occ._proxy_descendants())
+        return result
+
+    @property
+    def boundingBox(self):
+        box = None
+        for body in self._bodies:
+            if box is None:
+                box = body.boundingBox
+            else:
+                box.combine(body.boundingBox)
+        for occ in self._occurrences:
+            child_box = occ.boundingBox
+            if child_box is not None:
+                if box is None:
+                    box = child_box
+                else:
+                    box.combine(child_box)
+        return box
+
+    def add_child(self, component: 'Component') -> 'Occurrence':
+        index = sum(1 for o in self._occurrences if o._component is component) + 1
+        occ = Occurrence(component, f"{component._name}:{index}", None, (len(self._occurrences) * 10.0, 0.0, 0.0))
+        self._occurrences.append(occ)
+        return occ
+
+
+class Occurrence(ApiObject):
+    """Occurrence in assembly context. Light bulb state is stored per full path
+    so different wrapper objects for the same occurrence share it."""
+
+    _light_bulbs: Dict[str, bool] = {}
+
+    def __init__(self, component: Component, name: str, parent: Optional['Occurrence'], translation):
+        self._component = component
+        self._name = name
+        self._parent = parent
+        self._translation = translation
+        self._path = name if parent is None else f"{parent._path}+{name}"
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def fullPathName(self):
+        return self._path
+
+    @property
+    def component(self):
+        return self._component
+
+    @property
+    def isReferencedComponent(self):
+        return self._component._is_referenced
+
+    @property
+    def childOccurrences(self):
+        return Collection(self._children())
+
+    @property
+    def bRepBodies(self):
+        translation = self._world_translation()
+        return Collection([body._proxy(translation) for body in self._component._bodies])
+
+    def _children(self):
+        return [Occurrence(c._component, c._name, self, c._translation) for c in self._component._occurrences]
+
+    def _proxy_descendants(self):
+        result = []
+        for child in self._children():
+            result.append(child)
+            result.extend(child._proxy_descendants())
+        return result
+
+    @property
+    def isLightBulbOn(self):
+        return Occurrence._light_bulbs.get(self._path, True)
+
+    @isLightBulbOn.setter
+    def isLightBulbOn(self, value):
+        Occurrence._light_bulbs[self._path] = bool(value)
+
+    @property
+    def isVisible(self):
+        return self._is_visible()
+
+    def _is_visible(self):
+        occ = self
+        while occ is not None:
+            if not Occurrence._light_bulbs.get(occ._path, True):
+                return False
+            occ = occ._parent
+        return True
+
+    @property
+    def transform2(self):
+        return Matrix3D(self._world_translation())
+
+    transform = transform2
+
+    def _world_translation(self):
+        x, y, z = self._translation
+        if self._parent is not None:
+            px, py, pz = self._parent._world_translation()
+            x, y, z = x + px, y + py, z + pz
+        return (x, y, z)
+
+    @property
+    def boundingBox(self):
+        box = self._component.boundingBox
+        if box is None:
+            return None
+        tx, ty, tz = self._world_translation()
+        lo, hi = box._min._xyz, box._max._xyz
+        return BoundingBox3D(Point3D(lo[0] + tx, lo[1] + ty, lo[2] + tz), Point3D(hi[0] + tx, hi[1] + ty, hi[2] + tz))
+
+    def _visible_bodies(self):
+        """All bodies rendered for this occurrence as (body, translation)."""
+        result = [(b, self._world_translation()) for b in self._component._bodies]
+        for child in self._children():
+            result.extend(child._visible_bodies())
+        return result
+
+    def __eq__(self, other):
+        return isinstance(other, Occurrence) and other._path == self._path
+
+    def __hash__(self):
+        return hash(self._path)
+
+
+class ExportOptions(ApiObject):
+    def __init__(self, kind: str, geometry, filename: str):
+        self._kind = kind
+        self._geometry = geometry
+        self._filename = filename
+        self._ascii = False
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def isBinaryFormat(self):
+        return not self._ascii
+
+    @isBinaryFormat.setter
+    def isBinaryFormat(self, value):
+        self._ascii = not value
+
+
+class ExportManager(ApiObject):
+    def createSTLExportOptions(self, geometry, filename: str = ''):
+        return ExportOptions('stl', geometry, filename)
+
+    def createC3MFExportOptions(self, geometry, filename: str = ''):
+        return ExportOptions('3mf', geometry, filename)
+
+    def createOBJExportOptions(self, geometry, filename: str = ''):
+        return ExportOptions('obj', geometry, filename)
+
+    def createSTEPExportOptions(self, filename: str, geometry=None):
+        return ExportOptions('step', geometry, filename)
+
+    def execute(self, options: ExportOptions):
+        geometry = options._geometry
+        if isinstance(geometry, Occurrence):
+            bodies = geometry._visible_bodies()
+        elif geometry is not None:
+            bodies = [(b, (0.0, 0.0, 0.0)) for b in geometry._bodies]
+        else:
+            bodies = []
+        if options._kind == 'stl':
+            write_stl(options._filename, bodies, binary=not options._ascii)
+        else:
+            with open(options._filename, 'w') as f:
+                f.write(f"{options._kind} export of {len(bodies)} bodies\n")
+        return True
+
+
+def write_stl(file_name: str, bodies, binary: bool = True):
+    triangles = []
+    for body, (tx, ty, tz) in bodies:
+        for tri in body._triangles():
+            triangles.append([(x + tx, y + ty, z + tz) for x, y, z in tri])
+    if binary:
+        with open(file_name, 'wb') as f:
+            f.write(b'fake fusion binary stl'.ljust(80, b' '))
+            f.write(struct.pack('<I', len(triangles)))
+            for tri in triangles:
+                f.write(struct.pack('<12fH', 0, 0, 0, *[c for v in tri for c in v], 0))
+    else:
+        with open(file_name, 'w') as f:
+            f.write('solid fake\n')
+            for tri in triangles:
+                f.write(' facet normal 0 0 0\n  outer loop\n')
+                for v in tri:
+                    f.write(f"   vertex {v[0]} {v[1]} {v[2]}\n")
+                f.write('  endloop\n endfacet\n')
+            f.write('endsolid fake\n')
+
+
+class Camera(ApiObject):
+    def __init__(self):
+        self.isSmoothTransition = True
+        self.isFitView = False
+        self.viewOrientation = None
+        self.cameraType = None
+        self.eye = Point3D(10.0, -10.0, 10.0)
+        self.target = Point3D(0.0, 0.0, 0.0)
+        self.upVector = Vector3D(0.0, 0.0, 1.0)
+        self.viewExtents = 10.0
+        self.perspectiveAngle = math.radians(30)
+
+
+class Viewport(ApiObject):
+    def __init__(self, design: 'Design'):
+        self._design = design
+        self._camera = Camera()
+
+    @property
+    def camera(self):
+        return self._camera
+
+    @camera.setter
+    def camera(self, value):
+        self._camera = value
+
+    def fit(self):
+        return True
+
+    def refresh(self):
+        return True
+
+    def saveAsImageFile(self, filename: str, width: int, height: int):
+        visible = sum(Occurrence._light_bulbs.values())
+        write_png(filename, width, height, visible)
+        return True
+
+    def saveAsImageFileWithOptions(self, options):
+        return self.saveAsImageFile(options.filename, options.width, options.height)
+
+
+def write_png(file_name: str, width: int, height: int, seed: int = 0, alpha: bool = False):
+    """Write a gradient background with a centred box, like a viewport shot."""
+    channels = 4 if alpha else 3
+    x0, x1 = width // 4, width * 3 // 4
+    y0, y1 = height // 4, height * 3 // 4
+    shade = 40 + seed % 150
+    raw = bytearray()
+    for y in range(height):
+        bg = 255 - (y * 40) // max(height, 1)
+        bg_pixel = bytes((bg, bg, bg, 0)[:channels]) if alpha else bytes((bg, bg, bg))
+        fg_pixel = bytes((shade, 90, 160, 255)[:channels])
+        raw.append(0)
+        if y0 <= y < y1:
+            raw += bg_pixel * x0 + fg_pixel * (x1 - x0) + bg_pixel * (width - x1)
+        else:
+            raw += bg_pixel * width
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(file_name, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6 if alpha else 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+class ProgressDialog(ApiObject):
+    def __init__(self):
+        self.cancelButtonText = ''
+        self.isBackgroundTranslucent = False
+        self.isCancelButtonShown = False
+        self.progressValue = 0
+        self.wasCancelled = False
+        self.message = ''
+
+    def show(self, title, message, minimum, maximum, delay=0):
+        self.progressValue = minimum
+        return True
+
+    def hide(self):
+        return True
+
+
+class Selections(ApiObject):
+    def clear(self):
+        return True
+
+
+class UserInterface(ApiObject):
+    def __init__(self):
+        self._messages: List[str] = []
+        self._selections = Selections()
+
+    def createProgressDialog(self):
+        return ProgressDialog()
+
+    @property
+    def activeSelections(self):
+        return self._selections
+
+    def messageBox(self, text, title='', buttons=None, icon=None):
+        self._messages.append(text)
+        return 0
+
+
+class Design(ApiObject):
+    def __init__(self, root: Component):
+        self._root = root
+        self._export_manager = ExportManager()
+
+    @property
+    def rootComponent(self):
+        return self._root
+
+    @property
+    def exportManager(self):
+        return self._export_manager
+
+    @property
+    def activeComponent(self):
+        return self._root
+
+    def activateRootComponent(self):
+        return True
+
+
+class Application(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+        self._ui = UserInterface()
+        self._viewport = Viewport(design)
+
+    @classmethod
+    def get(cls):
+        return _current_app
+
+    @property
+    def activeProduct(self):
+        return self._design
+
+    @property
+    def activeViewport(self):
+        return self._viewport
+
+    @property
+    def userInterface(self):
+        return self._ui
+
+    def fireCustomEvent(self, event_id, additional_info=''):
+        return True
+
+
+class AppObjects(ApiObject):
+    """Replacement for ``apper.AppObjects``."""
+
+    def __init__(self):
+        self._app = _current_app
+
+    @property
+    def app(self):
+        return self._app
+
+    @property
+    def ui(self):
+        return self._app._ui
+
+    @property
+    def product(self):
+        return self._app._design
+
+    @property
+    def design(self):
+        return self._app._design
+
+    @property
+    def root_comp(self):
+        return self._app._design._root
+
+
+def set_design(design: Design) -> Application:
+    """Make ``design`` the active product and reset all recorded API calls."""
+    global _current_app
+    _current_app = Application(design)
+    Occurrence._light_bulbs = {}
+    API_CALLS.clear()
+    return _current_app
+
+
+def generate_design(parts: int = 50, depth: int = 3, fanout: int = 4, reuse: float = 0.3, seed: int = 0) -> Design:
+    """Build a synthetic assembly.
+
+    The root holds ``fanout`` sub assemblies, nested up to ``depth`` levels with
+    ``fanout`` children each. Leaves are part components drawn from a pool of
+    ``parts``; with probability ``reuse`` an already used part is instanced
+    again instead of creating a new one.
+    """
+    rng = random.Random(seed)
+    pool: List[Component] = []
+    counter = [0]
+
+    def leaf() -> Component:
+        if pool and (len(pool) >= parts or rng.random() < reuse):
+            return rng.choice(pool)
+        part = Component(f"Part {len(pool) + 1}", rng.randint(1, 3))
+        pool.append(part)
+        return part
+
+    def assembly(level: int) -> Component:
+        counter[0] += 1
+        comp = Component(f"Assembly {counter[0]}", 1 if rng.random() < 0.2 else 0)
+        for _ in range(fanout):
+            if level + 1 < depth:
+                comp.add_child(assembly(level + 1))
+            else:
+                comp.add_child(leaf())
+        return comp
+
+    root = Component('root', 1)
+    for _ in range(fanout):
+        root.add_child(assembly(1) if depth > 1 else leaf())
+    return Design(root)
+
+
+def install():
+    """Register the fake ``adsk`` modules."""
+    if 'adsk' in sys.modules and getattr(sys.modules['adsk'], '_is_fake', False):
+        return
+
+    adsk = types.ModuleType('adsk')
+    adsk._is_fake = True
+    core = types.ModuleType('adsk.core')
+    fusion = types.ModuleType('adsk.fusion')
+
+    for cls in (Application, UserInterface, ProgressDialog, Point3D, Vector3D, Matrix3D, BoundingBox3D, Camera, Viewport):
+        setattr(core, cls.__name__, cls)
+    for cls in (Design, Component, Occurrence, BRepBody, ExportManager):
+        setattr(fusion, cls.__name__, cls)
+
+    class ImageExportOptions(ApiObject):
+        @classmethod
+        def create(cls, filename):
+            opts = cls()
+            opts.filename = filename
+            opts.width = 0
+            opts.height = 0
+            opts.isBackgroundTransparent = False
+            opts.isAntiAliased = True
+            return opts
+    core.ImageExportOptions = ImageExportOptions
+    fusion.ImageExportOptions = ImageExportOptions
+
+    # Anything else (enumerations, rarely used classes) resolves to a name stand-in
+    core.__getattr__ = lambda name: _Names(f"adsk.core.{name}")
+    fusion.__getattr__ = lambda name: _Names(f"adsk.fusion.{name}")
+
+    adsk.core = core
+    adsk.fusion = fusion
+    sys.modules['adsk'] = adsk
+    sys.modules['adsk.core'] = core
+    sys.modules['adsk.fusion'] = fusion
+
+
+def load_addin(module: str = 'commands.export_helpers'):
+    """Import a module of the add-in against the fake API and return it."""
+    install()
+    if ADDIN_PACKAGE not in sys.modules:
+        package = types.ModuleType(ADDIN_PACKAGE)
+        package.__path__ = [ADDIN_ROOT]
+        sys.modules[ADDIN_PACKAGE] = package
+
+        apper_package = types.ModuleType(f"{ADDIN_PACKAGE}.apper")
+        apper_package.__path__ = []
+        apper_module = types.ModuleType(f"{ADDIN_PACKAGE}.apper.apper")
+        apper_module.AppObjects = AppObjects
+        apper_module.Fusion360CommandBase = object
+        apper_module.Fusion360DocumentEvent = object
+        apper_module.FusionApp = object
+        apper_package.apper = apper_module
+        sys.modules[f"{ADDIN_PACKAGE}.apper"] = apper_package
+        sys.modules[f"{ADDIN_PACKAGE}.apper.apper"] = apper_module
+    return importlib.import_module(f"{ADDIN_PACKAGE}.{module}")
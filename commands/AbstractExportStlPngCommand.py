@@ -4,7 +4,14 @@ from typing import cast
 from abc import ABC, abstractmethod 
 
 from ..apper import apper
+from . import deferred_export
+from . import dirty_tracker
+from . import export_archive
 from . import export_helpers
+from . import export_options
+from . import export_scope
+from . import exporters
+from . import stl_mesh
 from .. import app_context
 from .. import config
 
@@ -24,10 +31,98 @@ IMAGE_WIDTH_INPUT_ID = 'image_width_input_id'
 IMAGE_HEIGHT_INPUT_ID = 'image_height_input_id'
 INCLUDE_REFERENCED_COMPONENTS_INPUT_ID = 'transparency_input_id'
 INCLUDE_FLAGGED_COMPONENTS_INPUT_ID = 'include_flagged_components_input_id'
+STL_MODE_INPUT_ID = 'stl_mode_input_id'
+INCREMENTAL_EXPORT_INPUT_ID = 'incremental_export_input_id'
+PROFILE_EXPORT_INPUT_ID = 'profile_export_input_id'
+PNG_TRIM_INPUT_ID = 'png_trim_input_id'
+PNG_TRANSPARENT_INPUT_ID = 'png_transparent_input_id'
+PNG_COMPRESS_INPUT_ID = 'png_compress_input_id'
+STL_STATS_INPUT_ID = 'stl_stats_input_id'
+STL_LOD_INPUT_ID = 'stl_lod_input_id'
+STL_LOD_SUB_PATH_INPUT_ID = 'stl_lod_sub_path_input_id'
+STL_LOD_LEVELS_INPUT_ID = 'stl_lod_levels_input_id'
+CONTACT_SHEET_INPUT_ID = 'contact_sheet_input_id'
+CONTACT_SHEET_COLUMNS_INPUT_ID = 'contact_sheet_columns_input_id'
+FIT_CAMERA_INPUT_ID = 'fit_camera_input_id'
+RESUME_EXPORT_INPUT_ID = 'resume_export_input_id'
+ARCHIVE_FORMAT_INPUT_ID = 'archive_format_input_id'
+SCOPE_INPUT_ID = 'scope_input_id'
+EXPORT_BOM_INPUT_ID = 'export_bom_input_id'
+EXPORT_ON_SAVE_INPUT_ID = 'export_on_save_input_id'
+EXPORT_ON_SAVE_DELAY_INPUT_ID = 'export_on_save_delay_input_id'
+ONLY_EDITED_INPUT_ID = 'only_edited_input_id'
+GIT_STAGE_INPUT_ID = 'git_stage_input_id'
+PNG_SIZES_INPUT_ID = 'png_sizes_input_id'
+PNG_VIEWS_INPUT_ID = 'png_views_input_id'
+STL_ENGINE_INPUT_ID = 'stl_engine_input_id'
+STL_REFINEMENT_INPUT_ID = 'stl_refinement_input_id'
+STL_UNITS_INPUT_ID = 'stl_units_input_id'
+
+
+def format_input_id(name: str) -> str:
+    """Input ID of the checkbox of a registered exporter."""
+    return f'export_format_{name}_input_id'
+
+# Drop down entries for the STL visibility handling
+STL_MODE_ITEMS = {
+    'Show only exported component': export_helpers.STL_MODE_VISIBILITY,
+    'Do not change visibility (fast)': export_helpers.STL_MODE_DIRECT,
+    'Verify fast export against visible one': export_helpers.STL_MODE_VERIFY,
+}
+
+# Drop down entries for how STL files are produced
+STL_ENGINE_ITEMS = {
+    "Fusion's STL export": stl_mesh.STL_ENGINE_FUSION,
+    'Write from body meshes (fast, needs NumPy)': stl_mesh.STL_ENGINE_MESH,
+}
+
+# Drop down entries for the triangle refinement of the mesh engine
+STL_REFINEMENT_ITEMS = {
+    'Low': 'low',
+    'Normal': 'normal',
+    'High': 'high',
+    'Very high': 'very_high',
+}
+
+# Drop down entries for the units of the mesh engine
+STL_UNITS_ITEMS = {
+    'Millimeters': 'mm',
+    'Centimeters': 'cm',
+    'Meters': 'm',
+    'Inches': 'in',
+}
+
+# Drop down entries for the archive written along with the export
+ARCHIVE_FORMAT_ITEMS = {
+    'No archive': '',
+    'ZIP archive': export_archive.ARCHIVE_FORMAT_ZIP,
+    'tar.gz archive': export_archive.ARCHIVE_FORMAT_TAR,
+}
+
+# Drop down entries for what happens when the document is saved
+EXPORT_ON_SAVE_ITEMS = {
+    'Ask whether to export': deferred_export.EXPORT_ON_SAVE_PROMPT,
+    'Export in the background with these options': deferred_export.EXPORT_ON_SAVE_DEFERRED,
+    'Do nothing': deferred_export.EXPORT_ON_SAVE_OFF,
+}
+
+# Drop down entries for the components to export
+SCOPE_ITEMS = {
+    'All components': export_scope.SCOPE_ALL,
+    'Visible components': export_scope.SCOPE_VISIBLE,
+    'Selected components': export_scope.SCOPE_SELECTED,
+}
+
 
 class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
-    """UI command: collect inputs and delegate export work to export_helpers."""
+    """UI command: collect inputs and delegate export work to export_helpers.
+
+    The ``all`` and ``visible`` scopes are resolved from the design tree when
+    the export starts; the selection input is only filled for the ``selected``
+    scope.
+    """
 
+    DEFAULT_SCOPE = export_scope.SCOPE_SELECTED
 
     @abstractmethod
     def selectComponents(self, selection_input: adsk.core.SelectionCommandInput):
@@ -41,6 +136,19 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
     def on_destroy(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, reason, input_values):
         return
 
+    def on_input_changed(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, changed_input, input_values):
+        if changed_input.id == SCOPE_INPUT_ID:
+            self.update_scope(inputs, SCOPE_ITEMS.get(input_values.get(SCOPE_INPUT_ID), self.DEFAULT_SCOPE))
+
+    def update_scope(self, inputs: adsk.core.CommandInputs, scope: str):
+        """Show the selection input for the selected scope and fill it on first use."""
+        sel = cast(adsk.core.SelectionCommandInput, inputs.itemById(COMPONENTS_NAME_INPUT_ID))
+        selected = scope == export_scope.SCOPE_SELECTED
+        sel.isVisible = selected
+        sel.setSelectionLimits(1 if selected else 0, 0)
+        if selected and sel.selectionCount == 0:
+            self.selectComponents(sel)
+
     def validate_inputs(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs,
                         args: adsk.core.ValidateInputsEventArgs, input_values: dict) -> bool:
         # Keep existing lightweight validation: paths present when enabled, image sizes, selection
@@ -58,7 +166,8 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
         if is_png and (png_sub is None or len(png_sub.strip()) == 0):
             png_input.isValueError = True
 
-        if not (is_png or is_stl or is_): 
+        is_zsb = input_values.get(EXPORT_ZSB_INPUT_ID, config.EXPORT_ZSB_DEFAULT_VALUE)
+        if not (is_png or is_stl or is_zsb): 
             return False
         
 
@@ -75,8 +184,9 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
         if w is None or h is None:
             return False
 
+        scope = SCOPE_ITEMS.get(input_values.get(SCOPE_INPUT_ID), self.DEFAULT_SCOPE)
         sels = input_values.get(COMPONENTS_NAME_INPUT_ID, None)
-        if not (sels and len(sels) > 0):
+        if scope == export_scope.SCOPE_SELECTED and not (sels and len(sels) > 0):
             return False
 
         return not (png_input.isValueError or stl_input.isValueError)
@@ -95,54 +205,12 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
             ao.ui.messageBox(f'Invalid base folder: {base} - {err}')  # type: ignore
             return
 
-        export_png = input_values.get(EXPORT_PNG_INPUT_ID, config.EXPORT_PNG_DEFAULT_VALUE)
-        png_sub = input_values.get(PNG_SUB_PATH_INPUT_ID, config.PNG_SUB_PATH_DEFAULT_VALUE)
-        png_path = (base / png_sub.lstrip('/')) if export_png else base
-        if export_png:
-            err = export_helpers.check_folder_validity(png_path)
-            if err:
-                ao.ui.messageBox(f'Invalid PNG folder: {png_path} - {err}')  # type: ignore
-                return
-
-        export_zsb = input_values.get(EXPORT_ZSB_INPUT_ID, config.EXPORT_ZSB_DEFAULT_VALUE)
-        zsb_sub = input_values.get(ZSB_SUB_PATH_INPUT_ID, config.ZSB_SUB_PATH_DEFAULT_VALUE)
-        zsb_path = (base / zsb_sub.lstrip('/')) if export_zsb else base
-        if export_zsb:
-            err = export_helpers.check_folder_validity(zsb_path)
-            if err:
-                ao.ui.messageBox(f'Invalid ZSB folder: {zsb_path} - {err}')  # type: ignore
-                return
-            
-        full_zsb_export = input_values.get(EXPORT_FULL_ZSB_INPUT_ID, config.EXPORT_FULL_ZSB_DEFAULT_VALUE)
-        full_zsb_name = input_values.get(EXPORT_FULL_ZSB_NAME_INPUT_ID, config.EXPORT_FULL_ZSB_NAME_DEFAULT_VALUE)
-
-        export_stl = input_values.get(EXPORT_STL_INPUT_ID, config.EXPORT_STL_DEFAULT_VALUE)
-        stl_sub = input_values.get(STL_SUB_PATH_INPUT_ID, config.STL_SUB_PATH_DEFAULT_VALUE)
-        stl_path = (base / stl_sub.lstrip('/')) if export_stl else base
-        if export_stl:
-            err = export_helpers.check_folder_validity(stl_path)
-            if err:
-                ao.ui.messageBox(f'Invalid STL folder: {stl_path} -  {err}')  # type: ignore
-                return
-
         width = input_values.get(IMAGE_WIDTH_INPUT_ID, config.IMAGE_WIDTH_DEFAULT_VALUE)
         height = input_values.get(IMAGE_HEIGHT_INPUT_ID, config.IMAGE_HEIGHT_DEFAULT_VALUE)
         if width is None or height is None:
             ao.ui.messageBox('Image size not specified')  # type: ignore
             return
 
-        components: adsk.core.Occurence = input_values.get(COMPONENTS_NAME_INPUT_ID)
-        if components is None:
-            ao.ui.messageBox('No components selected')  # type: ignore
-            return
-        
-        try:
-            w = int(width)
-            h = int(height)
-        except Exception:
-            ao.ui.messageBox('Invalid image size values')  # type: ignore
-            return
-
         include_referenced_components = input_values.get(INCLUDE_REFERENCED_COMPONENTS_INPUT_ID, config.INCLUDE_REFERENCED_COMPONENTS_DEFAULT_VALUE)
         if not isinstance(include_referenced_components, bool):
             ao.ui.messageBox(f'Invalid option to include referenced components: {include_referenced_components}: {type(include_referenced_components).__name__}')  # type: ignore
@@ -151,36 +219,72 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
         if not isinstance(include_flagged_components, bool):
             ao.ui.messageBox(f'Invalid option to include flagged components {include_flagged_components}: {type(include_flagged_components).__name__}')  # type: ignore
             return
-        
-        root_name = input_values.get(ROOT_COMPONENT_NAME_INPUT_ID, config.ROOT_COMPONENT_NAME_DEFAULT_VALUE)
- 
 
-        # Save preferences for next time
+        scope = SCOPE_ITEMS.get(input_values.get(SCOPE_INPUT_ID), self.DEFAULT_SCOPE)
+        if scope == export_scope.SCOPE_SELECTED:
+            components: adsk.core.Occurence = input_values.get(COMPONENTS_NAME_INPUT_ID)
+            if components is None:
+                ao.ui.messageBox('No components selected')  # type: ignore
+                return
+        else:
+            components = export_scope.resolve_scope(ao.root_comp, scope, include_referenced_components, include_flagged_components)
+
+        # Save preferences for next time, the export is configured from them
         pref = app_context.get_preferences()
-        pref[config.EXPORT_STL_KEY] = export_stl
-        pref[config.STL_SUB_PATH_KEY] = stl_path
-        pref[config.EXPORT_ZSB_KEY] = export_zsb
-        pref[config.ZSB_SUB_PATH_KEY] = zsb_path
-        pref[config.EXPORT_FULL_ZSB_KEY] = full_zsb_export
-        pref[config.EXPORT_FULL_ZSB_NAME_KEY] = full_zsb_name
-        pref[config.EXPORT_PNG_KEY] = export_png
-        pref[config.PNG_SUB_PATH_KEY] = png_path
+        pref[config.EXPORT_STL_KEY] = input_values.get(EXPORT_STL_INPUT_ID, config.EXPORT_STL_DEFAULT_VALUE)
+        pref[config.STL_SUB_PATH_KEY] = input_values.get(STL_SUB_PATH_INPUT_ID, config.STL_SUB_PATH_DEFAULT_VALUE)
+        pref[config.EXPORT_ZSB_KEY] = input_values.get(EXPORT_ZSB_INPUT_ID, config.EXPORT_ZSB_DEFAULT_VALUE)
+        pref[config.ZSB_SUB_PATH_KEY] = input_values.get(ZSB_SUB_PATH_INPUT_ID, config.ZSB_SUB_PATH_DEFAULT_VALUE)
+        pref[config.EXPORT_FULL_ZSB_KEY] = input_values.get(EXPORT_FULL_ZSB_INPUT_ID, config.EXPORT_FULL_ZSB_DEFAULT_VALUE)
+        pref[config.EXPORT_FULL_ZSB_NAME_KEY] = input_values.get(EXPORT_FULL_ZSB_NAME_INPUT_ID, config.EXPORT_FULL_ZSB_NAME_DEFAULT_VALUE)
+        pref[config.EXPORT_PNG_KEY] = input_values.get(EXPORT_PNG_INPUT_ID, config.EXPORT_PNG_DEFAULT_VALUE)
+        pref[config.PNG_SUB_PATH_KEY] = input_values.get(PNG_SUB_PATH_INPUT_ID, config.PNG_SUB_PATH_DEFAULT_VALUE)
         pref[config.INCLUDE_REFERENCED_COMPONENTS_KEY] = include_referenced_components
         pref[config.INCLUDE_FLAGGED_COMPONENTS_KEY] = include_flagged_components
-        pref[config.IMAGE_WIDTH_KEY] = w
-        pref[config.IMAGE_HEIGHT_KEY] = h
-        pref[config.ROOT_COMPONENT_NAME_KEY] = root_name
+        pref[config.IMAGE_WIDTH_KEY] = width
+        pref[config.IMAGE_HEIGHT_KEY] = height
+        pref[config.ROOT_COMPONENT_NAME_KEY] = input_values.get(ROOT_COMPONENT_NAME_INPUT_ID, config.ROOT_COMPONENT_NAME_DEFAULT_VALUE)
+        pref[config.STL_MODE_KEY] = STL_MODE_ITEMS.get(input_values.get(STL_MODE_INPUT_ID), config.STL_MODE_DEFAULT_VALUE)
+        pref[config.STL_ENGINE_KEY] = STL_ENGINE_ITEMS.get(input_values.get(STL_ENGINE_INPUT_ID), config.STL_ENGINE_DEFAULT_VALUE)
+        pref[config.STL_REFINEMENT_KEY] = STL_REFINEMENT_ITEMS.get(input_values.get(STL_REFINEMENT_INPUT_ID), config.STL_REFINEMENT_DEFAULT_VALUE)
+        pref[config.STL_UNITS_KEY] = STL_UNITS_ITEMS.get(input_values.get(STL_UNITS_INPUT_ID), config.STL_UNITS_DEFAULT_VALUE)
+        pref[config.INCREMENTAL_EXPORT_KEY] = input_values.get(INCREMENTAL_EXPORT_INPUT_ID, config.INCREMENTAL_EXPORT_DEFAULT_VALUE)
+        pref[config.ONLY_EDITED_KEY] = input_values.get(ONLY_EDITED_INPUT_ID, config.ONLY_EDITED_DEFAULT_VALUE)
+        pref[config.RESUME_EXPORT_KEY] = input_values.get(RESUME_EXPORT_INPUT_ID, config.RESUME_EXPORT_DEFAULT_VALUE)
+        pref[config.PROFILE_EXPORT_KEY] = input_values.get(PROFILE_EXPORT_INPUT_ID, config.PROFILE_EXPORT_DEFAULT_VALUE)
+        pref[config.PNG_TRIM_KEY] = input_values.get(PNG_TRIM_INPUT_ID, config.PNG_TRIM_DEFAULT_VALUE)
+        pref[config.PNG_TRANSPARENT_KEY] = input_values.get(PNG_TRANSPARENT_INPUT_ID, config.PNG_TRANSPARENT_DEFAULT_VALUE)
+        pref[config.PNG_COMPRESS_KEY] = input_values.get(PNG_COMPRESS_INPUT_ID, config.PNG_COMPRESS_DEFAULT_VALUE)
+        pref[config.CONTACT_SHEET_KEY] = input_values.get(CONTACT_SHEET_INPUT_ID, config.CONTACT_SHEET_DEFAULT_VALUE)
+        pref[config.CONTACT_SHEET_COLUMNS_KEY] = input_values.get(CONTACT_SHEET_COLUMNS_INPUT_ID, config.CONTACT_SHEET_COLUMNS_DEFAULT_VALUE)
+        pref[config.FIT_CAMERA_KEY] = input_values.get(FIT_CAMERA_INPUT_ID, config.FIT_CAMERA_DEFAULT_VALUE)
+        pref[config.STL_STATS_KEY] = input_values.get(STL_STATS_INPUT_ID, config.STL_STATS_DEFAULT_VALUE)
+        pref[config.STL_LOD_KEY] = input_values.get(STL_LOD_INPUT_ID, config.STL_LOD_DEFAULT_VALUE)
+        pref[config.STL_LOD_SUB_PATH_KEY] = input_values.get(STL_LOD_SUB_PATH_INPUT_ID, config.STL_LOD_SUB_PATH_DEFAULT_VALUE)
+        pref[config.STL_LOD_LEVELS_KEY] = input_values.get(STL_LOD_LEVELS_INPUT_ID, config.STL_LOD_LEVELS_DEFAULT_VALUE)
+        pref[config.ARCHIVE_FORMAT_KEY] = ARCHIVE_FORMAT_ITEMS.get(input_values.get(ARCHIVE_FORMAT_INPUT_ID), config.ARCHIVE_FORMAT_DEFAULT_VALUE)
+        pref[config.LAST_EXPORT_FOLDER_KEY] = str(base)
+        pref[config.EXPORT_ON_SAVE_KEY] = EXPORT_ON_SAVE_ITEMS.get(input_values.get(EXPORT_ON_SAVE_INPUT_ID), config.EXPORT_ON_SAVE_DEFAULT_VALUE)
+        pref[config.EXPORT_ON_SAVE_DELAY_KEY] = input_values.get(EXPORT_ON_SAVE_DELAY_INPUT_ID, config.EXPORT_ON_SAVE_DELAY_DEFAULT_VALUE)
+        pref[config.PNG_SIZES_KEY] = input_values.get(PNG_SIZES_INPUT_ID, config.PNG_SIZES_DEFAULT_VALUE)
+        pref[config.PNG_VIEWS_KEY] = input_values.get(PNG_VIEWS_INPUT_ID, config.PNG_VIEWS_DEFAULT_VALUE)
+        pref[config.GIT_STAGE_KEY] = input_values.get(GIT_STAGE_INPUT_ID, config.GIT_STAGE_DEFAULT_VALUE)
+        pref[config.EXPORT_BOM_KEY] = input_values.get(EXPORT_BOM_INPUT_ID, config.EXPORT_BOM_DEFAULT_VALUE)
+        pref[config.EXPORT_FORMATS_KEY] = [name for name in exporters.EXPORTERS if input_values.get(format_input_id(name), False)]
+        app_context.set_preferences(pref)
+
+        try:
+            arguments = export_options.export_arguments(pref, base)
+        except ValueError as e:
+            ao.ui.messageBox(str(e))  # type: ignore
+            return
 
         # Delegate actual export logic to helper module
-        export_helpers.export_components(
-            components, 
-            include_referenced_components, include_flagged_components,
-            root_name,
-            export_stl, stl_path, 
-            export_zsb, zsb_path, 
-            full_zsb_export, full_zsb_name,
-            export_png, png_path, 
-            w, h)
+        document = ao.app.activeDocument
+        changed = dirty_tracker.tracker.dirty(document) if pref[config.ONLY_EDITED_KEY] else None
+        result = export_helpers.export_components(components, changed_components=changed, **arguments)
+        if result['completed']:
+            dirty_tracker.tracker.exported(document, result['components'], scope == export_scope.SCOPE_ALL)
 
 
 
@@ -188,11 +292,14 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
     def on_create(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs):
         ao = apper.AppObjects()
 
+        scope_input = inputs.addDropDownCommandInput(SCOPE_INPUT_ID, 'Export:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, scope in SCOPE_ITEMS.items():
+            scope_input.listItems.add(item_name, scope == self.DEFAULT_SCOPE, '')
+
         sel = inputs.addSelectionInput(COMPONENTS_NAME_INPUT_ID, 'Components', 'Select components to export')
         if sel:
             sel.addSelectionFilter(adsk.core.SelectionCommandInput.Occurrences)
-            sel.setSelectionLimits(1, 0)
-            self.selectComponents(sel)
+            self.update_scope(inputs, self.DEFAULT_SCOPE)
 
         pref: dict = app_context.get_preferences()
             
@@ -203,11 +310,42 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
 
         inputs.addIntegerSpinnerCommandInput(IMAGE_WIDTH_INPUT_ID, 'Picture width:', 100, 2000, 1, pref[config.IMAGE_WIDTH_KEY])
         inputs.addIntegerSpinnerCommandInput(IMAGE_HEIGHT_INPUT_ID, 'Picture height:', 100, 2000, 1, pref[config.IMAGE_HEIGHT_KEY])
+        inputs.addStringValueInput(PNG_VIEWS_INPUT_ID, 'Further views (e.g. front, top, right):', pref[config.PNG_VIEWS_KEY])
+        inputs.addBoolValueInput(FIT_CAMERA_INPUT_ID, 'Let Fusion fit every picture (slower):', True, '', pref[config.FIT_CAMERA_KEY])
         inputs.addStringValueInput(ROOT_COMPONENT_NAME_INPUT_ID, 'Root compoent name:', pref[config.ROOT_COMPONENT_NAME_KEY])
+        inputs.addBoolValueInput(INCREMENTAL_EXPORT_INPUT_ID, 'Only export changed components:', True, '', pref[config.INCREMENTAL_EXPORT_KEY])
+        inputs.addBoolValueInput(ONLY_EDITED_INPUT_ID, 'Only export components edited since last export:', True, '', pref[config.ONLY_EDITED_KEY])
+        inputs.addBoolValueInput(RESUME_EXPORT_INPUT_ID, 'Resume interrupted export:', True, '', pref[config.RESUME_EXPORT_KEY])
+        inputs.addBoolValueInput(GIT_STAGE_INPUT_ID, 'Stage changed files in git:', True, '', pref[config.GIT_STAGE_KEY])
+        inputs.addBoolValueInput(EXPORT_BOM_INPUT_ID, 'Write bill of materials:', True, '', pref[config.EXPORT_BOM_KEY])
+        archive_input = inputs.addDropDownCommandInput(ARCHIVE_FORMAT_INPUT_ID, 'Archive:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, archive_format in ARCHIVE_FORMAT_ITEMS.items():
+            archive_input.listItems.add(item_name, archive_format == pref[config.ARCHIVE_FORMAT_KEY], '')
+        inputs.addBoolValueInput(PROFILE_EXPORT_INPUT_ID, 'Write profiling report:', True, '', pref[config.PROFILE_EXPORT_KEY])
 
         stl_group = inputs.addGroupCommandInput('stl_group_id', 'Component STL Export')
         stl_group.children.addBoolValueInput(EXPORT_STL_INPUT_ID, 'Export STLs', True, '', pref[config.EXPORT_STL_KEY])
         stl_group.children.addStringValueInput(STL_SUB_PATH_INPUT_ID, 'Subfolder:', pref[config.STL_SUB_PATH_KEY])
+        stl_mode_input = stl_group.children.addDropDownCommandInput(STL_MODE_INPUT_ID, 'Visibility:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, mode in STL_MODE_ITEMS.items():
+            stl_mode_input.listItems.add(item_name, mode == pref[config.STL_MODE_KEY], '')
+        stl_engine_input = stl_group.children.addDropDownCommandInput(STL_ENGINE_INPUT_ID, 'Engine:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, engine in STL_ENGINE_ITEMS.items():
+            stl_engine_input.listItems.add(item_name, engine == pref[config.STL_ENGINE_KEY], '')
+        stl_refinement_input = stl_group.children.addDropDownCommandInput(STL_REFINEMENT_INPUT_ID, 'Mesh refinement:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, refinement in STL_REFINEMENT_ITEMS.items():
+            stl_refinement_input.listItems.add(item_name, refinement == pref[config.STL_REFINEMENT_KEY], '')
+        stl_units_input = stl_group.children.addDropDownCommandInput(STL_UNITS_INPUT_ID, 'Mesh units:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, units in STL_UNITS_ITEMS.items():
+            stl_units_input.listItems.add(item_name, units == pref[config.STL_UNITS_KEY], '')
+        stl_group.children.addBoolValueInput(STL_STATS_INPUT_ID, 'Write geometry statistics', True, '', pref[config.STL_STATS_KEY])
+        stl_group.children.addBoolValueInput(STL_LOD_INPUT_ID, 'Export reduced preview STLs', True, '', pref[config.STL_LOD_KEY])
+        stl_group.children.addStringValueInput(STL_LOD_SUB_PATH_INPUT_ID, 'Preview subfolder:', pref[config.STL_LOD_SUB_PATH_KEY])
+        stl_group.children.addStringValueInput(STL_LOD_LEVELS_INPUT_ID, 'Preview sizes (ratio or triangles):', pref[config.STL_LOD_LEVELS_KEY])
+
+        formats_group = inputs.addGroupCommandInput('formats_group_id', 'Additional formats (one subfolder each)')
+        for name, exporter in exporters.EXPORTERS.items():
+            formats_group.children.addBoolValueInput(format_input_id(name), f'Export {exporter.label}', True, '', name in pref[config.EXPORT_FORMATS_KEY])
 
         zsb_group = inputs.addGroupCommandInput('zsb_group_id', 'Assembly pictures (PNG) = Components containing further compoenents')
         zsb_group.children.addBoolValueInput(EXPORT_ZSB_INPUT_ID, 'Export assembly pictures:', True, '', pref[config.EXPORT_ZSB_KEY])
@@ -218,5 +356,19 @@ class AbstractExportStlPngCommand(ABC, apper.Fusion360CommandBase):
         png_group = inputs.addGroupCommandInput('png_group_id', 'Component pictures (PNG)')
         png_group.children.addBoolValueInput(EXPORT_PNG_INPUT_ID, 'Export component pictures', True, '', pref[config.EXPORT_PNG_KEY])
         png_group.children.addStringValueInput(PNG_SUB_PATH_INPUT_ID, 'Subfolder:', pref[config.PNG_SUB_PATH_KEY])
+
+        png_post_group = inputs.addGroupCommandInput('png_post_group_id', 'Picture post-processing (all PNGs)')
+        png_post_group.children.addBoolValueInput(PNG_TRANSPARENT_INPUT_ID, 'Transparent background', True, '', pref[config.PNG_TRANSPARENT_KEY])
+        png_post_group.children.addBoolValueInput(PNG_TRIM_INPUT_ID, 'Crop to content', True, '', pref[config.PNG_TRIM_KEY])
+        png_post_group.children.addBoolValueInput(PNG_COMPRESS_INPUT_ID, 'Reduce colors and compress', True, '', pref[config.PNG_COMPRESS_KEY])
+        png_post_group.children.addStringValueInput(PNG_SIZES_INPUT_ID, 'Also in widths (e.g. 256, 2000):', pref[config.PNG_SIZES_KEY])
+        png_post_group.children.addBoolValueInput(CONTACT_SHEET_INPUT_ID, 'Create contact sheets of all pictures', True, '', pref[config.CONTACT_SHEET_KEY])
+        png_post_group.children.addIntegerSpinnerCommandInput(CONTACT_SHEET_COLUMNS_INPUT_ID, 'Pictures per row:', 1, 32, 1, pref[config.CONTACT_SHEET_COLUMNS_KEY])
+
+        save_group = inputs.addGroupCommandInput('export_on_save_group_id', 'Export on save')
+        save_input = save_group.children.addDropDownCommandInput(EXPORT_ON_SAVE_INPUT_ID, 'When saved:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, mode in EXPORT_ON_SAVE_ITEMS.items():
+            save_input.listItems.add(item_name, mode == pref[config.EXPORT_ON_SAVE_KEY], '')
+        save_group.children.addIntegerSpinnerCommandInput(EXPORT_ON_SAVE_DELAY_INPUT_ID, 'Wait for further saves (s):', 0, 600, 1, pref[config.EXPORT_ON_SAVE_DELAY_KEY])
         
 
@@ -0,0 +1,167 @@
+import adsk.core
+import adsk.fusion
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from ..apper import apper
+from . import export_helpers
+from . import export_options
+from . import export_scope
+from .output_paths import OutputPlanner
+from .. import app_context
+from .. import config
+
+# Input IDs
+BATCH_SOURCE_INPUT_ID = 'batch_source_input_id'
+BATCH_SUBFOLDERS_INPUT_ID = 'batch_subfolders_input_id'
+BATCH_INFO_INPUT_ID = 'batch_info_input_id'
+
+BATCH_SOURCE_OPEN = 'open'
+BATCH_SOURCE_FOLDER = 'folder'
+
+# Drop down entries for the documents to export
+BATCH_SOURCE_ITEMS = {
+    'All open designs': BATCH_SOURCE_OPEN,
+    'All designs in the active data panel folder': BATCH_SOURCE_FOLDER,
+}
+
+DESIGN_FILE_EXTENSION = 'f3d'
+
+# (name, function returning the opened document, close it when done)
+BatchJob = Tuple[str, Callable[[], adsk.core.Document], bool]
+
+
+def design_of(document: adsk.core.Document) -> Optional[adsk.fusion.Design]:
+    return adsk.fusion.Design.cast(document.products.itemByProductType('DesignProductType'))
+
+
+def folder_data_files(folder: adsk.core.DataFolder, include_subfolders: bool) -> List[adsk.core.DataFile]:
+    """Return the design files in a data panel folder."""
+    files = []
+    data_files = folder.dataFiles
+    for i in range(data_files.count):
+        data_file = data_files.item(i)
+        if data_file.fileExtension == DESIGN_FILE_EXTENSION:
+            files.append(data_file)
+    if include_subfolders:
+        folders = folder.dataFolders
+        for i in range(folders.count):
+            files += folder_data_files(folders.item(i), True)
+    return files
+
+
+def _activate(document: adsk.core.Document) -> adsk.core.Document:
+    document.activate()
+    return document
+
+
+def batch_jobs(app: adsk.core.Application, source: str, include_subfolders: bool) -> List[BatchJob]:
+    if source == BATCH_SOURCE_FOLDER:
+        return [(data_file.name, lambda data_file=data_file: app.documents.open(data_file, True), True)
+                for data_file in folder_data_files(app.data.activeFolder, include_subfolders)]
+    documents = app.documents
+    return [(document.name, lambda document=document: _activate(document), False)
+            for document in (documents.item(i) for i in range(documents.count))]
+
+
+class BatchExportCommand(apper.Fusion360CommandBase):
+    """Export several designs one after another with the stored options.
+
+    Every design is exported into its own subfolder of the chosen folder with
+    the options of the last export dialog. Documents opened for the export are
+    closed again before the next one is opened.
+    """
+
+    CMD_ID = 'batch_export_stl_png_cmd_id'
+
+    def on_create(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs):
+        pref: dict = app_context.get_preferences()
+
+        source_input = inputs.addDropDownCommandInput(BATCH_SOURCE_INPUT_ID, 'Designs:', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for item_name, source in BATCH_SOURCE_ITEMS.items():
+            source_input.listItems.add(item_name, source == pref[config.BATCH_SOURCE_KEY], '')
+        inputs.addBoolValueInput(BATCH_SUBFOLDERS_INPUT_ID, 'Include subfolders:', True, '', pref[config.BATCH_SUBFOLDERS_KEY])
+        inputs.addTextBoxCommandInput(BATCH_INFO_INPUT_ID, '', 'Each design is exported into its own subfolder using the options of the last export.', 2, True)
+
+    def on_execute(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values: dict):
+        ao = apper.AppObjects()
+
+        pref = app_context.get_preferences()
+        pref[config.BATCH_SOURCE_KEY] = BATCH_SOURCE_ITEMS.get(input_values.get(BATCH_SOURCE_INPUT_ID), config.BATCH_SOURCE_DEFAULT_VALUE)
+        pref[config.BATCH_SUBFOLDERS_KEY] = input_values.get(BATCH_SUBFOLDERS_INPUT_ID, config.BATCH_SUBFOLDERS_DEFAULT_VALUE)
+        app_context.set_preferences(pref)
+
+        folder_dlg = ao.ui.createFolderDialog()
+        folder_dlg.title = 'Choose Export Folder'
+        folder_dlg.initialDirectory = str(Path.home())
+        if folder_dlg.showDialog() != adsk.core.DialogResults.DialogOK:
+            return
+
+        base = Path(folder_dlg.folder)
+        err = export_helpers.check_folder_validity(base)
+        if err:
+            ao.ui.messageBox(f'Invalid base folder: {base} - {err}')  # type: ignore
+            return
+
+        jobs = batch_jobs(ao.app, pref[config.BATCH_SOURCE_KEY], pref[config.BATCH_SUBFOLDERS_KEY])
+        if not jobs:
+            ao.ui.messageBox('No designs found to export.')  # type: ignore
+            return
+
+        message = export_documents(jobs, pref, base)
+        ao.ui.messageBox(message)  # type: ignore
+
+
+def export_documents(jobs: List[BatchJob], pref: dict, base: Path) -> str:
+    """Export each document of ``jobs`` into a subfolder of ``base`` and return
+    the aggregated report.
+
+    Subfolder names are unique like component file names: documents whose
+    names sanitize to the same folder get a numbered suffix in job order.
+    """
+    folders = OutputPlanner({})
+    folders.plan((str(index), name) for index, (name, _, _) in enumerate(jobs))
+    lines = []
+    totals = {'stl': 0, 'png': 0, 'zsb': 0}
+    exported = 0
+    for index, (name, open_document, close_after) in enumerate(jobs):
+        document = None
+        try:
+            document = open_document()
+            design = design_of(document)
+            if design is None:
+                lines.append(f"{name}: not a design, skipped")
+                continue
+
+            folder = base / folders.name(str(index))
+            err = export_helpers.check_folder_validity(folder)
+            if err:
+                lines.append(f"{name}: invalid folder {folder} - {err}")
+                continue
+            arguments = export_options.export_arguments(pref, folder)
+            components = export_scope.resolve_scope(design.rootComponent, export_scope.SCOPE_ALL,
+                                                    arguments['include_referenced_components'], arguments['include_flagged_components'])
+            result = export_helpers.export_components(components, show_report=False, **arguments)
+        except Exception as e:
+            lines.append(f"{name}: failed - {e}")
+            continue
+        finally:
+            # Release the document before the next one is opened
+            if close_after and document is not None:
+                document.close(False)
+
+        exported += 1
+        for key in totals:
+            totals[key] += result[key]
+        line = f"{name}: {result['stl']} STL, {result['png']} PNG, {result['zsb']} ZSB"
+        if folder.name != export_helpers.sanitize_filename(name):
+            line += f" in {folder.name}"
+        if result['unchanged']:
+            line += f", {result['unchanged']} unchanged"
+        lines.append(line)
+        if not result['completed']:
+            lines.append('Batch export cancelled.')
+            break
+
+    summary = f"Batch export finished: {exported} of {len(jobs)} designs exported.\n{totals['stl']} STL, {totals['png']} PNG, {totals['zsb']} ZSB in total."
+    return summary + '\n\n' + '\n'.join(lines)
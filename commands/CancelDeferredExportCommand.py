@@ -0,0 +1,17 @@
+import adsk.core
+
+from ..apper import apper
+from .deferred_export import deferred_export
+
+
+class CancelDeferredExportCommand(apper.Fusion360CommandBase):
+    """Cancel the export scheduled by saving a document."""
+
+    CMD_ID = 'cancel_deferred_export_cmd_id'
+
+    def on_execute(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values: dict):
+        ao = apper.AppObjects()
+        if deferred_export.cancel():
+            ao.ui.messageBox('Pending export cancelled.')  # type: ignore
+        else:
+            ao.ui.messageBox('No export pending.')  # type: ignore
@@ -0,0 +1,57 @@
+import adsk.core
+import adsk.fusion
+
+from ..apper import apper
+
+from .dirty_tracker import changed_components, timeline_count, tracker
+
+# Navigation and selection commands never change geometry
+IGNORED_COMMANDS = {'SelectCommand', 'PanCommand', 'OrbitCommand', 'FreeOrbitCommand', 'ZoomCommand', 'FitCommand', 'ZoomWindowCommand'}
+
+# Export commands of this add-in only toggle visibility and restore it
+ADDIN_COMMAND_SUFFIXES = ('stl_png_cmd_id', 'deferred_export_cmd_id')
+
+
+class DesignChangedEvent(apper.Fusion360CommandEvent):
+    """Mark the components changed by every finished command as dirty.
+
+    Connected to ``commandTerminated``; new timeline features are attributed
+    to their components. A command that left the document unmodified, or the
+    timeline as long as it was (e.g. measuring), added no feature and is
+    ignored. Any other change cannot be attributed and stops tracking the
+    document, so its next export is a complete one (erring on the side of
+    exporting too much).
+    """
+
+    def command_event_received(self, event_args, command_id, command_definition):
+        if event_args.terminationReason != adsk.core.CommandTerminationReason.CompletedTerminationReason:
+            return
+        if command_id in IGNORED_COMMANDS or command_id.endswith(ADDIN_COMMAND_SUFFIXES):
+            return
+        ao = apper.AppObjects()
+        design = adsk.fusion.Design.cast(ao.app.activeProduct)
+        if not design:
+            return
+        document = ao.app.activeDocument
+        previous = tracker.timeline_count(document)
+        count = timeline_count(design)
+        tracker.seen(document, count)
+        if not document.isModified: # E.g. saved, nothing to export
+            return
+        if count is not None and count == previous:
+            return
+        component_ids = changed_components(design, previous)
+        if component_ids is None:
+            tracker.unknown(document)
+        else:
+            tracker.mark(document, component_ids)
+
+
+class DocumentOpenedEvent(apper.Fusion360DocumentEvent):
+    """Record the timeline length of an opened document, so the features
+    added by its first command can be attributed."""
+
+    def document_event_received(self, event_args, document):
+        design = adsk.fusion.Design.cast(document.products.itemByProductType('DesignProductType'))
+        if design:
+            tracker.seen(document, timeline_count(design))
@@ -2,6 +2,7 @@ import adsk.core
 import adsk.fusion
 import traceback
 from .AbstractExportStlPngCommand import AbstractExportStlPngCommand
+from . import export_scope
 
 from ..apper import apper
 
@@ -9,6 +10,9 @@ class ExportAllStlPngCommand(AbstractExportStlPngCommand):
     """Export all top-level occurrences in the active design."""
 
     CMD_ID = 'export_all_stl_png_cmd_id'
+    # All components are collected when the export starts; pre-selecting
+    # thousands of occurrences makes the dialog slow to open
+    DEFAULT_SCOPE = export_scope.SCOPE_ALL
             
 
 
@@ -1,15 +1,41 @@
 import adsk.core
 import traceback
+from pathlib import Path
 
 from ..apper import apper
 
 from .ExportVisibleStlPngCommand import ExportVisibleStlPngCommand
 from .ExportAllStlPngCommand import ExportAllStlPngCommand
+from . import export_helpers
+from . import export_options
+from . import export_scope
+from .deferred_export import deferred_export, EXPORT_ON_SAVE_DEFERRED, EXPORT_ON_SAVE_OFF
+from .dirty_tracker import document_key, tracker
+from .. import app_context
+from .. import config
+
+
+def log_message(text: str):
+    """Write to the Text Commands palette instead of interrupting the user."""
+    palette = apper.AppObjects().ui.palettes.itemById('TextCommands')
+    if palette:
+        palette.writeText(text)
+
 
 class ExportDocumentSavedEvent(apper.Fusion360DocumentEvent):
 
     def document_event_received(self, event_args, document):
         ao = apper.AppObjects()
+        tracker.saved(document)
+
+        mode = app_context.get_preference(config.EXPORT_ON_SAVE_KEY, config.EXPORT_ON_SAVE_DEFAULT_VALUE)
+        if mode == EXPORT_ON_SAVE_OFF:
+            return
+        if mode == EXPORT_ON_SAVE_DEFERRED:
+            # Return right away; the export runs once no further save came in
+            delay = app_context.get_preference(config.EXPORT_ON_SAVE_DELAY_KEY, config.EXPORT_ON_SAVE_DELAY_DEFAULT_VALUE)
+            deferred_export.schedule(document_key(document), float(delay))
+            return
 
         # Prompt the user whether to export components after save
         prompt = f"Document '{document.name}' was saved. Export all components? (No=visible ones only)?"
@@ -49,4 +75,48 @@ class ExportDocumentSavedEvent(apper.Fusion360DocumentEvent):
             else:
                 ao.ui.messageBox(f'Command ID id could not be resolved: {raw_cmd_id}, {addin.command_dict}')
         except Exception:
-            ui.messageBox('Export on save failed: {}'.format(__import__('traceback').format_exc()))
+            ao.ui.messageBox('Export on save failed: {}'.format(traceback.format_exc()))
+
+
+class DeferredExportEvent(apper.Fusion360CustomEvent):
+    """Run the export scheduled by saving a document.
+
+    All components of the saved design are exported into the folder of the
+    last export with the stored options; the report goes to the Text Commands
+    palette.
+    """
+
+    def custom_event_received(self, event_dict):
+        document_id = deferred_export.take()
+        if document_id is None:
+            return
+        try:
+            ao = apper.AppObjects()
+            if document_key(ao.app.activeDocument) != document_id:
+                log_message('Export on save skipped: the saved document is no longer active.')
+                return
+
+            pref = app_context.get_preferences()
+            folder = pref.get(config.LAST_EXPORT_FOLDER_KEY, config.LAST_EXPORT_FOLDER_DEFAULT_VALUE)
+            if not folder:
+                log_message('Export on save skipped: run an export once to choose the export folder.')
+                return
+            base = Path(folder)
+            err = export_helpers.check_folder_validity(base)
+            if err:
+                log_message(f'Export on save skipped: invalid base folder: {base} - {err}')
+                return
+            arguments = export_options.export_arguments(pref, base)
+
+            document = ao.app.activeDocument
+            changed = tracker.dirty(document) if pref.get(config.ONLY_EDITED_KEY, config.ONLY_EDITED_DEFAULT_VALUE) else None
+            components = export_scope.resolve_scope(ao.root_comp, export_scope.SCOPE_ALL,
+                                                    arguments['include_referenced_components'], arguments['include_flagged_components'])
+            result = export_helpers.export_components(components, show_report=False, changed_components=changed, **arguments)
+            if result['completed']:
+                tracker.exported(document, result['components'], True)
+            log_message(result['message'])
+        except ValueError as e:
+            log_message(f'Export on save skipped: {e}')
+        except Exception:
+            log_message('Export on save failed: {}'.format(traceback.format_exc()))
@@ -0,0 +1,165 @@
+import math
+import adsk.core
+import adsk.fusion
+from typing import Dict, List, Optional, Tuple
+
+from .visibility_helpers import occurrence_key
+
+# (min corner, max corner) of a world space bounding box
+Box = Tuple[Tuple[float, float, float], Tuple[float, float, float]]
+
+# Cache keys of the boxes that do not belong to an occurrence
+ROOT_BODIES_KEY = '<root bodies>'
+ASSEMBLY_KEY = '<assembly>'
+
+# Extra room around the bounding sphere so the geometry does not touch the border
+MARGIN = 1.05
+
+# Views pictures can be rendered in, by the name used in file names
+VIEW_ORIENTATIONS = {
+    'iso': 'IsoTopRightViewOrientation',
+    'iso_top_left': 'IsoTopLeftViewOrientation',
+    'iso_bottom_right': 'IsoBottomRightViewOrientation',
+    'iso_bottom_left': 'IsoBottomLeftViewOrientation',
+    'front': 'FrontViewOrientation',
+    'back': 'BackViewOrientation',
+    'top': 'TopViewOrientation',
+    'bottom': 'BottomViewOrientation',
+    'left': 'LeftViewOrientation',
+    'right': 'RightViewOrientation',
+}
+# View of the main picture of every component
+DEFAULT_VIEW = 'iso'
+
+
+def view_orientation(view: str) -> adsk.core.ViewOrientations:
+    return getattr(adsk.core.ViewOrientations, VIEW_ORIENTATIONS[view])
+
+
+def parse_views(text: str) -> List[str]:
+    """Parse a comma separated list of view names into the additional views
+    to render; the default view is always rendered and skipped here. Raises
+    ValueError on unknown names."""
+    views = []
+    for part in text.split(','):
+        view = part.strip().lower()
+        if not view or view == DEFAULT_VIEW or view in views:
+            continue
+        if view not in VIEW_ORIENTATIONS:
+            raise ValueError(f"Unknown view: {part.strip()}, use one of {', '.join(VIEW_ORIENTATIONS)}")
+        views.append(view)
+    return views
+
+
+def _box_of(bounding_box: Optional[adsk.core.BoundingBox3D]) -> Optional[Box]:
+    if bounding_box is None or not bounding_box.isValid:
+        return None
+    lo = bounding_box.minPoint
+    hi = bounding_box.maxPoint
+    box = ((lo.x, lo.y, lo.z), (hi.x, hi.y, hi.z))
+    if any(h < l for l, h in zip(*box)):
+        return None
+    return box
+
+
+def _union(boxes: List[Optional[Box]]) -> Optional[Box]:
+    boxes = [box for box in boxes if box is not None]
+    if not boxes:
+        return None
+    lo = tuple(min(box[0][i] for box in boxes) for i in range(3))
+    hi = tuple(max(box[1][i] for box in boxes) for i in range(3))
+    return lo, hi
+
+
+class CameraPlanner:
+    """Place the render camera from cached bounding boxes instead of ``fit()``.
+
+    ``viewport.fit()`` lets Fusion compute the extents of the visible scene for
+    every picture. Here the world bounding box of each exported occurrence is
+    read once per run and the camera is set directly: it looks at the box
+    centre along the iso top-right direction, far enough away for the bounding
+    sphere to fill the picture. That direction is taken once per view from a
+    fitted view of that orientation, so it follows the design's up axis.
+
+    ``place()`` returns False if no usable box is known; the caller then falls
+    back to ``fit()``.
+    """
+
+    def __init__(self):
+        self._boxes: Dict[str, Optional[Box]] = {}
+        # View name -> (direction towards the eye, up vector), None if unusable
+        self._views: Dict[str, Optional[Tuple[Tuple[float, float, float], Tuple[float, float, float]]]] = {}
+        self.placed = 0
+        self.fallbacks = 0
+
+    def occurrence_box(self, occ: adsk.fusion.Occurrence) -> Optional[Box]:
+        """Box of an occurrence with all its children."""
+        key = occurrence_key(occ)
+        if key not in self._boxes:
+            self._boxes[key] = _box_of(occ.boundingBox)
+        return self._boxes[key]
+
+    def root_bodies_box(self, root: adsk.fusion.Component) -> Optional[Box]:
+        """Box of the bodies directly in the root component."""
+        if ROOT_BODIES_KEY not in self._boxes:
+            bodies = root.bRepBodies
+            self._boxes[ROOT_BODIES_KEY] = _union([_box_of(bodies.item(i).boundingBox) for i in range(bodies.count)])
+        return self._boxes[ROOT_BODIES_KEY]
+
+    def assembly_box(self, root: adsk.fusion.Component) -> Optional[Box]:
+        """Box of the whole design."""
+        if ASSEMBLY_KEY not in self._boxes:
+            self._boxes[ASSEMBLY_KEY] = _box_of(root.boundingBox)
+        return self._boxes[ASSEMBLY_KEY]
+
+    def _calibrate(self, viewport: adsk.core.Viewport, view: str):
+        """Read view direction and up vector of a fitted view."""
+        self._views[view] = None
+        camera = viewport.camera
+        camera.isSmoothTransition = False
+        camera.viewOrientation = view_orientation(view) # type: ignore[assignment]
+        camera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType # type: ignore[assignment]
+        viewport.camera = camera
+        viewport.fit()
+
+        camera = viewport.camera
+        eye, target = camera.eye, camera.target
+        direction = (eye.x - target.x, eye.y - target.y, eye.z - target.z)
+        length = math.sqrt(sum(c * c for c in direction))
+        if length > 0:
+            up = camera.upVector
+            self._views[view] = (tuple(c / length for c in direction), (up.x, up.y, up.z))
+
+    def place(self, viewport: adsk.core.Viewport, box: Optional[Box], width: int, height: int,
+              view: str = DEFAULT_VIEW) -> bool:
+        """Point the camera at ``box``; False if the caller has to ``fit()``."""
+        if box is not None and view not in self._views:
+            self._calibrate(viewport, view)
+        orientation = self._views.get(view)
+        if box is None or orientation is None:
+            self.fallbacks += 1
+            return False
+        direction, up = orientation
+
+        lo, hi = box
+        center = tuple((l + h) / 2 for l, h in zip(lo, hi))
+        radius = math.sqrt(sum((h - l) ** 2 for l, h in zip(lo, hi))) / 2 * MARGIN
+        if radius <= 0:
+            self.fallbacks += 1
+            return False
+
+        camera = viewport.camera
+        # The narrower side of the picture limits the visible angle
+        half_angle = math.atan(math.tan(camera.perspectiveAngle / 2) * min(width, height) / max(width, height))
+        distance = radius / math.sin(half_angle)
+
+        camera.isSmoothTransition = False
+        camera.isFitView = False
+        camera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType # type: ignore[assignment]
+        camera.target = adsk.core.Point3D.create(*center)
+        camera.eye = adsk.core.Point3D.create(*(c + d * distance for c, d in zip(center, direction)))
+        camera.upVector = adsk.core.Vector3D.create(*up)
+        camera.viewExtents = radius
+        viewport.camera = camera
+        self.placed += 1
+        return True
@@ -0,0 +1,110 @@
+import csv
+import json
+import adsk.core
+import adsk.fusion
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .visibility_helpers import OccurrenceTree
+
+# File names of the bill of materials written into the export base folder
+BOM_JSON_FILE_NAME = 'bom.json'
+BOM_CSV_FILE_NAME = 'bom.csv'
+BOM_FIELDS = ['name', 'id', 'instances', 'bodies', 'children', 'referenced', 'path']
+
+
+class ComponentRecord:
+    """Properties of one component, read from Fusion once per export."""
+
+    __slots__ = ('id', 'name', 'is_referenced', 'body_count', 'child_count', 'instances', 'path')
+
+    def __init__(self, occ: adsk.fusion.Occurrence, component: adsk.fusion.Component, path: str):
+        self.id: str = component.id
+        self.name: str = component.name
+        self.is_referenced: bool = occ.isReferencedComponent
+        self.body_count: int = component.bRepBodies.count
+        self.child_count: int = occ.childOccurrences.count
+        self.instances = 0
+        self.path = path # Full path name of the first occurrence
+
+    @property
+    def is_exportable(self) -> bool:
+        return self.body_count > 0
+
+    @property
+    def is_zsb(self) -> bool:
+        return self.child_count > 0
+
+    def row(self) -> dict:
+        return {'name': self.name, 'id': self.id, 'instances': self.instances, 'bodies': self.body_count,
+                'children': self.child_count, 'referenced': self.is_referenced, 'path': self.path}
+
+
+class ComponentIndex:
+    """One record per unique component of the occurrence tree.
+
+    The occurrences of ``tree`` are visited once; the properties of a component
+    are only read for its first occurrence, further instances just increase its
+    instance count. Occurrence names are kept per occurrence, as the flag
+    prefix is set on occurrences.
+
+    Without a ``tree`` records are only created for the occurrences looked up,
+    so an export that changes no visibility never walks the whole design;
+    ``with_parents`` and ``write_bom`` need the tree.
+    """
+
+    def __init__(self, tree: Optional[OccurrenceTree] = None):
+        self.tree = tree
+        self.records: Dict[str, ComponentRecord] = {}
+        self._by_occurrence: List[ComponentRecord] = []
+        self._names: List[str] = []
+        if tree is None:
+            return
+        for index, occ in enumerate(tree.occurrences):
+            record = self._record(occ, tree.keys[index])
+            record.instances += 1
+            self._names.append(occ.name)
+            self._by_occurrence.append(record)
+
+    def _record(self, occ: adsk.fusion.Occurrence, path: str) -> ComponentRecord:
+        component = occ.component
+        record = self.records.get(component.id)
+        if record is None:
+            record = self.records[component.id] = ComponentRecord(occ, component, path)
+        return record
+
+    def lookup(self, occ: adsk.fusion.Occurrence) -> Tuple[ComponentRecord, str]:
+        """Return the record of an occurrence and its occurrence name."""
+        index = self.tree.index_of(occ) if self.tree is not None else None
+        if index is None: # Not indexed or not below the indexed root
+            record = self._record(occ, occ.fullPathName)
+            record.instances = max(record.instances, 1)
+            return record, occ.name
+        return self._by_occurrence[index], self._names[index]
+
+    def with_parents(self, component_ids: Set[str]) -> Set[str]:
+        """Return ``component_ids`` plus the components of all occurrences
+        containing one of them, i.e. the assemblies whose pictures show them."""
+        result = set(component_ids)
+        for index, record in enumerate(self._by_occurrence):
+            if record.id in component_ids:
+                result.update(self._by_occurrence[parent].id for parent in self.tree.ancestors(index))
+        return result
+
+    def write_bom(self, folder: Path) -> List[str]:
+        """Write all components with their instance counts as JSON and CSV into
+        ``folder`` and return the written files."""
+        rows = sorted((record.row() for record in self.records.values()), key=lambda row: (row['name'], row['id']))
+        with open(folder / BOM_JSON_FILE_NAME, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=1)
+        with open(folder / BOM_CSV_FILE_NAME, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=BOM_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return [str(folder / BOM_JSON_FILE_NAME), str(folder / BOM_CSV_FILE_NAME)]
+
+    def summary(self) -> str:
+        if self.tree is None:
+            return f"{len(self.records)} unique components."
+        instances = sum(record.instances for record in self.records.values())
+        return f"{len(self.records)} unique components in {instances} occurrences."
@@ -0,0 +1,196 @@
+import json
+import os
+import re
+import struct
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from .output_writer import OutputWriter
+from .png_postprocess import Image, is_available
+
+# Names of the files written into the contact sheet folder
+SHEET_FILE_PREFIX = 'contact_sheet'
+MAP_FILE_NAME = 'contact_sheet.json'
+SHEET_FILE_PATTERN = re.compile(re.escape(SHEET_FILE_PREFIX) + r'_(\d+)\.png')
+# Compressed rows are spooled next to the sheet until it is closed
+SPOOL_SUFFIX = '.idat'
+
+TILE_WIDTH = 256
+ROWS_PER_SHEET = 8
+BACKGROUND = (255, 255, 255, 0)
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+
+class PngStreamWriter:
+    """Write an RGBA PNG row by row without holding the whole image.
+
+    The compressed pixel data is spooled to a side file, because the image
+    height has to be known for the header before the data can be written.
+    """
+
+    def __init__(self, file_name: str, width: int):
+        self.file_name = file_name
+        self.width = width
+        self.height = 0
+        self._spool_name = file_name + SPOOL_SUFFIX
+        self._spool = open(self._spool_name, 'wb')
+        self._compressor = zlib.compressobj(9)
+
+    def write_rows(self, rgba: bytes, rows: int):
+        """Append ``rows`` rows of raw RGBA pixels."""
+        stride = self.width * 4
+        for y in range(rows):
+            # Filter type 0 (none) per scanline
+            self._spool.write(self._compressor.compress(b'\x00' + rgba[y * stride:(y + 1) * stride]))
+        self.height += rows
+
+    def close(self):
+        self._spool.write(self._compressor.flush())
+        self._spool.close()
+        with open(self._spool_name, 'rb') as spool, open(self.file_name, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 6, 0, 0, 0)))
+            while True:
+                data = spool.read(1 << 20)
+                if not data:
+                    break
+                f.write(_png_chunk(b'IDAT', data))
+            f.write(_png_chunk(b'IEND', b''))
+        os.remove(self._spool_name)
+
+
+class ContactSheetBuilder:
+    """Assemble exported pictures into tiled contact sheets while exporting.
+
+    Tiles are placed in the order they are added. Only the current row of
+    tiles is kept in memory; full rows are compressed into the sheet file
+    straight away. A JSON map lists the sheet and position of every tile.
+    Sheets and map are committed through ``writer``, so unchanged files are
+    kept, and sheets left over from a run with more sheets are removed.
+    """
+
+    def __init__(self, folder: Optional[Path], columns: int, aspect: float, writer: OutputWriter):
+        self.folder = folder
+        self.writer = writer
+        self.columns = max(columns, 1)
+        self.tile_width = TILE_WIDTH
+        self.tile_height = max(int(TILE_WIDTH * aspect), 1)
+        self.errors: List[str] = []
+        self._tiles: List[dict] = []
+        self._sheets: List[str] = []
+        self._row = None
+        self._column = 0
+        self._sheet: Optional[PngStreamWriter] = None
+        self._sheet_rows = 0
+        self._requested = folder is not None
+        # A single worker keeps the tile order stable
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='contact_sheet') if folder is not None and is_available() else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def add(self, name: str, file_name: str, after: Optional[Future] = None):
+        """Queue a picture; ``after`` is waited for first (e.g. its post-processing)."""
+        if self.enabled:
+            self._executor.submit(self._add, name, file_name, after)
+
+    def _add(self, name: str, file_name: str, after: Optional[Future]):
+        try:
+            if after is not None:
+                after.result()
+            with Image.open(file_name) as source:
+                tile = source.convert('RGBA')
+            tile.thumbnail((self.tile_width, self.tile_height), Image.LANCZOS)
+        except Exception as e:
+            self.errors.append(f"{name}: {e}")
+            return
+
+        if self._row is None:
+            self._row = Image.new('RGBA', (self.tile_width * self.columns, self.tile_height), BACKGROUND)
+        x = self._column * self.tile_width + (self.tile_width - tile.width) // 2
+        y = (self.tile_height - tile.height) // 2
+        self._row.paste(tile, (x, y))
+        if self._sheet is None:
+            self._start_sheet()
+        self._tiles.append({
+            'name': name,
+            'file': os.path.basename(file_name),
+            'sheet': os.path.basename(self._sheets[-1]),
+            'x': self._column * self.tile_width,
+            'y': self._sheet_rows * self.tile_height,
+            'width': self.tile_width,
+            'height': self.tile_height,
+        })
+        self._column += 1
+        if self._column == self.columns:
+            self._flush_row()
+
+    def _start_sheet(self):
+        file_name = str(self.folder / f"{SHEET_FILE_PREFIX}_{len(self._sheets) + 1}.png")
+        self._sheets.append(file_name)
+        # The spool file of the sheet is cleaned up with the temporary files too
+        self.writer.temp(file_name + SPOOL_SUFFIX)
+        self._sheet = PngStreamWriter(self.writer.temp(file_name), self.tile_width * self.columns)
+        self._sheet_rows = 0
+
+    def _close_sheet(self):
+        self._sheet.close()
+        self.writer.commit(self._sheets[-1])
+        self._sheet = None
+
+    def _flush_row(self):
+        self._sheet.write_rows(self._row.tobytes(), self.tile_height)
+        self._row = None
+        self._column = 0
+        self._sheet_rows += 1
+        if self._sheet_rows == ROWS_PER_SHEET:
+            self._close_sheet()
+
+    def _finish(self):
+        if self._row is not None:
+            self._flush_row()
+        if self._sheet is not None:
+            self._close_sheet()
+        map_file = str(self.folder / MAP_FILE_NAME)
+        if self._tiles:
+            with open(self.writer.temp(map_file), 'w', encoding='utf-8') as f:
+                json.dump({'tile_width': self.tile_width, 'tile_height': self.tile_height,
+                           'sheets': [os.path.basename(s) for s in self._sheets], 'tiles': self._tiles}, f, indent=1)
+            self.writer.commit(map_file)
+        elif os.path.exists(map_file):
+            self.writer.remove(map_file)
+        # Sheets of an earlier run that needed more of them
+        for entry in os.listdir(self.folder):
+            match = SHEET_FILE_PATTERN.fullmatch(entry)
+            if match and int(match.group(1)) > len(self._sheets):
+                self.writer.remove(str(self.folder / entry))
+
+    @property
+    def files(self) -> List[str]:
+        """The sheets and the map written so far."""
+        files = list(self._sheets)
+        if self._tiles and self.folder is not None:
+            files.append(str(self.folder / MAP_FILE_NAME))
+        return files
+
+    def close(self):
+        """Wait for all queued pictures and write the last sheet and the map."""
+        if self._executor is not None:
+            self._executor.submit(self._finish).result()
+            self._executor.shutdown(wait=True)
+
+    def summary(self) -> str:
+        if not self._requested:
+            return ''
+        if not is_available():
+            return 'Contact sheet skipped: Pillow is not installed.'
+        text = f"{len(self._tiles)} pictures on {len(self._sheets)} contact sheets."
+        if self.errors:
+            text += f"\n{len(self.errors)} failed: {', '.join(self.errors)}"
+        return text
@@ -0,0 +1,77 @@
+import adsk.core
+import json
+import threading
+from typing import Optional
+
+# Custom event fired when a deferred export is due
+DEFERRED_EXPORT_EVENT_ID = 'auto_exporter_deferred_export'
+
+# What happens when a document is saved
+EXPORT_ON_SAVE_PROMPT = 'prompt' # Ask the user and open the export dialog (original behaviour)
+EXPORT_ON_SAVE_DEFERRED = 'deferred' # Export with the stored options once saving has settled
+EXPORT_ON_SAVE_OFF = 'off'
+
+
+class DeferredExport:
+    """Coalesce saves into one export that runs after a quiet period.
+
+    Every save restarts the timer, so a series of saves within ``delay``
+    seconds triggers a single export. When the timer expires the custom event
+    is fired; Fusion delivers it on the main thread once it is idle, where
+    ``take`` hands out the document to export. ``cancel`` drops a pending run,
+    even if its event was already fired.
+    """
+
+    def __init__(self, event_id: str):
+        self.event_id = event_id
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._document_id: Optional[str] = None
+        self.saves = 0
+
+    @property
+    def pending(self) -> bool:
+        return self._document_id is not None
+
+    def schedule(self, document_id: str, delay: float):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._document_id = document_id
+            self.saves += 1
+            self._timer = threading.Timer(delay, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+            if self._document_id is None:
+                return
+            document_id = self._document_id
+        adsk.core.Application.get().fireCustomEvent(self.event_id, json.dumps({'document': document_id}))
+
+    def take(self) -> Optional[str]:
+        """Return the document of the pending export and clear it, or None if
+        the export was cancelled or is already done."""
+        with self._lock:
+            if self._timer is not None: # Saved again after the event was fired
+                return None
+            document_id = self._document_id
+            self._document_id = None
+            self.saves = 0
+            return document_id
+
+    def cancel(self) -> bool:
+        """Drop the pending export; returns whether there was one."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            was_pending = self._document_id is not None
+            self._document_id = None
+            self.saves = 0
+            return was_pending
+
+
+deferred_export = DeferredExport(DEFERRED_EXPORT_EVENT_ID)
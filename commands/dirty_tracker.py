@@ -0,0 +1,167 @@
+import adsk.core
+import adsk.fusion
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+from .. import config
+
+# File in the add-in folder the dirty components are kept in between sessions
+DIRTY_FILE_NAME = 'dirty_components.json'
+
+
+def document_key(document: adsk.core.Document) -> str:
+    """Identify a document across saves (saving creates a new version)."""
+    data_file = document.dataFile
+    return data_file.id if data_file else document.name
+
+
+def _version(document: adsk.core.Document) -> int:
+    data_file = document.dataFile
+    return data_file.versionNumber if data_file else 0
+
+
+class DirtyComponentTracker:
+    """Ids of the components changed since their last export, per document.
+
+    Components are marked while the user edits the design; an export of the
+    changed components clears them again. A document is only tracked once it
+    was exported completely while the add-in was running, and only as long as
+    its saved version is the one seen last: a document never exported, or
+    saved without the add-in watching, reports ``None`` (unknown, export
+    everything). The state is written to ``path`` whenever it changes, so a
+    restart does not force a full export. The timeline length after the last
+    command is kept with it, as new features are found by comparing lengths.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._documents: Optional[Dict[str, dict]] = None
+        self._timeline_counts: Dict[str, Optional[int]] = {}
+
+    def _entries(self) -> Dict[str, dict]:
+        if self._documents is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._documents = json.load(f)
+            except (OSError, ValueError):
+                self._documents = {}
+        return self._documents
+
+    def _save(self):
+        tmp = str(self.path) + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._documents, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass # Losing the state only means a full export next time
+
+    def mark(self, document: adsk.core.Document, component_ids: Iterable[str]):
+        entry = self._entries().get(document_key(document))
+        if entry is None: # Not tracked, everything is exported anyway
+            return
+        ids = set(entry['ids'])
+        if not ids.issuperset(component_ids):
+            entry['ids'] = sorted(ids.union(component_ids))
+            self._save()
+
+    def timeline_count(self, document: adsk.core.Document) -> Optional[int]:
+        """Return the timeline length last seen, or None if unknown."""
+        key = document_key(document)
+        if key in self._timeline_counts:
+            return self._timeline_counts[key]
+        entry = self._entries().get(key)
+        if entry is None or entry['version'] != _version(document):
+            return None
+        return entry.get('timeline')
+
+    def seen(self, document: adsk.core.Document, count: Optional[int]):
+        """Remember the timeline length after a command, or of an opened document."""
+        key = document_key(document)
+        self._timeline_counts[key] = count
+        entry = self._entries().get(key)
+        if entry is not None and entry.get('timeline') != count:
+            entry['timeline'] = count
+            self._save()
+
+    def unknown(self, document: adsk.core.Document):
+        """Stop tracking a document whose changes cannot be attributed; its
+        next export is a complete one again."""
+        if self._entries().pop(document_key(document), None) is not None:
+            self._save()
+
+    def saved(self, document: adsk.core.Document):
+        """Accept the new version written by a save the add-in has seen."""
+        entry = self._entries().get(document_key(document))
+        if entry is not None and entry['version'] != _version(document):
+            entry['version'] = _version(document)
+            self._save()
+
+    def dirty(self, document: adsk.core.Document) -> Optional[Set[str]]:
+        """Return the changed component ids, or None if unknown."""
+        entry = self._entries().get(document_key(document))
+        if entry is None or entry['version'] != _version(document):
+            return None
+        return set(entry['ids'])
+
+    def exported(self, document: adsk.core.Document, component_ids: Set[str], everything: bool):
+        """Clear ``component_ids`` after an export of them completed.
+
+        Tracking of a document starts with a complete export of
+        ``everything``.
+        """
+        entries = self._entries()
+        key = document_key(document)
+        entry = entries.get(key)
+        if entry is None or entry['version'] != _version(document):
+            if not everything:
+                return
+            entries[key] = {'version': _version(document), 'ids': [], 'timeline': self._timeline_counts.get(key)}
+        else:
+            entry['ids'] = sorted(set(entry['ids']) - component_ids)
+        self._save()
+
+
+def changed_components(design: adsk.fusion.Design, timeline_count: Optional[int]) -> Optional[Set[str]]:
+    """Return the ids of the components a finished command changed, or None
+    if they are not known for sure.
+
+    Only features appended to the end of the timeline since
+    ``timeline_count`` can be attributed, each names its component. Any other
+    change (removed features, features inserted before the marker, direct
+    modeling, or a command before the timeline length is known) may have
+    touched every component.
+    """
+    if timeline_count is None or design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return None
+    timeline = design.timeline
+    if timeline.count <= timeline_count:
+        return None
+    # With the marker rolled back new features are inserted in the middle,
+    # the items after the old length are not the new ones
+    if timeline.markerPosition != timeline.count:
+        return None
+    ids = set()
+    for i in range(timeline_count, timeline.count):
+        entity = timeline.item(i).entity
+        occ = adsk.fusion.Occurrence.cast(entity)
+        if occ:
+            ids.add(occ.component.id)
+            ids.add(occ.sourceComponent.id)
+            continue
+        component = getattr(entity, 'parentComponent', None)
+        if component is None:
+            return None
+        ids.add(component.id)
+    return ids
+
+
+def timeline_count(design: adsk.fusion.Design) -> Optional[int]:
+    if design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return None
+    return design.timeline.count
+
+
+tracker = DirtyComponentTracker(Path(config.app_path) / DIRTY_FILE_NAME)
@@ -0,0 +1,103 @@
+import os
+import tarfile
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Set
+
+# Archive formats and the file name each one is written to in the export folder
+ARCHIVE_FORMAT_ZIP = 'zip'
+ARCHIVE_FORMAT_TAR = 'tar'
+ARCHIVE_FILE_NAMES = {
+    ARCHIVE_FORMAT_ZIP: 'export.zip',
+    ARCHIVE_FORMAT_TAR: 'export.tar.gz',
+}
+
+# Already compressed files are stored as they are
+STORED_EXTENSIONS = ('.png', '.3mf', '.zip')
+
+
+class ArchiveWriter:
+    """Stream exported files into a ZIP or tar archive on a background thread.
+
+    Files are queued as soon as they are written (after their post-processing,
+    if ``after`` is given), so the archive is complete once the export is and
+    no file has to be read again afterwards. Names in the archive are relative
+    to the folder of the archive. The archive is written to a temporary file and only moved to
+    its final name when it is complete.
+    """
+
+    def __init__(self, path: Optional[Path], archive_format: str = ARCHIVE_FORMAT_ZIP):
+        self.path = path
+        self.archive_format = archive_format
+        self.root = path.parent if path is not None else None
+        self.files = 0
+        self.errors: List[str] = []
+        self._names: Set[str] = set()
+        self._archive = None
+        self._tmp_path = str(path) + '.tmp' if path is not None else None
+        # A single worker, archive formats cannot be written concurrently
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='export_archive') if path is not None else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def add(self, files: List[str], after: Sequence[Optional[Future]] = ()):
+        """Queue files; the futures in ``after`` are waited for first (e.g. their
+        post-processing)."""
+        if self.enabled:
+            for file_name in files:
+                self._executor.submit(self._add, file_name, after)
+
+    def _open(self):
+        if self.archive_format == ARCHIVE_FORMAT_TAR:
+            self._archive = tarfile.open(self._tmp_path, 'w:gz')
+        else:
+            self._archive = zipfile.ZipFile(self._tmp_path, 'w', zipfile.ZIP_DEFLATED)
+
+    def _add(self, file_name: str, after: Sequence[Optional[Future]]):
+        arcname = os.path.basename(file_name)
+        try:
+            for future in after:
+                if future is not None:
+                    future.result()
+            if not os.path.exists(file_name): # Failed in an earlier stage, reported there
+                return
+            arcname = Path(os.path.relpath(file_name, self.root)).as_posix()
+            if arcname in self._names:
+                return
+            self._names.add(arcname)
+            if self._archive is None:
+                self._open()
+            if self.archive_format == ARCHIVE_FORMAT_TAR:
+                self._archive.add(file_name, arcname)
+            else:
+                compression = zipfile.ZIP_STORED if file_name.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                self._archive.write(file_name, arcname, compress_type=compression)
+            self.files += 1
+        except Exception as e:
+            self.errors.append(f"{arcname}: {e}")
+
+    def _finish(self):
+        try:
+            if self._archive is None:
+                self._open()
+            self._archive.close()
+            os.replace(self._tmp_path, self.path)
+        except Exception as e:
+            self.errors.append(f"{self.path.name}: {e}")
+
+    def close(self):
+        """Wait for all queued files and move the finished archive in place."""
+        if self._executor is not None:
+            self._executor.submit(self._finish).result()
+            self._executor.shutdown(wait=True)
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return ''
+        text = f"{self.files} files archived in {self.path.name}."
+        if self.errors:
+            text += f"\n{len(self.errors)} failed: {', '.join(self.errors)}"
+        return text
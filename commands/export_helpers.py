@@ -1,9 +1,29 @@
 import adsk.core
 import adsk.fusion
+import os
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Callable, Optional, List
+from typing import Callable, Dict, Optional, List, Sequence, Set, Tuple
 
 from ..apper import apper
+from . import export_profiler
+from .export_profiler import ExportProfiler
+from .camera_planner import Box, CameraPlanner, DEFAULT_VIEW, view_orientation
+from .component_index import ComponentIndex
+from .contact_sheet import ContactSheetBuilder
+from .export_archive import ARCHIVE_FORMAT_ZIP, ArchiveWriter
+from .export_journal import ExportJournal
+from .export_manifest import ExportManifest, ComponentFingerprinter, ROOT_KEY, FULL_ASSEMBLY_KEY
+from .export_scheduler import ExportScheduler
+from .exporters import Exporter, exporters_for
+from .output_paths import OutputPlanner, sanitize_filename
+from .output_writer import OutputWriter
+from .png_postprocess import PngPostProcessor
+from .stl_analysis import StlAnalyzer
+from .stl_lod import StlLodGenerator, lod_file_names
+from .stl_mesh import STL_ENGINE_FUSION, STL_ENGINE_MESH, StlMeshEngine, subtree_bodies
+from .visibility_helpers import VisibilityPlanner, set_component_folders, root_folder_flags
 
 
 def check_folder_validity(path: Path) -> Optional[str]:
@@ -38,13 +58,19 @@ def check_folder_validity(path: Path) -> Optional[str]:
     return None
 
 
+@contextmanager
+def _cleanup_stage(errors: List[str], stage: str):
+    """Record the error of a stage finishing an export, so the stages after
+    it (and the removal of temporary files) still run."""
+    try:
+        yield
+    except Exception as e:
+        errors.append(f"{stage}: {e}")
+
+
 def set_occurrence_recursive(occurrence: adsk.fusion.Occurrence, predicate: Callable[[adsk.fusion.Occurrence], bool]):
     """Set visibility for an occurrence and all children based on predicate."""
-    occurrence.component.isJointsFolderLightBulbOn = False
-    occurrence.component.isOriginFolderLightBulbOn = False
-    occurrence.component.isSketchFolderLightBulbOn = False
-    occurrence.component.isBodiesFolderLightBulbOn = True
-    occurrence.component.isConstructionFolderLightBulbOn = True
+    set_component_folders(occurrence.component)
 
     occurrence.isLightBulbOn = bool(predicate(occurrence))
 
@@ -65,160 +91,244 @@ def is_parent_of(potential_parent: adsk.fusion.Occurrence, occurrence: adsk.fusi
     return False
 
 
+def _planner_or_default(planner: Optional[VisibilityPlanner]) -> VisibilityPlanner:
+    """Return the given planner or index the active design for a single export."""
+    if planner is None:
+        planner = VisibilityPlanner.for_root(_app_objects().root_comp)
+    return planner
 
-def sanitize_filename(name: str, replacement: str = '_') -> str:
-    """Return a filesystem-safe filename by replacing unsafe characters.
 
-    This is a conservative sanitizer: it replaces characters that are invalid
-    in common filesystems and strips control characters. It also trims
-    whitespace from ends. Keeps file extensions if present (caller should
-    include extension separately).
-    """
-    # Keep only a whitelist of safe characters plus dot and dash
-    import re
-    name = name.strip()
-    # Replace path separators and control characters
-    name = re.sub(r'[\\/\x00-\x1f]', replacement, name)
-    # Replace other unsafe chars
-    name = re.sub(r'[:\*\?"<>\|]', replacement, name)
-    # Collapse multiple replacements
-    name = re.sub(re.escape(replacement) + r'+', replacement, name)
-    # Trim leading/trailing dots or spaces
-    name = name.strip(' .')
-    if len(name) == 0:
-        return 'unnamed'
-    return name
-
-
-def export_stl_to_file(file_name: str, occ: adsk.fusion.Occurrence):
-    """Export the given occurrence to an STL file.
-    """
-    ao = apper.AppObjects()
+def _show_only(planner: VisibilityPlanner, occ: adsk.fusion.Occurrence, include_descendants: bool):
+    """Make the given occurrence and its parents visible and hide all others."""
+    if planner.show_only(occ, include_descendants):
+        return
 
-    root = ao.root_comp
-    occs = root.occurrences
+    # Occurrence not found in the index: fall back to walking the whole tree
+    occs = _app_objects().root_comp.occurrences
     for i in range(occs.count):
         other = occs.item(i)
-        set_occurrence_recursive(other, lambda o: is_parent_of(o, occ)) # Make the current occurence and all its parents visible
+        set_occurrence_recursive(other, lambda o: is_parent_of(o, occ))
+    if include_descendants:
+        set_occurrence_recursive(occ, lambda o: True)
+    planner.invalidate()
+
+
+
+# How STL exports deal with the visibility of the other occurrences
+STL_MODE_VISIBILITY = 'visibility' # Show only the exported occurrence and its parents (original behaviour)
+STL_MODE_DIRECT = 'direct' # Export straight away, the STL options already target the occurrence
+STL_MODE_VERIFY = 'verify' # Export with visibility changes and compare against a direct export
+
+
+def stl_files_match(file_a: str, file_b: str) -> bool:
+    """Compare two STL files ignoring the header (binary) or solid name (ASCII)."""
+    with open(file_a, 'rb') as fa, open(file_b, 'rb') as fb:
+        head_a = fa.read(80)
+        head_b = fb.read(80)
+        if head_a.startswith(b'solid') != head_b.startswith(b'solid'):
+            return False
+        if head_a.startswith(b'solid'):
+            # ASCII: skip the first line holding the solid name
+            fa.seek(0)
+            fb.seek(0)
+            fa.readline()
+            fb.readline()
+        while True:
+            chunk_a = fa.read(1 << 20)
+            chunk_b = fb.read(1 << 20)
+            if chunk_a != chunk_b:
+                return False
+            if not chunk_a:
+                return True
 
-    export_mgr = ao.design.exportManager
-    opts = export_mgr.createSTLExportOptions(occ, file_name)
-    export_mgr.execute(opts)
 
+def verify_stl_export(file_name: str, export: Callable[[str], None]) -> bool:
+    """Repeat an STL export without visibility changes and compare the result
+    with the file already written to ``file_name``."""
+    base, ext = os.path.splitext(file_name)
+    verify_file = f"{base}.verify{ext}"
+    try:
+        export(verify_file)
+        return stl_files_match(file_name, verify_file)
+    finally:
+        if os.path.exists(verify_file):
+            os.remove(verify_file)
+
+
+def _app_objects() -> apper.AppObjects:
+    export_profiler.active().count('apper.AppObjects')
+    return apper.AppObjects()
 
-def export_full_assembly_image(file_name: str, width: int, height: int):
-    """Export a viewport snapshot of the root to an PNG file.
-    """
-    ao = apper.AppObjects()
-    viewport = ao.app.activeViewport
-
-    root = ao.root_comp
-    root.isJointsFolderLightBulbOn = False
-    root.isOriginFolderLightBulbOn = False
-    root.isSketchFolderLightBulbOn = False
-    root.isBodiesFolderLightBulbOn = True
-    root.isConstructionFolderLightBulbOn = False
-    
-    occs = root.occurrences
-    for i in range(occs.count):
-        other = occs.item(i)
-        set_occurrence_recursive(other, lambda o: True) # Make all elements visible
-    
-    # viewport.camera.isFitView = True
-    viewport.camera.isSmoothTransition = False
-    viewport.camera.viewOrientation = adsk.core.ViewOrientations.IsoTopRightViewOrientation # type: ignore[assignment]
-    viewport.camera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType # type: ignore[assignment]
-    viewport.fit()
-    viewport.saveAsImageFile(file_name, width, height)
 
+def _execute_stl_export(geometry, file_name: str):
+    """Run the Fusion STL export for an occurrence or component."""
+    profiler = export_profiler.active()
+    export_mgr = _app_objects().design.exportManager
+    with profiler.phase('exportManager.createSTLExportOptions'):
+        opts = export_mgr.createSTLExportOptions(geometry, file_name)
+    with profiler.phase('exportManager.execute'):
+        export_mgr.execute(opts)
 
-def export_png_to_file(file_name: str, occ: adsk.fusion.Occurrence, width: int, height: int):
-    """Export a viewport snapshot of the given occurrence to an PNG file.
+
+def _render_viewport(file_name: str, width: int, height: int, transparent: bool = False,
+                     camera: Optional[CameraPlanner] = None, box: Optional[Box] = None, view: str = DEFAULT_VIEW):
+    """Fit the current visible geometry into the viewport and save it as image.
+
+    With a camera planner and a known bounding box the camera is placed
+    directly, otherwise the view is fitted by Fusion.
     """
-    ao = apper.AppObjects()
-    viewport = ao.app.activeViewport
+    profiler = export_profiler.active()
+    viewport = _app_objects().app.activeViewport
+
+    placed = False
+    if camera is not None:
+        with profiler.phase('viewport.place'):
+            placed = camera.place(viewport, box, width, height, view)
+    if not placed:
+        with profiler.phase('viewport.camera'):
+            # viewport.camera returns a copy, the changes only apply once it is assigned back
+            camera_copy = viewport.camera
+            camera_copy.isSmoothTransition = False
+            camera_copy.viewOrientation = view_orientation(view) # type: ignore[assignment]
+            camera_copy.cameraType = adsk.core.CameraTypes.PerspectiveCameraType # type: ignore[assignment]
+            viewport.camera = camera_copy
+        with profiler.phase('viewport.fit'):
+            viewport.fit()
+    if transparent:
+        with profiler.phase('viewport.saveAsImageFileWithOptions'):
+            export_options = adsk.core.ImageExportOptions.create(file_name)
+            export_options.width = width
+            export_options.height = height
+            export_options.isBackgroundTransparent = True
+            viewport.saveAsImageFileWithOptions(export_options)
+    else:
+        with profiler.phase('viewport.saveAsImageFile'):
+            viewport.saveAsImageFile(file_name, width, height)
 
-    root = ao.root_comp
-    root.isJointsFolderLightBulbOn = False
-    root.isOriginFolderLightBulbOn = False
-    root.isSketchFolderLightBulbOn = False
-    root.isBodiesFolderLightBulbOn = False
-    root.isConstructionFolderLightBulbOn = False
 
-    occs = root.occurrences
-    for i in range(occs.count):
-        other = occs.item(i)
-        set_occurrence_recursive(other, lambda o: is_parent_of(o, occ)) # Make the current occurence and all its parents visible
+def _render_views(file_name: str, views: Sequence[Tuple[str, str]], width: int, height: int, transparent: bool,
+                  camera: Optional[CameraPlanner], box: Optional[Box]):
+    """Render the default view to ``file_name`` and each ``(view, file)`` of
+    ``views`` right after it; only the camera changes in between."""
+    _render_viewport(file_name, width, height, transparent, camera, box)
+    for view, view_file in views:
+        _render_viewport(view_file, width, height, transparent, camera, box, view)
 
-    set_occurrence_recursive(occ, lambda o: True) # Ensure all children of occurence are also visible
 
-    # viewport.camera.isFitView = True
-    viewport.camera.isSmoothTransition = False
-    viewport.camera.viewOrientation = adsk.core.ViewOrientations.IsoTopRightViewOrientation # type: ignore[assignment]
-    viewport.camera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType # type: ignore[assignment]
-    viewport.fit()
-    viewport.saveAsImageFile(file_name, width, height)
+def export_stl_to_file(file_name: str, occ: adsk.fusion.Occurrence, planner: Optional[VisibilityPlanner] = None,
+                       change_visibility: bool = True):
+    """Export the given occurrence to an STL file.
+
+    With ``change_visibility`` disabled no light bulbs are touched at all.
+    """
+    if change_visibility:
+        with export_profiler.active().phase('visibility'):
+            planner = _planner_or_default(planner)
+            _show_only(planner, occ, False) # Make the current occurence and all its parents visible
 
-#    export_options = adsk.fusion.ImageExportOptions.create(file_name)
-#    export_options.width = width
-#    export_options.height = height
-#    export_options.isBackgroundTransparent = transparency
-#    export_options.imageType = adsk.core.ImageFileTypes.PNGImageFileType
-#    view.saveAsImageFileWithOptions(export_options)
+    _execute_stl_export(occ, file_name)
 
 
+def export_stl_mesh_to_file(file_name: str, bodies: Sequence[adsk.fusion.BRepBody], engine: StlMeshEngine):
+    """Write the visible bodies to an STL file from their meshes and return
+    the triangles for further processing.
 
+    No light bulbs are touched; the bodies of an occurrence are proxies in the
+    context of the assembly.
+    """
+    profiler = export_profiler.active()
+    with profiler.phase('mesh.calculate'):
+        triangles = engine.triangles(bodies)
+    with profiler.phase('mesh.write'):
+        engine.write(file_name, triangles)
+    return triangles
 
 
+def export_formats_to_files(targets: List[Tuple[Exporter, str]], geometry, show: Optional[Callable[[], None]] = None,
+                            shown: bool = False):
+    """Export an occurrence or component to additional formats.
 
-def export_root_stl_to_file(file_name: str):
-    """Export the given occurrence to an STL file.
+    Formats that need visibility share one visibility setup: ``show`` is called
+    before the first of them, unless the geometry is already ``shown`` (e.g. by
+    the STL export). Without ``show`` no light bulbs are touched.
+    """
+    export_mgr = _app_objects().design.exportManager
+    for exporter, file_name in sorted(targets, key=lambda target: target[0].needs_visibility):
+        if exporter.needs_visibility and show is not None and not shown:
+            with export_profiler.active().phase('visibility'):
+                show()
+            shown = True
+        exporter.export(export_mgr, geometry, file_name)
+
+
+def export_full_assembly_image(file_name: str, width: int, height: int, planner: Optional[VisibilityPlanner] = None,
+                               transparent: bool = False, camera: Optional[CameraPlanner] = None,
+                               views: Sequence[Tuple[str, str]] = ()):
+    """Export a viewport snapshot of the root to an PNG file, plus one file per
+    additional ``(view, file)``.
     """
-    ao = apper.AppObjects()
+    with export_profiler.active().phase('visibility'):
+        planner = _planner_or_default(planner)
+        planner.state.set_folders(_app_objects().root_comp, root_folder_flags(True))
+        planner.show_all() # Make all elements visible
 
-    root = ao.root_comp
-    occs = root.occurrences
-    for i in range(occs.count):
-        other = occs.item(i)
-        set_occurrence_recursive(other, lambda o: False) # Hide all other elements  
+    box = None
+    if camera is not None:
+        with export_profiler.active().phase('camera.box'):
+            box = camera.assembly_box(_app_objects().root_comp)
+
+    _render_views(file_name, views, width, height, transparent, camera, box)
 
-    export_mgr = ao.design.exportManager
-    opts = export_mgr.createSTLExportOptions(root, file_name)
-    export_mgr.execute(opts)
 
-def export_root_png_to_file(file_name: str, width: int, height: int):
-    """Export a viewport snapshot of the given occurrence to an PNG file.
+def export_png_to_file(file_name: str, occ: adsk.fusion.Occurrence, width: int, height: int, planner: Optional[VisibilityPlanner] = None,
+                       transparent: bool = False, camera: Optional[CameraPlanner] = None,
+                       views: Sequence[Tuple[str, str]] = ()):
+    """Export a viewport snapshot of the given occurrence to an PNG file, plus
+    one file per additional ``(view, file)``.
     """
-    ao = apper.AppObjects()
-    viewport = ao.app.activeViewport
+    with export_profiler.active().phase('visibility'):
+        planner = _planner_or_default(planner)
+        planner.state.set_folders(_app_objects().root_comp, root_folder_flags(False))
+        _show_only(planner, occ, True) # Make the current occurence, all its parents and all its children visible
 
-    root = ao.root_comp
-    root.isJointsFolderLightBulbOn = False
-    root.isOriginFolderLightBulbOn = False
-    root.isSketchFolderLightBulbOn = False
-    root.isBodiesFolderLightBulbOn = True
-    root.isConstructionFolderLightBulbOn = False
+    box = None
+    if camera is not None:
+        with export_profiler.active().phase('camera.box'):
+            box = camera.occurrence_box(occ)
 
-    occs = root.occurrences
-    for i in range(occs.count):
-        other = occs.item(i)
-        set_occurrence_recursive(other, lambda o: False) # Hide all other elements
+    _render_views(file_name, views, width, height, transparent, camera, box)
 
-    # viewport.camera.isFitView = True
-    viewport.camera.isSmoothTransition = False
-    viewport.camera.viewOrientation = adsk.core.ViewOrientations.IsoTopRightViewOrientation # type: ignore[assignment]
-    viewport.camera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType # type: ignore[assignment]
-    viewport.fit()
-    viewport.saveAsImageFile(file_name, width, height)
 
-#    export_options = adsk.fusion.ImageExportOptions.create(file_name)
-#    export_options.width = width
-#    export_options.height = height
-#    export_options.isBackgroundTransparent = transparency
-#    export_options.imageType = adsk.core.ImageFileTypes.PNGImageFileType
-#    view.saveAsImageFileWithOptions(export_options)
+def export_root_stl_to_file(file_name: str, planner: Optional[VisibilityPlanner] = None,
+                            change_visibility: bool = True):
+    """Export the given occurrence to an STL file.
 
+    With ``change_visibility`` disabled no light bulbs are touched at all.
+    """
+    if change_visibility:
+        with export_profiler.active().phase('visibility'):
+            planner = _planner_or_default(planner)
+            planner.hide_all() # Hide all other elements
+
+    _execute_stl_export(_app_objects().root_comp, file_name)
+
+def export_root_png_to_file(file_name: str, width: int, height: int, planner: Optional[VisibilityPlanner] = None,
+                            transparent: bool = False, camera: Optional[CameraPlanner] = None,
+                            views: Sequence[Tuple[str, str]] = ()):
+    """Export a viewport snapshot of the root bodies to an PNG file, plus one
+    file per additional ``(view, file)``.
+    """
+    with export_profiler.active().phase('visibility'):
+        planner = _planner_or_default(planner)
+        planner.state.set_folders(_app_objects().root_comp, root_folder_flags(True))
+        planner.hide_all() # Hide all other elements
 
+    box = None
+    if camera is not None:
+        with export_profiler.active().phase('camera.box'):
+            box = camera.root_bodies_box(_app_objects().root_comp)
+
+    _render_views(file_name, views, width, height, transparent, camera, box)
 
 
 def is_zsb(occ: adsk.fusion.Occurrence) -> bool:
@@ -235,8 +345,79 @@ def export_components(components: List[adsk.fusion.Occurrence],
                       export_zsb: bool, zsb_path: Path, 
                       full_zsb_export: bool, full_zsb_name: str,
                       export_png: bool, png_path: Path, 
-                      width: int, height: int):
-    ao = apper.AppObjects()
+                      width: int, height: int,
+                      stl_mode: str = STL_MODE_VISIBILITY,
+                      manifest_path: Optional[Path] = None,
+                      profile_path: Optional[Path] = None,
+                      png_trim: bool = False, png_transparent: bool = False, png_compress: bool = False,
+                      stl_stats: bool = False,
+                      stl_lod: bool = False, stl_lod_path: Optional[Path] = None, stl_lod_levels: Optional[List[float]] = None,
+                      contact_sheet_path: Optional[Path] = None, contact_sheet_columns: int = 8,
+                      fit_camera: bool = False, journal_path: Optional[Path] = None, resume: bool = False,
+                      formats: Optional[Dict[str, Path]] = None,
+                      archive_path: Optional[Path] = None, archive_format: str = ARCHIVE_FORMAT_ZIP,
+                      bom_path: Optional[Path] = None,
+                      changed_components: Optional[Set[str]] = None,
+                      git_stage: bool = False,
+                      png_sizes: Optional[List[int]] = None,
+                      png_views: Optional[List[str]] = None,
+                      stl_engine: str = STL_ENGINE_FUSION, stl_refinement: str = 'normal', stl_units: str = 'mm',
+                      show_report: bool = True) -> dict:
+    """Export the given occurrences (and the root/full assembly) to STL and PNG.
+
+    If ``manifest_path`` is given, components whose fingerprint and output files
+    did not change since the export recorded there are skipped. If
+    ``profile_path`` is given, timings and API call counts are written there as
+    JSON report. Written PNGs are trimmed and recompressed by a background pool
+    if ``png_trim``/``png_compress`` are set. With ``stl_stats`` the geometry of
+    every written STL is analyzed in the background and indexed in the STL folder.
+    With ``stl_lod`` decimated copies of each STL are written to ``stl_lod_path``
+    (``<STL folder>_preview`` if not given) as ``<name>_lod<n>.stl``, one per
+    target in ``stl_lod_levels`` (ratios below 1, triangle counts above).
+    If ``contact_sheet_path`` is given, all pictures are also tiled into contact
+    sheets there. The camera is placed from cached bounding boxes unless
+    ``fit_camera`` asks for Fusion's fit for every picture. Every finished item
+    is journaled to ``journal_path`` once all its files are final; with
+    ``resume`` the items journaled by an interrupted export with the same
+    settings are not done again.
+
+    ``formats`` maps names of registered exporters (e.g. ``'3mf'``, ``'step'``)
+    to the folders their files are written to, in the same pass as STL and PNG.
+
+    With ``archive_path`` every written file is also streamed into a ZIP or tar
+    archive (``archive_format``) by a background thread.
+
+    The properties used to skip and deduplicate components are read once per
+    unique component into a ``ComponentIndex``; with ``bom_path`` the index is
+    also written there as bill of materials (``bom.json``/``bom.csv``).
+
+    ``changed_components`` are the ids of the components changed since the
+    last export (None if unknown). If given, only these components and the
+    assemblies containing them are exported; the files of all others are kept
+    as long as they exist.
+
+    Component files are written through an ``OutputWriter``: a file whose
+    content did not change is left untouched. With ``git_stage`` the changed
+    files are staged in their git repository at the end.
+
+    ``png_sizes`` are further picture widths: every picture is rendered once
+    at the largest size and scaled down in the background into a subfolder
+    per width (e.g. ``png/256``), which needs Pillow. ``png_views`` are further
+    view orientations (e.g. ``'front'``) rendered right after the main picture
+    while the visibility is set up, as ``<name>_<view>.png``.
+
+    With the ``'mesh'`` ``stl_engine`` STL files are written from the body
+    meshes at ``stl_refinement`` in ``stl_units`` instead of Fusion's STL
+    export; it needs no visibility changes, and statistics and previews reuse
+    the triangles (needs NumPy).
+
+    Returns the counts of the run and the report text, which is only shown
+    to the user if ``show_report`` is set.
+    """
+    profiler = ExportProfiler() if profile_path else None
+    export_profiler.activate(profiler)
+    profile = export_profiler.active()
+    ao = _app_objects()
 
     dlg = ao.ui.createProgressDialog()
     dlg.cancelButtonText = 'Cancel'
@@ -247,72 +428,421 @@ def export_components(components: List[adsk.fusion.Occurrence],
     ao.ui.activeSelections.clear() # Make sure no components are selected
     ao.design.activateRootComponent() # Ensure root component is active = no component is selected and hence blue
     
+    # Index the occurrence tree once so each export only touches the
+    # occurrences whose visibility actually changes
+    planner = VisibilityPlanner.for_root(ao.root_comp)
+    camera = None if fit_camera else CameraPlanner()
+
+    # Additional formats from the exporter registry
+    format_exporters = exporters_for(list(formats or {}))
+
+    # Only Fusion's STL export depends on the visibility, the mesh engine reads the bodies
+    mesh_engine = StlMeshEngine(export_stl and stl_engine == STL_ENGINE_MESH, stl_refinement, stl_units)
+    stl_change_visibility = stl_mode != STL_MODE_DIRECT
+    stl_shows = export_stl and stl_change_visibility and not mesh_engine.enabled
+    stl_verify = stl_mode == STL_MODE_VERIFY and not mesh_engine.enabled
+
+    # The whole tree is only walked if the visibility changes, or to find the
+    # parents of changed components and count instances for the BOM
+    needs_tree = stl_shows or export_png or export_zsb or full_zsb_export or bom_path is not None \
+        or changed_components is not None \
+        or (stl_change_visibility and any(exporter.needs_visibility for exporter in format_exporters))
+    with profile.phase('index'):
+        index = ComponentIndex(planner.tree if needs_tree else None)
+        changed = index.with_parents(changed_components) if changed_components is not None else None
+
+    def is_clean(key: str, outputs: List[str]) -> bool:
+        # Not changed since the last export and all files are still there
+        return changed is not None and key not in changed and all(os.path.exists(f) for f in outputs)
+
+    # Export neighbouring components one after another so that consecutive
+    # exports share most of their visible occurrences
+    scheduler = None
+    schedule_stl = stl_shows
+    if schedule_stl or export_png or export_zsb:
+        with profile.phase('schedule'):
+            scheduler = ExportScheduler(planner.tree, schedule_stl, export_png or export_zsb)
+            components = scheduler.order(list(components))
+    stl_mismatches = []
+    stl_checks = [] # (name, file, export without visibility changes), run once the visibility is restored
+    cleanup_errors: List[str] = [] # stages finishing the export that failed, the others still ran
+
+    # Incremental export: skip components unchanged since the last run
+    manifest = ExportManifest(manifest_path) if manifest_path else None
+    settings = f"{width}x{height}|{png_trim}|{png_transparent}|{png_compress}|{fit_camera}|{png_sizes or ''}|{png_views or ''}|{mesh_engine.settings}"
+    fingerprinter = ComponentFingerprinter(settings)
+    unchanged_items = 0
+    exported_items = [] # (manifest key, fingerprint, outputs), recorded once all files are final
+
+    # PNG post-processing runs in the background while the next item renders
+    png_pool = PngPostProcessor(png_trim, png_compress, sizes=png_sizes, width=width)
+    render_width, render_height = png_pool.render_size(width, height)
+    stl_analyzer = StlAnalyzer(stl_stats and export_stl)
+    writer = OutputWriter(git_stage)
+    contact_sheet = ContactSheetBuilder(contact_sheet_path, contact_sheet_columns, height / width, writer)
+    lod_generator = StlLodGenerator(stl_lod and export_stl, stl_lod_levels or [],
+                                    stl_lod_path or stl_path.with_name(f"{stl_path.name}_preview"))
+    archive = ArchiveWriter(archive_path, archive_format)
+
+    # Journal of the finished work, so a crashed or cancelled export can be resumed
+    journal = ExportJournal(journal_path, settings, resume)
+    completed = False
+
+    # Additional views rendered with each picture
+    views = png_views or []
+    views_exported = 0
+
+    # Pick the components to export and plan all output files in one pass
     exported_components = set()
+    covered_components = set() # All components of the export, including skipped ones
+    items = [] # (occurrence, component record) in export order
     skippedItems = 0
+    with profile.phase('paths'):
+        for occ in components:
+            if type(occ) != adsk.fusion.Occurrence:
+                skippedItems += 1
+                continue
+            record, occ_name = index.lookup(occ)
+            covered_components.add(record.id)
+            if record.is_referenced and not include_referenced_components: # Skip referenced components if not wanted
+                skippedItems += 1
+                dlg.progressValue += 1
+                continue
+            if occ_name.startswith('_') and not include_flagged_components: # Skip flagged components if not wanted
+                skippedItems += 1
+                dlg.progressValue += 1
+                continue
+            if record.id in exported_components: # Skip already exported components
+                skippedItems += 1
+                dlg.progressValue += 1
+                continue
+            exported_components.add(record.id)
+            items.append((occ, record))
+
+        folders = {'stl': (stl_path, '.stl'), 'png': (png_path, '.png'), 'zsb': (zsb_path, '.png')}
+        for kind, folder, enabled in (('png', png_path, export_png), ('zsb', zsb_path, export_zsb or full_zsb_export)):
+            if not enabled:
+                continue
+            for view in views:
+                folders[f'{kind}_{view}'] = (folder, f'_{view}.png')
+            for size in png_pool.sizes:
+                folders[f'{kind}_{size}'] = (folder / str(size), '.png')
+                for view in views:
+                    folders[f'{kind}_{view}_{size}'] = (folder / str(size), f'_{view}.png')
+        for exporter in format_exporters:
+            folders[exporter.name] = (formats[exporter.name], exporter.extension)
+        if lod_generator.enabled:
+            # Not written through the planner, but they must not clash either
+            for i, lod_file in enumerate(lod_file_names('', lod_generator.levels)):
+                folders[f'stl_lod{i + 1}'] = (lod_generator.folder, lod_file)
+        paths = OutputPlanner(folders)
+        # Only names that are written take a name away from the components
+        if ao.root_comp.bRepBodies.count > 0:
+            paths.reserve(ROOT_KEY, root_name)
+        if full_zsb_export:
+            paths.reserve(FULL_ASSEMBLY_KEY, full_zsb_name)
+        # Name collisions are resolved in tree order, independent of the export order
+        paths.plan((record.id, record.name) for record in index.records.values()
+                   if record.id in exported_components and (record.is_exportable or (export_zsb and record.is_zsb)))
+
+    def format_targets(key: str) -> List[Tuple[Exporter, str]]:
+        return [(exporter, paths.file(key, exporter.name)) for exporter in format_exporters]
+
+    def picture_sizes(key: str, kind: str) -> List[str]:
+        return [paths.file(key, f'{kind}_{size}') for size in png_pool.sizes]
+
+    def commit_picture(key: str, kind: str, file_name: str) -> Optional[Future]:
+        # Scale the render to all sizes, then move every changed file in place
+        variants = picture_sizes(key, kind)
+        done = png_pool.submit(writer.temp(file_name), [(writer.temp(variant), size) for variant, size in zip(variants, png_pool.sizes)])
+        for variant in variants:
+            writer.commit(variant, done)
+        return writer.commit(file_name, done)
+
+    def picture_views(key: str, kind: str) -> List[Tuple[str, str]]:
+        return [(view, paths.file(key, f'{kind}_{view}')) for view in views]
+
+    def picture_outputs(key: str, kind: str) -> List[str]:
+        # Files written along with a picture: its other sizes and views
+        files = picture_sizes(key, kind)
+        for view, view_file in picture_views(key, kind):
+            files += [view_file] + picture_sizes(key, f'{kind}_{view}')
+        return files
+
+    def temp_views(key: str, kind: str) -> List[Tuple[str, str]]:
+        return [(view, writer.temp(view_file)) for view, view_file in picture_views(key, kind)]
+
+    def commit_pictures(key: str, kind: str, file_name: str) -> List[Optional[Future]]:
+        # The future of the main picture comes first
+        done = [commit_picture(key, kind, file_name)]
+        done += [commit_picture(key, f'{kind}_{view}', view_file) for view, view_file in picture_views(key, kind)]
+        return done
+
+    formats_exported = 0
     zsb_exported = 0
     stl_exported = 0
     png_exported = 0
 
-    # Export root component if it has bodies 
-    root = ao.root_comp
-    if root.bRepBodies.count > 0: 
-        if export_stl:
-            out_stl = str((stl_path / f"{root_name}.stl").resolve())
-            export_root_stl_to_file(out_stl)
-            stl_exported += 1
-        if export_png:
-            out_png = str((png_path / f"{root_name}.png").resolve())
-            export_root_png_to_file(out_png, width, height)
-            png_exported += 1
-
-    # Export full ZSB if requested
-    if full_zsb_export:
-        full_zsb = str((zsb_path / f"{full_zsb_name}.png").resolve())
-        export_full_assembly_image(full_zsb, width, height)
-        zsb_exported += 1
-
-    # Export each component to STL and PNG
-    for occ in components:
-        if dlg.wasCancelled:
-            break
-
-        if type(occ) != adsk.fusion.Occurrence:
-            skippedItems += 1
-            continue
-
-        dlg.progressValue += 1
-        if occ.isReferencedComponent and not include_referenced_components: # Skip referenced components if not wanted
-            skippedItems += 1
-            continue
-        if occ.name.startswith('_') and not include_flagged_components: # Skip flagged components if not wanted
-            skippedItems += 1
-            continue
-
-        if occ.component.id in exported_components: # Skip already exported components
-            skippedItems += 1
-            continue
-        else:
-            exported_components.add(occ.component.id)
-
-        safe = sanitize_filename(occ.component.name)
-        
-        # If component has bodies -> export as STL + PNG (regardless of whether it's an assembly)
-        if is_exportable_component(occ):
-            if export_stl:
-                out_stl = str((stl_path / f"{safe}.stl").resolve())
-                export_stl_to_file(out_stl, occ)
-                stl_exported += 1
-            if export_png:
-                out_png = str((png_path / f"{safe}.png").resolve())
-                export_png_to_file(out_png, occ, width, height)
-                png_exported += 1
-        # If it's an assembly WITHOUT own bodies -> export only as ZSB PNG
-        elif is_zsb(occ):
-            if export_zsb:
-                out_zsb = str((zsb_path / f"{safe}.png").resolve())
-                export_png_to_file(out_zsb, occ, width, height)
+    try:
+        # Export root component if it has bodies 
+        root = ao.root_comp
+        if root.bRepBodies.count > 0: 
+            out_stl = paths.file(ROOT_KEY, 'stl')
+            out_png = paths.file(ROOT_KEY, 'png')
+            targets = format_targets(ROOT_KEY)
+            primary = [f for f, enabled in ((out_stl, export_stl), (out_png, export_png)) if enabled]
+            primary += [file_name for _, file_name in targets]
+            outputs = primary + lod_generator.outputs(root_name) + (picture_outputs(ROOT_KEY, 'png') if export_png else [])
+            with profile.phase('manifest'):
+                unchanged = is_clean(root.id, outputs)
+                fingerprint = fingerprinter.component(root, include_children=False) if manifest and not unchanged else ''
+                unchanged = unchanged or (manifest is not None and manifest.is_up_to_date(ROOT_KEY, fingerprint, outputs))
+            pending = [] # Background work on the outputs, waited for before archiving
+            if unchanged or journal.is_done(ROOT_KEY, outputs):
+                if unchanged:
+                    unchanged_items += 1
+                else:
+                    exported_items.append((ROOT_KEY, fingerprint, outputs))
+                if export_png:
+                    contact_sheet.add(root_name, out_png)
+            else:
+                with profile.component(root_name):
+                    if export_stl:
+                        triangles = None
+                        if mesh_engine.enabled:
+                            triangles = export_stl_mesh_to_file(writer.temp(out_stl), root.bRepBodies, mesh_engine)
+                        else:
+                            export_root_stl_to_file(writer.temp(out_stl), planner, stl_change_visibility)
+                        writer.commit(out_stl)
+                        if stl_verify:
+                            stl_checks.append((root_name, out_stl, lambda f: export_root_stl_to_file(f, change_visibility=False)))
+                        stl_analyzer.submit(root_name, out_stl, triangles)
+                        pending.append(lod_generator.submit(root_name, out_stl, triangles))
+                        stl_exported += 1
+                    if targets:
+                        export_formats_to_files(writer.temp_targets(targets), root, planner.hide_all if stl_change_visibility else None,
+                                                stl_shows)
+                        for exporter, file_name in targets:
+                            writer.commit(file_name)
+                        formats_exported += len(targets)
+                    if export_png:
+                        export_root_png_to_file(writer.temp(out_png), render_width, render_height, planner, png_transparent, camera,
+                                                temp_views(ROOT_KEY, 'png'))
+                        png_done, *views_done = commit_pictures(ROOT_KEY, 'png', out_png)
+                        pending += [png_done] + views_done
+                        views_exported += len(views_done)
+                        contact_sheet.add(root_name, out_png, png_done)
+                        png_exported += 1
+                exported_items.append((ROOT_KEY, fingerprint, outputs))
+                journal.record(ROOT_KEY, outputs, pending)
+            archive.add(outputs, pending)
+
+        # Export full ZSB if requested
+        if full_zsb_export:
+            full_zsb = paths.file(FULL_ASSEMBLY_KEY, 'zsb')
+            full_outputs = [full_zsb] + picture_outputs(FULL_ASSEMBLY_KEY, 'zsb')
+            with profile.phase('manifest'):
+                unchanged = changed is not None and not changed and all(os.path.exists(f) for f in full_outputs)
+                fingerprint = fingerprinter.component(root) if manifest and not unchanged else ''
+                unchanged = unchanged or (manifest is not None and manifest.is_up_to_date(FULL_ASSEMBLY_KEY, fingerprint, full_outputs))
+            if unchanged or journal.is_done(FULL_ASSEMBLY_KEY, full_outputs):
+                if unchanged:
+                    unchanged_items += 1
+                else:
+                    exported_items.append((FULL_ASSEMBLY_KEY, fingerprint, full_outputs))
+                contact_sheet.add(full_zsb_name, full_zsb)
+                archive.add(full_outputs)
+            else:
+                with profile.component(full_zsb_name):
+                    export_full_assembly_image(writer.temp(full_zsb), render_width, render_height, planner, png_transparent, camera,
+                                               temp_views(FULL_ASSEMBLY_KEY, 'zsb'))
+                    png_done, *views_done = commit_pictures(FULL_ASSEMBLY_KEY, 'zsb', full_zsb)
+                    views_exported += len(views_done)
+                    contact_sheet.add(full_zsb_name, full_zsb, png_done)
+                    journal.record(FULL_ASSEMBLY_KEY, full_outputs, [png_done] + views_done)
+                    archive.add(full_outputs, [png_done] + views_done)
                 zsb_exported += 1
-
+                exported_items.append((FULL_ASSEMBLY_KEY, fingerprint, full_outputs))
+
+        # Export each component to STL and PNG
+        for occ, record in items:
+            if dlg.wasCancelled:
+                break
+
+            dlg.progressValue += 1
+            key = record.id
+
+            # If component has bodies -> export as STL + PNG (regardless of whether it's an assembly)
+            # If it's an assembly WITHOUT own bodies -> export only as ZSB PNG
+            exportable = record.is_exportable
+            if not (exportable or (export_zsb and record.is_zsb)):
+                continue # No files planned for it
+            safe = paths.name(key)
+            out_stl = paths.file(key, 'stl')
+            out_png = paths.file(key, 'png')
+            out_zsb = paths.file(key, 'zsb')
+            targets = format_targets(key)
+            if exportable:
+                primary = [f for f, enabled in ((out_stl, export_stl), (out_png, export_png)) if enabled]
+                primary += [file_name for _, file_name in targets]
+                outputs = primary + lod_generator.outputs(safe) + (picture_outputs(key, 'png') if export_png else [])
+            else:
+                primary = [out_zsb]
+                outputs = primary + picture_outputs(key, 'zsb')
+            if not outputs:
+                continue
+
+            with profile.phase('manifest'):
+                unchanged = is_clean(key, outputs)
+                fingerprint = fingerprinter.occurrence(occ) if manifest and not unchanged else ''
+                unchanged = unchanged or (manifest is not None and manifest.is_up_to_date(key, fingerprint, outputs))
+            if unchanged or journal.is_done(key, outputs):
+                if unchanged:
+                    unchanged_items += 1
+                else:
+                    exported_items.append((key, fingerprint, outputs))
+                # Keep the contact sheet complete with the pictures of the last run
+                for picture in primary:
+                    if picture.endswith('.png'):
+                        contact_sheet.add(safe, picture)
+                archive.add(outputs)
+                continue
+
+            pending = []
+
+            with profile.component(safe):
+                if exportable:
+                    if export_stl:
+                        triangles = None
+                        if mesh_engine.enabled:
+                            triangles = export_stl_mesh_to_file(writer.temp(out_stl), subtree_bodies(occ.bRepBodies, occ.childOccurrences), mesh_engine)
+                        else:
+                            export_stl_to_file(writer.temp(out_stl), occ, planner, stl_change_visibility)
+                        writer.commit(out_stl)
+                        if stl_verify:
+                            stl_checks.append((safe, out_stl, lambda f, occ=occ: export_stl_to_file(f, occ, change_visibility=False)))
+                        stl_analyzer.submit(safe, out_stl, triangles)
+                        pending.append(lod_generator.submit(safe, out_stl, triangles))
+                        stl_exported += 1
+                    if targets:
+                        show = (lambda: _show_only(planner, occ, False)) if stl_change_visibility else None
+                        export_formats_to_files(writer.temp_targets(targets), occ, show, stl_shows)
+                        for exporter, file_name in targets:
+                            writer.commit(file_name)
+                        formats_exported += len(targets)
+                    if export_png:
+                        export_png_to_file(writer.temp(out_png), occ, render_width, render_height, planner, png_transparent, camera,
+                                           temp_views(key, 'png'))
+                        png_done, *views_done = commit_pictures(key, 'png', out_png)
+                        pending += [png_done] + views_done
+                        views_exported += len(views_done)
+                        contact_sheet.add(safe, out_png, png_done)
+                        png_exported += 1
+                else:
+                    export_png_to_file(writer.temp(out_zsb), occ, render_width, render_height, planner, png_transparent, camera,
+                                       temp_views(key, 'zsb'))
+                    png_done, *views_done = commit_pictures(key, 'zsb', out_zsb)
+                    pending += [png_done] + views_done
+                    views_exported += len(views_done)
+                    contact_sheet.add(safe, out_zsb, png_done)
+                    zsb_exported += 1
+            exported_items.append((key, fingerprint, outputs))
+            journal.record(key, outputs, pending)
+            archive.add(outputs, pending)
+
+        completed = not dlg.wasCancelled
+
+        if stl_checks:
+            # Repeat the STL exports with the visibility the user had, the
+            # exports above all ran with their occurrence isolated
+            with profile.phase('visibility.restore'):
+                planner.restore()
+            with profile.phase('stl.verify'):
+                for name, file_name, export in stl_checks:
+                    if not verify_stl_export(file_name, export):
+                        stl_mismatches.append(name)
+    finally:
+        index_files: List[str] = []
+        try:
+            # Give the user back the visibility they had before the export
+            with _cleanup_stage(cleanup_errors, 'visibility'), profile.phase('visibility.restore'):
+                planner.restore()
+            with _cleanup_stage(cleanup_errors, 'PNG post-processing'), profile.phase('png.drain'):
+                png_pool.drain()
+            with _cleanup_stage(cleanup_errors, 'output files'), profile.phase('png.drain'):
+                writer.drain()
+            with _cleanup_stage(cleanup_errors, 'contact sheet'), profile.phase('png.contact_sheet'):
+                contact_sheet.close()
+            with _cleanup_stage(cleanup_errors, 'STL index'), profile.phase('stl.analysis'):
+                stl_analyzer.drain()
+                index_files += stl_analyzer.write_index(stl_path)
+            if bom_path is not None:
+                with _cleanup_stage(cleanup_errors, 'bill of materials'), profile.phase('bom'):
+                    index_files += index.write_bom(bom_path)
+            with _cleanup_stage(cleanup_errors, 'STL previews'), profile.phase('stl.lod'):
+                lod_generator.drain()
+            with _cleanup_stage(cleanup_errors, 'archive'), profile.phase('archive'):
+                archive.add(contact_sheet.files + index_files)
+                archive.close()
+            with _cleanup_stage(cleanup_errors, 'git'), profile.phase('git'):
+                writer.close()
+                writer.stage()
+            if manifest:
+                with _cleanup_stage(cleanup_errors, 'manifest'):
+                    for key, fingerprint, outputs in exported_items:
+                        manifest.record(key, fingerprint, outputs)
+                    manifest.save()
+            with _cleanup_stage(cleanup_errors, 'journal'):
+                journal.close(completed)
+            export_profiler.activate(None)
+        finally:
+            # Temporary files of a failed export must not linger next to the outputs
+            writer.remove_temps()
 
     dlg.hide()
-    ao.ui.messageBox(f"Export finished.\n{len(components)} items processed of which {skippedItems} were skipped.\n\n{stl_exported} STL exported.\n{zsb_exported} ZSB exported.\n{png_exported} PNG exported.")  # type: ignore
+    message = f"Export finished.\n{len(components)} items processed of which {skippedItems} were skipped.\n\n{stl_exported} STL exported.\n{zsb_exported} ZSB exported.\n{png_exported} PNG exported."
+    if views:
+        message += f"\n{views_exported} pictures in the views {', '.join(views)}."
+    if format_exporters:
+        message += f"\n{formats_exported} {'/'.join(exporter.label for exporter in format_exporters)} files exported."
+    message += f"\n\n{index.summary()}\n{planner.state.summary()}"
+    if scheduler:
+        message += f"\n{scheduler.summary()}"
+    if paths.summary():
+        message += f"\n{paths.summary()}"
+    if manifest or changed is not None:
+        message += f"\n{unchanged_items} unchanged items not exported again."
+    if journal.summary():
+        message += f"\n{journal.summary()}"
+    if not completed and journal_path:
+        message += "\nExport was cancelled, it can be resumed with the next export."
+    if cleanup_errors:
+        message += f"\n\nFinishing the export failed: {', '.join(cleanup_errors)}"
+    for stage_summary in (writer.summary(), mesh_engine.summary(), png_pool.summary(), contact_sheet.summary(), stl_analyzer.summary(), lod_generator.summary(), archive.summary()):
+        if stage_summary:
+            message += f"\n\n{stage_summary}"
+    if profiler:
+        profiler.count('visibility.writes_issued', planner.state.writes_issued)
+        profiler.count('visibility.writes_avoided', planner.state.writes_avoided)
+        profiler.finish()
+        profiler.write_report(profile_path)
+        message += f"\n\n{profiler.summary()}\nReport: {profile_path}"
+    if stl_verify:
+        if stl_mismatches:
+            message += f"\n\nSTL verification: {len(stl_mismatches)} differ without visibility changes: {', '.join(stl_mismatches)}"
+        else:
+            message += "\n\nSTL verification: all STL files are identical without visibility changes."
+    if show_report:
+        ao.ui.messageBox(message)  # type: ignore
+    return {
+        'items': len(components),
+        'skipped': skippedItems,
+        'stl': stl_exported,
+        'zsb': zsb_exported,
+        'png': png_exported,
+        'formats': formats_exported,
+        'unchanged': unchanged_items,
+        'completed': completed,
+        'components': covered_components | {ao.root_comp.id},
+        'message': message,
+    }
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+# File name of the journal written into the export base folder
+JOURNAL_FILE_NAME = '.export_journal.jsonl'
+
+
+class ExportJournal:
+    """Append-only record of the work finished by the running export.
+
+    Every finished item is appended as one JSON line (component key and all
+    its files) and flushed straight away, so the journal survives a crash or a
+    cancelled export. An item is only recorded once the background work on
+    its files is done and they are in place. The first line holds the export settings; a journal
+    written with different settings is not resumed. The journal is deleted once
+    an export completes.
+    """
+
+    def __init__(self, path: Optional[Path], settings: str, resume: bool):
+        self.path = path
+        self.settings = settings
+        self.resumed = 0
+        self._done: Dict[str, Set[str]] = {}
+        self._file = None
+        self._lock = threading.Lock()
+        if path is None:
+            return
+        if resume:
+            self._load()
+        self._file = open(path, 'a' if self._done else 'w', encoding='utf-8')
+        if not self._done:
+            self._write({'settings': settings})
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        if not lines:
+            return
+        try:
+            if json.loads(lines[0]).get('settings') != self.settings:
+                return
+        except (ValueError, AttributeError):
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+                self._done.setdefault(entry['key'], set()).update(entry['files'])
+            except (ValueError, KeyError, TypeError):
+                # The last line may be cut off by a crash
+                continue
+
+    def _write(self, entry: dict):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+
+    def is_done(self, key: str, outputs: List[str]) -> bool:
+        """Return True if an interrupted run already wrote all ``outputs`` of
+        this item (including its sizes, views and previews) and the files
+        still exist."""
+        done = self._done.get(key)
+        if not done or not outputs:
+            return False
+        if not all(file_name in done and os.path.exists(file_name) for file_name in outputs):
+            return False
+        self.resumed += 1
+        return True
+
+    def record(self, key: str, outputs: List[str], after: Sequence[Optional[Future]] = ()):
+        """Record the ``outputs`` of an item once the background work in
+        ``after`` finished, i.e. once all files are final."""
+        if self._file is None:
+            return
+        futures = [future for future in after if future is not None]
+        if not futures:
+            self._record(key, outputs)
+            return
+        remaining = [len(futures)]
+
+        def finished(_):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            self._record(key, outputs)
+
+        for future in futures:
+            future.add_done_callback(finished)
+
+    def _record(self, key: str, outputs: List[str]):
+        with self._lock:
+            if self._file is None: # Closed while the work was still running
+                return
+            self._write({'key': key, 'files': outputs})
+            self._done.setdefault(key, set()).update(outputs)
+
+    def close(self, completed: bool):
+        """Close the journal; a completed export needs no resume and removes it."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        if completed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def summary(self) -> str:
+        if not self.resumed:
+            return ''
+        return f"{self.resumed} items already written by the interrupted export."
@@ -0,0 +1,129 @@
+import adsk.core
+import adsk.fusion
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# File name of the manifest written into the export base folder
+MANIFEST_FILE_NAME = '.export_manifest.json'
+MANIFEST_VERSION = 1
+
+# Manifest keys for the exports that do not belong to a single component
+ROOT_KEY = '<root>'
+FULL_ASSEMBLY_KEY = '<full>'
+
+
+class ComponentFingerprinter:
+    """Compute change fingerprints for components, cached for one export run.
+
+    A fingerprint covers the geometry of the component's own bodies (counts,
+    volume, area, bounding box, appearance) and, for assemblies, the
+    fingerprints and placement of all child occurrences. Anything that changes
+    an exported STL or rendered PNG is expected to change the fingerprint.
+    """
+
+    def __init__(self, settings: str = ''):
+        self._settings = settings
+        self._cache: Dict[str, str] = {}
+
+    def component(self, component: adsk.fusion.Component, include_children: bool = True) -> str:
+        key = f"{component.id}|{include_children}"
+        fingerprint = self._cache.get(key)
+        if fingerprint is None:
+            data = [self._settings, component.id, component.name]
+            bodies = component.bRepBodies
+            for i in range(bodies.count):
+                data.append(_body_data(bodies.item(i)))
+            if include_children:
+                occs = component.occurrences
+                for i in range(occs.count):
+                    child = occs.item(i)
+                    data.append([child.name, self.component(child.component), child.transform2.asArray()])
+            fingerprint = _hash(data)
+            self._cache[key] = fingerprint
+        return fingerprint
+
+    def occurrence(self, occ: adsk.fusion.Occurrence) -> str:
+        """Fingerprint of an occurrence including its placement in the assembly,
+        which determines how it is rendered."""
+        return _hash([self.component(occ.component), occ.transform2.asArray()])
+
+
+def _body_data(body: adsk.fusion.BRepBody) -> list:
+    box = body.boundingBox
+    appearance = body.appearance
+    return [
+        body.name,
+        body.faces.count,
+        body.edges.count,
+        body.vertices.count,
+        round(body.volume, 9),
+        round(body.area, 9),
+        box.minPoint.asArray(),
+        box.maxPoint.asArray(),
+        appearance.name if appearance else None,
+    ]
+
+
+def _hash(data) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ExportManifest:
+    """Record of the fingerprint and output files of every exported component.
+
+    Stored as JSON next to the exported folders and used to skip components
+    that did not change since they were last exported.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self._entries = data.get('components', {})
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'components': self._entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def is_up_to_date(self, key: str, fingerprint: str, outputs: List[str]) -> bool:
+        """Return True if the component was exported with this fingerprint to
+        exactly these files and none of them was modified since."""
+        entry = self._entries.get(key)
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            return False
+        files: Dict[str, list] = entry.get('outputs', {})
+        if sorted(files) != sorted(outputs):
+            return False
+        for file_name, (size, mtime_ns) in files.items():
+            stat = _stat(file_name)
+            if stat is None or stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                return False
+        return True
+
+    def record(self, key: str, fingerprint: str, outputs: List[str]):
+        files = {}
+        for file_name in outputs:
+            stat = _stat(file_name)
+            if stat is not None:
+                files[file_name] = [stat.st_size, stat.st_mtime_ns]
+        self._entries[key] = {'fingerprint': fingerprint, 'outputs': files}
+
+
+def _stat(file_name: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(file_name)
+    except OSError:
+        return None
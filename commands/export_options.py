@@ -0,0 +1,124 @@
+from pathlib import Path
+
+from . import camera_planner
+from . import export_archive
+from . import export_helpers
+from . import export_journal
+from . import export_manifest
+from . import export_profiler
+from . import exporters
+from . import png_postprocess
+from . import stl_lod
+from . import stl_mesh
+from .. import config
+
+
+def _sub_folder(base: Path, pref: dict, key: str, default: str, label: str) -> Path:
+    path = base / str(pref.get(key, default)).lstrip('/')
+    err = export_helpers.check_folder_validity(path)
+    if err:
+        raise ValueError(f'Invalid {label} folder: {path} - {err}')
+    return path
+
+
+def export_arguments(pref: dict, base: Path) -> dict:
+    """Build the keyword arguments of ``export_components`` (except the
+    components) from stored preferences, exporting into ``base``.
+
+    Output folders are created as needed. Raises ValueError with a message for
+    the user if a folder or option is invalid.
+    """
+    export_stl = pref.get(config.EXPORT_STL_KEY, config.EXPORT_STL_DEFAULT_VALUE)
+    export_zsb = pref.get(config.EXPORT_ZSB_KEY, config.EXPORT_ZSB_DEFAULT_VALUE)
+    export_png = pref.get(config.EXPORT_PNG_KEY, config.EXPORT_PNG_DEFAULT_VALUE)
+    full_zsb_export = pref.get(config.EXPORT_FULL_ZSB_KEY, config.EXPORT_FULL_ZSB_DEFAULT_VALUE)
+
+    stl_path = _sub_folder(base, pref, config.STL_SUB_PATH_KEY, config.STL_SUB_PATH_DEFAULT_VALUE, 'STL') if export_stl else base
+    zsb_path = _sub_folder(base, pref, config.ZSB_SUB_PATH_KEY, config.ZSB_SUB_PATH_DEFAULT_VALUE, 'ZSB') if export_zsb else base
+    png_path = _sub_folder(base, pref, config.PNG_SUB_PATH_KEY, config.PNG_SUB_PATH_DEFAULT_VALUE, 'PNG') if export_png else base
+
+    export_stl_lod = pref.get(config.STL_LOD_KEY, config.STL_LOD_DEFAULT_VALUE) and export_stl
+    stl_lod_path = base
+    stl_lod_levels = []
+    if export_stl_lod:
+        stl_lod_path = _sub_folder(base, pref, config.STL_LOD_SUB_PATH_KEY, config.STL_LOD_SUB_PATH_DEFAULT_VALUE, 'STL preview')
+        if stl_lod_path.resolve() == stl_path.resolve():
+            raise ValueError(f'Invalid STL preview folder: {stl_lod_path} - it must differ from the STL folder')
+        stl_lod_levels_text = pref.get(config.STL_LOD_LEVELS_KEY, config.STL_LOD_LEVELS_DEFAULT_VALUE)
+        try:
+            stl_lod_levels = stl_lod.parse_lod_levels(stl_lod_levels_text)
+        except ValueError as e:
+            raise ValueError(f'Invalid STL preview sizes: {stl_lod_levels_text} - {e}')
+
+    try:
+        width = int(pref.get(config.IMAGE_WIDTH_KEY, config.IMAGE_WIDTH_DEFAULT_VALUE))
+        height = int(pref.get(config.IMAGE_HEIGHT_KEY, config.IMAGE_HEIGHT_DEFAULT_VALUE))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid image size values')
+
+    png_sizes_text = pref.get(config.PNG_SIZES_KEY, config.PNG_SIZES_DEFAULT_VALUE)
+    try:
+        png_sizes = png_postprocess.parse_sizes(png_sizes_text)
+    except ValueError as e:
+        raise ValueError(f'Invalid picture widths: {png_sizes_text} - {e}')
+
+    png_views_text = pref.get(config.PNG_VIEWS_KEY, config.PNG_VIEWS_DEFAULT_VALUE)
+    try:
+        png_views = camera_planner.parse_views(png_views_text)
+    except ValueError as e:
+        raise ValueError(f'Invalid views: {png_views_text} - {e}')
+
+    stl_refinement = pref.get(config.STL_REFINEMENT_KEY, config.STL_REFINEMENT_DEFAULT_VALUE)
+    if stl_refinement not in stl_mesh.MESH_REFINEMENTS:
+        raise ValueError(f'Invalid mesh refinement: {stl_refinement}')
+    stl_units = pref.get(config.STL_UNITS_KEY, config.STL_UNITS_DEFAULT_VALUE)
+    if stl_units not in stl_mesh.STL_UNIT_SCALES:
+        raise ValueError(f'Invalid STL units: {stl_units}')
+
+    formats = {}
+    for exporter in exporters.exporters_for(pref.get(config.EXPORT_FORMATS_KEY, config.EXPORT_FORMATS_DEFAULT_VALUE)):
+        formats[exporter.name] = path = base / exporter.name
+        err = export_helpers.check_folder_validity(path)
+        if err:
+            raise ValueError(f'Invalid {exporter.label} folder: {path} - {err}')
+
+    archive_format = pref.get(config.ARCHIVE_FORMAT_KEY, config.ARCHIVE_FORMAT_DEFAULT_VALUE)
+    archive_name = export_archive.ARCHIVE_FILE_NAMES.get(archive_format)
+
+    incremental_export = pref.get(config.INCREMENTAL_EXPORT_KEY, config.INCREMENTAL_EXPORT_DEFAULT_VALUE)
+    profile_export = pref.get(config.PROFILE_EXPORT_KEY, config.PROFILE_EXPORT_DEFAULT_VALUE)
+    contact_sheet = pref.get(config.CONTACT_SHEET_KEY, config.CONTACT_SHEET_DEFAULT_VALUE)
+
+    return {
+        'include_referenced_components': pref.get(config.INCLUDE_REFERENCED_COMPONENTS_KEY, config.INCLUDE_REFERENCED_COMPONENTS_DEFAULT_VALUE),
+        'include_flagged_components': pref.get(config.INCLUDE_FLAGGED_COMPONENTS_KEY, config.INCLUDE_FLAGGED_COMPONENTS_DEFAULT_VALUE),
+        'root_name': pref.get(config.ROOT_COMPONENT_NAME_KEY, config.ROOT_COMPONENT_NAME_DEFAULT_VALUE),
+        'export_stl': export_stl, 'stl_path': stl_path,
+        'export_zsb': export_zsb, 'zsb_path': zsb_path,
+        'full_zsb_export': full_zsb_export,
+        'full_zsb_name': pref.get(config.EXPORT_FULL_ZSB_NAME_KEY, config.EXPORT_FULL_ZSB_NAME_DEFAULT_VALUE),
+        'export_png': export_png, 'png_path': png_path,
+        'width': width, 'height': height,
+        'stl_mode': pref.get(config.STL_MODE_KEY, config.STL_MODE_DEFAULT_VALUE),
+        'manifest_path': (base / export_manifest.MANIFEST_FILE_NAME) if incremental_export else None,
+        'profile_path': (base / export_profiler.PROFILE_FILE_NAME) if profile_export else None,
+        'png_trim': pref.get(config.PNG_TRIM_KEY, config.PNG_TRIM_DEFAULT_VALUE),
+        'png_transparent': pref.get(config.PNG_TRANSPARENT_KEY, config.PNG_TRANSPARENT_DEFAULT_VALUE),
+        'png_compress': pref.get(config.PNG_COMPRESS_KEY, config.PNG_COMPRESS_DEFAULT_VALUE),
+        'stl_stats': pref.get(config.STL_STATS_KEY, config.STL_STATS_DEFAULT_VALUE),
+        'stl_lod': export_stl_lod, 'stl_lod_path': stl_lod_path, 'stl_lod_levels': stl_lod_levels,
+        'contact_sheet_path': base if contact_sheet and (export_png or export_zsb or full_zsb_export) else None,
+        'contact_sheet_columns': int(pref.get(config.CONTACT_SHEET_COLUMNS_KEY, config.CONTACT_SHEET_COLUMNS_DEFAULT_VALUE)),
+        'fit_camera': pref.get(config.FIT_CAMERA_KEY, config.FIT_CAMERA_DEFAULT_VALUE),
+        'journal_path': base / export_journal.JOURNAL_FILE_NAME,
+        'resume': pref.get(config.RESUME_EXPORT_KEY, config.RESUME_EXPORT_DEFAULT_VALUE),
+        'formats': formats,
+        'archive_path': (base / archive_name) if archive_name else None,
+        'archive_format': archive_format or export_archive.ARCHIVE_FORMAT_ZIP,
+        'png_sizes': png_sizes,
+        'png_views': png_views,
+        'stl_engine': pref.get(config.STL_ENGINE_KEY, config.STL_ENGINE_DEFAULT_VALUE),
+        'stl_refinement': stl_refinement, 'stl_units': stl_units,
+        'git_stage': pref.get(config.GIT_STAGE_KEY, config.GIT_STAGE_DEFAULT_VALUE),
+        'bom_path': base if pref.get(config.EXPORT_BOM_KEY, config.EXPORT_BOM_DEFAULT_VALUE) else None,
+    }
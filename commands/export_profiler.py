@@ -0,0 +1,133 @@
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+# File name of the report written into the export base folder
+PROFILE_FILE_NAME = 'export_profile.json'
+
+
+class _Stats:
+    __slots__ = ('calls', 'seconds')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {'calls': self.calls, 'seconds': round(self.seconds, 6)}
+
+
+class ExportProfiler:
+    """Collect timings and API call counts of an export run.
+
+    Work is measured in named phases (e.g. ``'viewport.fit'``); each entry into
+    a phase counts as one call. Phases entered while a component is being
+    exported are additionally accounted to that component.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._phases: Dict[str, _Stats] = {}
+        self._components: Dict[str, Dict[str, _Stats]] = {}
+        self._component: Optional[str] = None
+        self._counters: Dict[str, int] = {}
+        self._start = time.perf_counter()
+        self._total = 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def _add(self, name: str, seconds: float):
+        stats = self._phases.get(name)
+        if stats is None:
+            stats = self._phases[name] = _Stats()
+        stats.calls += 1
+        stats.seconds += seconds
+        if self._component is not None:
+            component_phases = self._components.setdefault(self._component, {})
+            stats = component_phases.get(name)
+            if stats is None:
+                stats = component_phases[name] = _Stats()
+            stats.calls += 1
+            stats.seconds += seconds
+
+    @contextmanager
+    def component(self, name: str):
+        """Account all phases within the block to the given component."""
+        previous = self._component
+        self._component = name
+        with self.phase('component'):
+            try:
+                yield
+            finally:
+                self._component = previous
+
+    def count(self, name: str, amount: int = 1):
+        """Count API calls that are not timed individually."""
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def finish(self):
+        self._total = time.perf_counter() - self._start
+
+    def report(self) -> dict:
+        return {
+            'total_seconds': round(self._total, 6),
+            'phases': {name: stats.as_dict() for name, stats in sorted(self._phases.items())},
+            'counters': dict(sorted(self._counters.items())),
+            'components': {
+                component: {name: stats.as_dict() for name, stats in sorted(phases.items())}
+                for component, phases in self._components.items()
+            },
+        }
+
+    def write_report(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=1)
+
+    def summary(self, top: int = 5) -> str:
+        """Return the slowest phases as a short text for the final message."""
+        phases = sorted(((n, s) for n, s in self._phases.items() if n != 'component'),
+                        key=lambda item: item[1].seconds, reverse=True)
+        lines = [f"Profile: {self._total:.1f}s total"]
+        for name, stats in phases[:top]:
+            lines.append(f"  {name}: {stats.seconds:.1f}s in {stats.calls} calls")
+        return '\n'.join(lines)
+
+
+class NullProfiler(ExportProfiler):
+    """Profiler used when instrumentation is off; records nothing."""
+
+    enabled = False
+
+    @contextmanager
+    def phase(self, name: str):
+        yield
+
+    @contextmanager
+    def component(self, name: str):
+        yield
+
+    def count(self, name: str, amount: int = 1):
+        pass
+
+
+_NULL_PROFILER = NullProfiler()
+_active: ExportProfiler = _NULL_PROFILER
+
+
+def active() -> ExportProfiler:
+    """Return the profiler of the running export (a no-op one if disabled)."""
+    return _active
+
+
+def activate(profiler: Optional[ExportProfiler]):
+    global _active
+    _active = profiler if profiler is not None else _NULL_PROFILER
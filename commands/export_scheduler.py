@@ -0,0 +1,76 @@
+import adsk.fusion
+from typing import List, Optional, Set
+
+from .visibility_helpers import OccurrenceTree
+
+
+class ExportScheduler:
+    """Order the work list so consecutive exports touch few light bulbs.
+
+    The selection input hands out occurrences in selection order, so two
+    consecutive exports often sit in distant branches and nearly every light
+    bulb on both paths has to be switched. Sorting by depth-first position in
+    the occurrence tree puts siblings and nested parts next to each other;
+    consecutive exports then share most of their ancestors.
+    """
+
+    def __init__(self, tree: OccurrenceTree, stl: bool, png: bool):
+        self.tree = tree
+        self.stl = stl
+        self.png = png
+        self.transitions_before = 0
+        self.transitions_after = 0
+
+    def _position(self, item) -> Optional[int]:
+        if type(item) != adsk.fusion.Occurrence: # Skipped by the export loop
+            return None
+        return self.tree.index_of(item)
+
+    def order(self, components: list) -> list:
+        """Return the items sorted by tree position; unknown items keep their
+        relative order at the end. Counts the transitions of both orders."""
+        positioned = []
+        rest = []
+        for item in components:
+            index = self._position(item)
+            if index is None:
+                rest.append(item)
+            else:
+                positioned.append((index, item))
+        ordered = [item for _, item in sorted(positioned, key=lambda entry: entry[0])] + rest
+
+        self.transitions_before = self.transitions(components)
+        self.transitions_after = self.transitions(ordered)
+        return ordered
+
+    def _visible_sets(self, components: list) -> List[Set[int]]:
+        """Visible occurrences of each render, in order. Components are only
+        exported once, for their first occurrence in the list."""
+        sets = []
+        seen = set()
+        for item in components:
+            index = self._position(item)
+            if index is None:
+                continue
+            component_id = item.component.id
+            if component_id in seen:
+                continue
+            seen.add(component_id)
+            if self.stl:
+                sets.append(self.tree.visible_set(index, False))
+            if self.png:
+                sets.append(self.tree.visible_set(index, True))
+        return sets
+
+    def transitions(self, components: list) -> int:
+        """Estimated light bulb changes between consecutive exports of ``components``."""
+        total = 0
+        previous = None
+        for visible in self._visible_sets(components):
+            if previous is not None:
+                total += len(previous ^ visible)
+            previous = visible
+        return total
+
+    def summary(self) -> str:
+        return f"Export order: {self.transitions_after} light bulb changes instead of {self.transitions_before}."
@@ -0,0 +1,47 @@
+import adsk.core
+import adsk.fusion
+from typing import List, Set
+
+# Which occurrences an export covers
+SCOPE_ALL = 'all'
+SCOPE_VISIBLE = 'visible'
+SCOPE_SELECTED = 'selected'
+
+
+def resolve_scope(root: adsk.fusion.Component, scope: str,
+                  include_referenced: bool = True, include_flagged: bool = True) -> List[adsk.fusion.Occurrence]:
+    """Return the occurrences to export for the ``all`` and ``visible`` scopes.
+
+    The design tree is walked once in depth-first order. Every component is
+    returned only for its first qualifying occurrence; the subtrees of further
+    occurrences are skipped, as they contain the same components again. With
+    the ``visible`` scope only occurrences whose light bulb and the light bulbs
+    of all parents are on are included; there the subtrees of further
+    occurrences are walked too, as a child hidden under one instance may be
+    visible under another. Referenced components and ``_``
+    flagged occurrences are left out unless included, before deduplicating:
+    the flag is set per occurrence, so a later instance may still qualify.
+    """
+    result = []
+    seen: Set[str] = set()
+    only_visible = scope == SCOPE_VISIBLE
+
+    def walk(occurrences: adsk.fusion.OccurrenceList):
+        for i in range(occurrences.count):
+            occ = occurrences.item(i)
+            if only_visible and not occ.isLightBulbOn:
+                continue
+            component_id = occ.component.id
+            if component_id in seen:
+                if only_visible:
+                    walk(occ.childOccurrences)
+                continue
+            if (occ.isReferencedComponent and not include_referenced) or (occ.name.startswith('_') and not include_flagged):
+                walk(occ.childOccurrences) # Its children may still be exported
+                continue
+            seen.add(component_id)
+            result.append(occ)
+            walk(occ.childOccurrences)
+
+    walk(root.occurrences)
+    return result
@@ -0,0 +1,57 @@
+import adsk.core
+import adsk.fusion
+from typing import Callable, Dict, List
+
+from . import export_profiler
+
+# Creates the export options: (export manager, occurrence or component, file name)
+OptionsFactory = Callable[[adsk.fusion.ExportManager, object, str], adsk.fusion.ExportOptions]
+
+
+class Exporter:
+    """A file format written for every exported component in addition to STL/PNG.
+
+    ``needs_visibility`` marks formats whose result depends on which
+    occurrences are shown, like the mesh exports of an occurrence. They are
+    written while the component is shown alone, sharing that visibility setup
+    with the STL export; other formats are written without touching visibility.
+    """
+
+    def __init__(self, name: str, label: str, extension: str, needs_visibility: bool, create_options: OptionsFactory):
+        self.name = name
+        self.label = label
+        self.extension = extension
+        self.needs_visibility = needs_visibility
+        self._create_options = create_options
+
+    def export(self, export_manager: adsk.fusion.ExportManager, geometry, file_name: str):
+        profiler = export_profiler.active()
+        with profiler.phase(f"export.{self.name}"):
+            export_manager.execute(self._create_options(export_manager, geometry, file_name))
+
+
+def _component_of(geometry) -> adsk.fusion.Component:
+    occ = adsk.fusion.Occurrence.cast(geometry)
+    return occ.component if occ else geometry
+
+
+EXPORTERS: Dict[str, Exporter] = {}
+
+
+def register_exporter(exporter: Exporter):
+    EXPORTERS[exporter.name] = exporter
+
+
+def exporters_for(names: List[str]) -> List[Exporter]:
+    """Return the registered exporters for ``names`` in registration order;
+    unknown names are ignored."""
+    return [exporter for name, exporter in EXPORTERS.items() if name in names]
+
+
+register_exporter(Exporter('3mf', '3MF', '.3mf', True,
+                           lambda mgr, geometry, file_name: mgr.createC3MFExportOptions(geometry, file_name)))
+register_exporter(Exporter('obj', 'OBJ', '.obj', True,
+                           lambda mgr, geometry, file_name: mgr.createOBJExportOptions(geometry, file_name)))
+# STEP exports the component's B-Rep independently of any light bulb
+register_exporter(Exporter('step', 'STEP', '.step', False,
+                           lambda mgr, geometry, file_name: mgr.createSTEPExportOptions(file_name, _component_of(geometry))))
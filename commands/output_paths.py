@@ -0,0 +1,100 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+_SEPARATORS = re.compile(r'[\\/\x00-\x1f]')
+_UNSAFE = re.compile(r'[:\*\?"<>\|]')
+_REPEATED = {}
+
+
+def sanitize_filename(name: str, replacement: str = '_') -> str:
+    """Return a filesystem-safe filename by replacing unsafe characters.
+
+    This is a conservative sanitizer: it replaces characters that are invalid
+    in common filesystems and strips control characters. It also trims
+    whitespace from ends. Keeps file extensions if present (caller should
+    include extension separately).
+    """
+    name = name.strip()
+    # Replace path separators and control characters
+    name = _SEPARATORS.sub(replacement, name)
+    # Replace other unsafe chars
+    name = _UNSAFE.sub(replacement, name)
+    # Collapse multiple replacements
+    repeated = _REPEATED.get(replacement)
+    if repeated is None:
+        repeated = _REPEATED[replacement] = re.compile(re.escape(replacement) + r'+')
+    name = repeated.sub(replacement, name)
+    # Trim leading/trailing dots or spaces
+    name = name.strip(' .')
+    if len(name) == 0:
+        return 'unnamed'
+    return name
+
+
+class OutputPlanner:
+    """Compute the output files of all exported items before the export starts.
+
+    ``folders`` maps each kind of output (e.g. ``'stl'``, ``'png'``) to its
+    folder and file extension (which may carry a suffix such as ``_front.png``).
+    Folders are created and resolved once; the files of an item are plain
+    string joins afterwards. No file of an item may be a file of another item,
+    compared case-insensitively as on Windows and macOS, so component ``foo``
+    cannot take the front view of ``foo`` either: if a name clashes, the item
+    planned later gets a numbered suffix (``name_2``, ...), so the result only
+    depends on the order passed to ``plan``.
+    """
+
+    def __init__(self, folders: Dict[str, Tuple[Path, str]]):
+        self._folders: Dict[str, Tuple[str, str]] = {}
+        for kind, (folder, extension) in folders.items():
+            folder.mkdir(parents=True, exist_ok=True)
+            self._folders[kind] = (str(folder.resolve()), extension)
+        self._names: Dict[str, str] = {}
+        self._files: Dict[str, Dict[str, str]] = {}
+        self._taken: Set[str] = set()
+        self.renamed: List[Tuple[str, str]] = []
+
+    def _files_of(self, name: str) -> Dict[str, str]:
+        return {kind: os.path.join(folder, name + extension)
+                for kind, (folder, extension) in self._folders.items()}
+
+    def _is_taken(self, name: str) -> bool:
+        return any(file_name.casefold() in self._taken for file_name in self._files_of(name).values())
+
+    def _add(self, key: str, name: str):
+        self._names[key] = name
+        self._files[key] = self._files_of(name)
+        self._taken.update(file_name.casefold() for file_name in self._files[key].values())
+
+    def reserve(self, key: str, name: str):
+        """Plan an item under a fixed name, e.g. the root of the design."""
+        self._add(key, name)
+
+    def plan(self, items: Iterable[Tuple[str, str]]):
+        """Plan ``(key, name)`` items; names are sanitized and made unique."""
+        for key, name in items:
+            if key in self._names:
+                continue
+            safe = sanitize_filename(name)
+            unique = safe
+            suffix = 2
+            while self._is_taken(unique):
+                unique = f"{safe}_{suffix}"
+                suffix += 1
+            if unique != safe:
+                self.renamed.append((name, unique))
+            self._add(key, unique)
+
+    def name(self, key: str) -> str:
+        return self._names[key]
+
+    def file(self, key: str, kind: str) -> str:
+        return self._files[key][kind]
+
+    def summary(self) -> str:
+        if not self.renamed:
+            return ''
+        return f"{len(self.renamed)} components renamed as their names collide: " + \
+            ', '.join(f"{name} -> {unique}" for name, unique in self.renamed)
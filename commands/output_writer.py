@@ -0,0 +1,201 @@
+import hashlib
+import os
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+# Binary STL files start with an 80 byte header Fusion fills with a timestamp
+STL_HEADER_SIZE = 80
+
+# Longest command line passed to one `git add`, Windows allows about 32k
+GIT_ADD_MAX_LENGTH = 8000
+
+
+# Prefix of the files outputs are written to before they are committed.
+# Planned file names never start with a dot, so they cannot clash.
+TEMP_PREFIX = '.~'
+
+
+def temp_file_name(file_name: str) -> str:
+    """Return the file an output is written to before it is committed; the
+    extension is kept as Fusion picks the format from it."""
+    folder, name = os.path.split(file_name)
+    return os.path.join(folder, TEMP_PREFIX + name)
+
+
+def _digest(file_name: str) -> bytes:
+    h = hashlib.sha1()
+    with open(file_name, 'rb') as f:
+        head = f.read(STL_HEADER_SIZE)
+        if not (file_name.lower().endswith('.stl') and not head.startswith(b'solid')):
+            h.update(head)
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.digest()
+
+
+def files_equal(file_a: str, file_b: str) -> bool:
+    """Compare sizes first and only hash files of equal size (ignoring the
+    header of binary STLs)."""
+    if os.path.getsize(file_a) != os.path.getsize(file_b):
+        return False
+    return _digest(file_a) == _digest(file_b)
+
+
+def _run_git(folder: str, args: List[str]) -> subprocess.CompletedProcess:
+    # Do not flash a console window for every call on Windows
+    flags = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+    return subprocess.run(['git', '-C', folder] + args, capture_output=True, text=True, creationflags=flags)
+
+
+class OutputWriter:
+    """Replace output files only if their content changed.
+
+    Exports write to ``temp_file_name`` of their output; ``commit`` compares
+    the result with the existing file and either removes it again, leaving the
+    existing file (and its timestamps) untouched, or moves it in place
+    atomically. Commits that depend on post-processing run on a background
+    thread once it is done. With ``git_stage`` the changed files are staged in
+    their git repository by ``stage`` in as few `git add` calls as possible,
+    and outputs deleted by ``remove`` are removed from the index.
+    ``remove_temps`` deletes the temporary files a failed export left behind.
+    """
+
+    def __init__(self, git_stage: bool = False):
+        self.git_stage = git_stage
+        self.changed: List[str] = []
+        self.removed: List[str] = []
+        self.unchanged = 0
+        self.staged = 0
+        self.errors: List[str] = []
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._temps: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='output_writer')
+
+    def temp(self, file_name: str) -> str:
+        tmp = temp_file_name(file_name)
+        self._temps.add(tmp)
+        return tmp
+
+    def temp_targets(self, targets: List[Tuple[object, str]]) -> List[Tuple[object, str]]:
+        return [(target, self.temp(file_name)) for target, file_name in targets]
+
+    def commit(self, file_name: str, after: Optional[Future] = None) -> Optional[Future]:
+        """Move the written temporary file in place unless it is identical.
+
+        Without ``after`` this happens right away; otherwise once ``after``
+        finished, and the returned future tells when the file is final.
+        """
+        if after is None:
+            self._commit(file_name)
+            return None
+        future = self._executor.submit(self._commit_after, file_name, after)
+        self._futures.append(future)
+        return future
+
+    def _commit_after(self, file_name: str, after: Future):
+        try:
+            after.result()
+        except Exception:
+            pass # Reported by the stage that failed, the file is committed as it is
+        self._commit(file_name)
+
+    def _commit(self, file_name: str):
+        tmp = temp_file_name(file_name)
+        if not os.path.exists(tmp): # Export failed, reported there
+            return
+        try:
+            if os.path.exists(file_name) and files_equal(tmp, file_name):
+                os.remove(tmp)
+                with self._lock:
+                    self.unchanged += 1
+            else:
+                os.replace(tmp, file_name)
+                with self._lock:
+                    self.changed.append(file_name)
+        except OSError as e:
+            with self._lock:
+                self.errors.append(f"{os.path.basename(file_name)}: {e}")
+
+    def remove(self, file_name: str):
+        """Delete an output that is no longer produced."""
+        try:
+            os.remove(file_name)
+        except OSError as e:
+            with self._lock:
+                self.errors.append(f"{os.path.basename(file_name)}: {e}")
+            return
+        with self._lock:
+            self.removed.append(file_name)
+
+    def drain(self):
+        for future in self._futures:
+            future.result()
+        self._futures.clear()
+
+    def close(self):
+        self.drain()
+        self._executor.shutdown(wait=True)
+
+    def remove_temps(self):
+        """Delete the temporary files no commit has consumed."""
+        for tmp in self._temps:
+            try:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            except OSError:
+                pass # Reported by the failing export, a later run overwrites it
+        self._temps.clear()
+
+    def stage(self):
+        """Stage the changed and removed files with batched git calls."""
+        if not (self.git_stage and (self.changed or self.removed)):
+            return
+        try:
+            result = _run_git(os.path.dirname((self.changed + self.removed)[0]), ['rev-parse', '--show-toplevel'])
+            if result.returncode != 0:
+                self.errors.append(f"git: {result.stderr.strip() or 'not a git repository'}")
+                return
+            root = result.stdout.strip()
+            self._stage_batches(root, ['add', '--'], self.changed)
+            # Removed files may never have been tracked
+            self._stage_batches(root, ['rm', '--cached', '--quiet', '--ignore-unmatch', '--'], self.removed)
+        except OSError as e:
+            self.errors.append(f"git: {e}")
+
+    def _stage_batches(self, root: str, command: List[str], file_names: List[str]):
+        paths = []
+        for file_name in file_names:
+            try:
+                path = os.path.relpath(file_name, root)
+            except ValueError: # Another drive on Windows
+                path = os.pardir
+            if path == os.pardir or path.startswith(os.pardir + os.sep):
+                self.errors.append(f"{os.path.basename(file_name)}: not in the git repository {root}")
+            else:
+                paths.append(path)
+        batch: List[str] = []
+        length = 0
+        for path in paths + [None]:
+            if batch and (path is None or length + len(path) > GIT_ADD_MAX_LENGTH):
+                result = _run_git(root, command + batch)
+                if result.returncode != 0:
+                    self.errors.append(f"git {command[0]}: {result.stderr.strip()}")
+                else:
+                    self.staged += len(batch)
+                batch, length = [], 0
+            if path is not None:
+                batch.append(path)
+                length += len(path) + 1
+
+    def summary(self) -> str:
+        text = f"{len(self.changed)} files changed, {self.unchanged} unchanged files kept."
+        if self.removed:
+            text += f" {len(self.removed)} stale files removed."
+        if self.git_stage:
+            text += f"\n{self.staged} changed files staged in git."
+        if self.errors:
+            text += f"\n{len(self.errors)} failed: {', '.join(self.errors)}"
+        return text
@@ -0,0 +1,200 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    from PIL import Image, ImageChops
+except ImportError:  # Pillow is optional, it can be placed in the add-in's lib folder
+    Image = None
+    ImageChops = None
+
+# Difference to the background (0..255) above which a pixel counts as content
+BACKGROUND_TOLERANCE = 12
+# Empty border in pixels kept around the content when trimming
+TRIM_MARGIN = 8
+
+
+def is_available() -> bool:
+    return Image is not None
+
+
+def content_box(image: 'Image.Image'):
+    """Return the bounding box of everything that is not background.
+
+    Transparent renders are trimmed to their alpha channel. Opaque renders
+    have Fusion's vertical background gradient, so each pixel is compared
+    against the left-most pixel of its row.
+    """
+    if image.mode in ('RGBA', 'LA'):
+        return image.getchannel('A').getbbox()
+    rgb = image.convert('RGB')
+    background = rgb.crop((0, 0, 1, rgb.height)).resize(rgb.size)
+    diff = ImageChops.difference(rgb, background).convert('L')
+    return diff.point(lambda v: 255 if v > BACKGROUND_TOLERANCE else 0).getbbox()
+
+
+def parse_sizes(text: str) -> List[int]:
+    """Parse a comma separated list of picture widths in pixels; an empty
+    text means no additional sizes. Raises ValueError on invalid input."""
+    sizes = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        value = int(part)
+        if value <= 0:
+            raise ValueError(f"Picture width must be positive: {part}")
+        sizes.append(value)
+    return sorted(set(sizes))
+
+
+def _resized(image: 'Image.Image', width: Optional[int]) -> 'Image.Image':
+    if width is None or width == image.width:
+        return image
+    size = (width, max(1, round(image.height * width / image.width)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def _save(image: 'Image.Image', file_name: str, compress: bool):
+    if compress:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image = image.quantize(colors=256, method=Image.FASTOCTREE, dither=Image.NONE)
+
+    tmp_name = file_name + '.tmp'
+    try:
+        image.save(tmp_name, 'PNG', optimize=True)
+        os.replace(tmp_name, file_name)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def postprocess_png(file_name: str, trim: bool, compress: bool, width: Optional[int] = None,
+                    variants: Sequence[Tuple[str, int]] = ()):
+    """Trim and/or recompress a PNG file in place.
+
+    The (trimmed) picture is resized to ``width`` unless it is None;
+    ``variants`` are further ``(file, width)`` written from the same picture.
+    Resizing is done before the colors are reduced.
+    """
+    with Image.open(file_name) as source:
+        image = source.copy()
+
+    if trim:
+        box = content_box(image)
+        if box:
+            left, top, right, bottom = box
+            box = (max(left - TRIM_MARGIN, 0), max(top - TRIM_MARGIN, 0),
+                   min(right + TRIM_MARGIN, image.width), min(bottom + TRIM_MARGIN, image.height))
+            image = image.crop(box)
+
+    for variant_file, variant_width in variants:
+        _save(_resized(image, variant_width), variant_file, compress)
+    _save(_resized(image, width), file_name, compress)
+
+
+class PngPostProcessor:
+    """Worker pool post-processing PNG files off the Fusion main thread.
+
+    The export loop only enqueues written files; ``drain()`` waits for all of
+    them before the final report.
+
+    With additional picture ``sizes`` (widths) each picture is rendered once
+    at the largest of them and ``width`` (see ``render_size``); the pool
+    resizes it to ``width`` and writes the other sizes as variants, each
+    exactly as wide as asked for after trimming. A picture that fails is
+    still resized to ``width`` untrimmed, or removed if that fails too.
+    """
+
+    def __init__(self, trim: bool, compress: bool, workers: int = 2,
+                 sizes: Optional[List[int]] = None, width: int = 0):
+        self.trim = trim
+        self.compress = compress
+        self.requested_sizes = sizes or []
+        self.sizes = self.requested_sizes if is_available() else []
+        self.width = width
+        self.render_width = max([width] + self.sizes)
+        self.variants = 0
+        self.processed = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.errors: List[str] = []
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='png_postprocess') if is_available() else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None and (self.trim or self.compress or bool(self.sizes))
+
+    def render_size(self, width: int, height: int):
+        """Return the size pictures of ``width`` x ``height`` are rendered at."""
+        if self.render_width == width:
+            return width, height
+        return self.render_width, round(height * self.render_width / width)
+
+    def submit(self, file_name: str, variants: Sequence[Tuple[str, int]] = ()) -> Optional[Future]:
+        """Queue a file and the files of its other sizes ``(file, width)``;
+        returns the future of its processing, if any."""
+        if not self.enabled:
+            return None
+        future = self._executor.submit(self._process, file_name, variants)
+        self._futures.append(future)
+        return future
+
+    def _process(self, file_name: str, variants: Sequence[Tuple[str, int]] = ()):
+        # Renders enlarged for the other sizes are brought back to the width
+        width = self.width if self.render_width != self.width else None
+        try:
+            before = os.path.getsize(file_name)
+            postprocess_png(file_name, self.trim, self.compress, width, variants)
+            after = os.path.getsize(file_name)
+        except Exception as e:
+            error = f"{os.path.basename(file_name)}: {e}"
+            if width is not None:
+                error += self._fall_back(file_name, width)
+            with self._lock:
+                self.errors.append(error)
+            return
+        with self._lock:
+            self.processed += 1
+            self.variants += len(variants)
+            self.bytes_before += before
+            self.bytes_after += after
+
+    @staticmethod
+    def _fall_back(file_name: str, width: int) -> str:
+        """Resize a picture that failed to its width only; it is removed if
+        that fails as well, rather than left at the render size."""
+        try:
+            postprocess_png(file_name, False, False, width)
+            return ' (written without post-processing)'
+        except Exception:
+            try:
+                os.remove(file_name)
+            except OSError:
+                pass
+            return ' (removed)'
+
+    def drain(self):
+        """Wait until all enqueued files are processed and stop the workers."""
+        for future in self._futures:
+            future.result()
+        self._futures.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def summary(self) -> str:
+        if not (self.trim or self.compress or self.requested_sizes):
+            return ''
+        if not is_available():
+            return 'PNG post-processing skipped: Pillow is not installed.'
+        text = f"PNG post-processing: {self.processed} files, {self.bytes_before // 1024} KB -> {self.bytes_after // 1024} KB."
+        if self.sizes:
+            text += f"\n{self.variants} pictures in {', '.join(str(size) for size in self.sizes)} px width."
+        if self.errors:
+            text += f"\n{len(self.errors)} failed: {', '.join(self.errors)}"
+        return text
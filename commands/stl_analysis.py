@@ -0,0 +1,220 @@
+import csv
+import json
+import mmap
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, it can be placed in the add-in's lib folder
+    np = None
+
+# File names of the per-run index written into the STL folder
+STATS_JSON_FILE_NAME = 'stl_stats.json'
+STATS_CSV_FILE_NAME = 'stl_stats.csv'
+
+# Triangles (binary) or bytes (ASCII) processed per step, bounds the memory use
+CHUNK_TRIANGLES = 1 << 20
+CHUNK_BYTES = 64 << 20
+
+STATS_FIELDS = ['name', 'file', 'triangles', 'min_x', 'min_y', 'min_z', 'max_x', 'max_y', 'max_z',
+                'size_x', 'size_y', 'size_z', 'volume', 'area']
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def _triangle_dtype() -> 'np.dtype':
+    """Record layout of a triangle in a binary STL file."""
+    return np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+
+def _binary_triangle_count(path: str) -> int:
+    """Return the triangle count if the file is a binary STL, otherwise -1.
+
+    ASCII files also start with ``solid``, so the file size is checked
+    against the count stored in the header instead.
+    """
+    size = os.path.getsize(path)
+    if size < 84:
+        return -1
+    with open(path, 'rb') as f:
+        f.seek(80)
+        count = int.from_bytes(f.read(4), 'little')
+    return count if size == 84 + 50 * count else -1
+
+
+def iter_triangles(path: str) -> Iterator['np.ndarray']:
+    """Yield the triangles of an STL file as (n, 3, 3) float64 arrays in chunks.
+
+    Binary files are memory-mapped and ASCII files scanned through an mmap, so
+    files larger than the available memory can be processed.
+    """
+    count = _binary_triangle_count(path)
+    if count == 0:
+        return
+    if count > 0:
+        data = np.memmap(path, dtype=_triangle_dtype(), mode='r', offset=84, shape=(count,))
+        for start in range(0, count, CHUNK_TRIANGLES):
+            yield data['vertices'][start:start + CHUNK_TRIANGLES].astype(np.float64)
+        del data
+        return
+
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        while pos < len(mm):
+            end = mm.find(b'endfacet', pos + CHUNK_BYTES)
+            end = len(mm) if end < 0 else end + len(b'endfacet')
+            triangles = _parse_ascii(mm[pos:end])
+            if len(triangles):
+                yield triangles
+            pos = end
+
+
+def _parse_ascii(data: bytes) -> 'np.ndarray':
+    tokens = np.array(data.split())
+    vertex = np.flatnonzero(tokens == b'vertex')
+    coords = tokens[vertex[:, None] + np.arange(1, 4)].astype(np.float64)
+    return coords.reshape(-1, 3, 3)
+
+
+def read_triangles(path: str) -> 'np.ndarray':
+    """Return all triangles of an STL file as one (n, 3, 3) float64 array."""
+    chunks = list(iter_triangles(path))
+    return np.concatenate(chunks) if chunks else np.zeros((0, 3, 3))
+
+
+def write_binary_stl(path: str, triangles: 'np.ndarray', header: bytes = b''):
+    """Write (n, 3, 3) triangles as binary STL with one buffered write."""
+    triangles = np.asarray(triangles, dtype=np.float32)
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    records = np.zeros(len(triangles), dtype=_triangle_dtype())
+    records['normal'] = normals
+    records['vertices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(header[:80].ljust(80, b' '))
+        f.write(len(triangles).to_bytes(4, 'little'))
+        f.write(records.tobytes())
+
+
+def triangle_stats(triangles: Iterator['np.ndarray']) -> Dict[str, object]:
+    """Triangle count, bounding box, enclosed volume and surface area."""
+    count = 0
+    volume = 0.0
+    area = 0.0
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for chunk in triangles:
+        v0, v1, v2 = chunk[:, 0], chunk[:, 1], chunk[:, 2]
+        count += len(chunk)
+        area += 0.5 * np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1).sum()
+        # Sum of signed tetrahedron volumes against the origin
+        volume += np.einsum('ij,ij->i', v0, np.cross(v1, v2)).sum() / 6.0
+        lo = np.minimum(lo, chunk.reshape(-1, 3).min(axis=0))
+        hi = np.maximum(hi, chunk.reshape(-1, 3).max(axis=0))
+    if count == 0:
+        lo = hi = np.zeros(3)
+    size = hi - lo
+    return {
+        'triangles': count,
+        'min_x': float(lo[0]), 'min_y': float(lo[1]), 'min_z': float(lo[2]),
+        'max_x': float(hi[0]), 'max_y': float(hi[1]), 'max_z': float(hi[2]),
+        'size_x': float(size[0]), 'size_y': float(size[1]), 'size_z': float(size[2]),
+        'volume': float(abs(volume)),
+        'area': float(area),
+    }
+
+
+def stl_stats(path: str) -> Dict[str, object]:
+    return triangle_stats(iter_triangles(path))
+
+
+class StlAnalyzer:
+    """Compute geometry statistics of written STL files in a background thread
+    and collect them into a JSON/CSV index."""
+
+    def __init__(self, enabled: bool, workers: int = 1):
+        self.errors: List[str] = []
+        self._requested = enabled
+        self._rows: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stl_analysis') if enabled and is_available() else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def submit(self, name: str, file_name: str, triangles: Optional['np.ndarray'] = None):
+        """Queue an STL file; ``triangles`` already in memory are used instead
+        of reading the file back."""
+        if self.enabled:
+            self._futures.append(self._executor.submit(self._analyze, name, file_name, triangles))
+
+    def _analyze(self, name: str, file_name: str, triangles: Optional['np.ndarray']):
+        try:
+            if triangles is None:
+                row = stl_stats(file_name)
+            else:
+                row = triangle_stats(iter([triangles.astype(np.float64)]))
+        except Exception as e:
+            with self._lock:
+                self.errors.append(f"{name}: {e}")
+            return
+        row['name'] = name
+        row['file'] = os.path.basename(file_name)
+        with self._lock:
+            self._rows[name] = row
+
+    def drain(self):
+        for future in self._futures:
+            future.result()
+        self._futures.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def write_index(self, folder: Path) -> List[str]:
+        """Write the collected statistics as JSON and CSV into ``folder`` and
+        return the written files.
+
+        Rows of an existing index are kept for files that were not analyzed in
+        this run (e.g. skipped as unchanged) but still exist.
+        """
+        if not self._rows:
+            return []
+        merged = {}
+        try:
+            with open(folder / STATS_JSON_FILE_NAME, 'r', encoding='utf-8') as f:
+                for row in json.load(f):
+                    if (folder / row['file']).exists():
+                        merged[row['name']] = row
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        merged.update(self._rows)
+        rows = [merged[name] for name in sorted(merged)]
+        with open(folder / STATS_JSON_FILE_NAME, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=1)
+        with open(folder / STATS_CSV_FILE_NAME, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=STATS_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return [str(folder / STATS_JSON_FILE_NAME), str(folder / STATS_CSV_FILE_NAME)]
+
+    def summary(self) -> str:
+        if not self._requested:
+            return ''
+        if not is_available():
+            return 'STL statistics skipped: NumPy is not installed.'
+        text = f"STL statistics written for {len(self._rows)} files."
+        if self.errors:
+            text += f"\n{len(self.errors)} failed: {', '.join(self.errors)}"
+        return text
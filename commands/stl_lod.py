@@ -0,0 +1,173 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from . import stl_analysis
+from .stl_analysis import np
+
+# Binary search steps used to find the grid size for a target triangle count
+SEARCH_STEPS = 14
+
+
+def parse_lod_levels(text: str) -> List[float]:
+    """Parse a comma separated list of LOD targets.
+
+    Values below 1 are ratios of the original triangle count, values of 1 and
+    above absolute triangle counts. Raises ValueError on invalid input.
+    """
+    levels = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        value = float(part)
+        if value <= 0:
+            raise ValueError(f"LOD target must be positive: {part}")
+        levels.append(value)
+    if not levels:
+        raise ValueError('No LOD target given')
+    return levels
+
+
+def lod_file_names(name: str, levels: List[float]) -> List[str]:
+    """File names of the LOD variants; always suffixed, so a preview can never
+    replace the full STL."""
+    return [f"{name}_lod{i + 1}.stl" for i in range(len(levels))]
+
+
+def weld(triangles: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """Merge identical corners into shared vertices; return (vertices, faces)."""
+    corners = triangles.reshape(-1, 3)
+    vertices, faces = np.unique(corners, axis=0, return_inverse=True)
+    return vertices, faces.reshape(-1, 3)
+
+
+def cluster(vertices: 'np.ndarray', faces: 'np.ndarray', cell_size: float) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Vertex clustering: snap vertices to a grid, merge each cell into its
+    centroid and drop triangles that became degenerate or duplicate."""
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+    _, cluster_ids, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    cluster_ids = cluster_ids.reshape(-1)
+    centroids = np.zeros((len(counts), 3))
+    np.add.at(centroids, cluster_ids, vertices)
+    centroids /= counts[:, None]
+
+    remapped = cluster_ids[faces]
+    keep = (remapped[:, 0] != remapped[:, 1]) & (remapped[:, 1] != remapped[:, 2]) & (remapped[:, 0] != remapped[:, 2])
+    remapped = remapped[keep]
+    # Triangles using the same three clusters collapse into one, keep the first
+    _, first = np.unique(np.sort(remapped, axis=1), axis=0, return_index=True)
+    return centroids, remapped[np.sort(first)]
+
+
+def decimate(triangles: 'np.ndarray', target: int) -> 'np.ndarray':
+    """Return a simplified mesh with at most ``target`` triangles (if reachable)."""
+    if len(triangles) <= target:
+        return triangles
+    vertices, faces = weld(triangles)
+    extent = float(np.max(vertices.max(axis=0) - vertices.min(axis=0)))
+    if extent <= 0:
+        return triangles
+
+    # Larger cells remove more triangles; search the smallest cell within target
+    low, high = 0.0, extent
+    best = None
+    for _ in range(SEARCH_STEPS):
+        cell_size = (low + high) / 2
+        centroids, simplified = cluster(vertices, faces, cell_size)
+        if len(simplified) <= target:
+            best = (centroids, simplified)
+            high = cell_size
+        else:
+            low = cell_size
+    if best is None:
+        best = cluster(vertices, faces, extent)
+    centroids, simplified = best
+    return centroids[simplified]
+
+
+def write_lods(source: str, targets: List[Tuple[float, str]], triangles: Optional['np.ndarray'] = None) -> int:
+    """Write one decimated copy of ``source`` per (level, file name) target;
+    the file is only read if its ``triangles`` are not given."""
+    if triangles is None:
+        triangles = stl_analysis.read_triangles(source)
+    else:
+        triangles = triangles.astype(np.float64)
+    written = 0
+    for level, file_name in targets:
+        target = int(level) if level >= 1 else max(int(len(triangles) * level), 1)
+        simplified = decimate(triangles, target)
+        tmp_name = file_name + '.tmp'
+        try:
+            stl_analysis.write_binary_stl(tmp_name, simplified, b'LOD preview')
+            os.replace(tmp_name, file_name)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        written += 1
+    return written
+
+
+class StlLodGenerator:
+    """Produce decimated STL variants in a background thread."""
+
+    def __init__(self, enabled: bool, levels: List[float], folder: Path, workers: int = 1):
+        self.levels = levels
+        self.folder = folder
+        self.written = 0
+        self.errors: List[str] = []
+        self._requested = enabled
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stl_lod') if enabled and stl_analysis.is_available() else None
+        if self._executor is not None:
+            folder.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def outputs(self, name: str) -> List[str]:
+        """Files that will be written for a component, empty if disabled."""
+        if not self.enabled:
+            return []
+        return [str(self.folder / file_name) for file_name in lod_file_names(name, self.levels)]
+
+    def submit(self, name: str, stl_file: str, triangles: Optional['np.ndarray'] = None) -> Optional[Future]:
+        """Queue an STL file; returns the future of its previews, if any."""
+        if not self.enabled:
+            return None
+        targets = list(zip(self.levels, self.outputs(name)))
+        future = self._executor.submit(self._generate, name, stl_file, targets, triangles)
+        self._futures.append(future)
+        return future
+
+    def _generate(self, name: str, stl_file: str, targets: List[Tuple[float, str]], triangles: Optional['np.ndarray']):
+        try:
+            written = write_lods(stl_file, targets, triangles)
+        except Exception as e:
+            with self._lock:
+                self.errors.append(f"{name}: {e}")
+            return
+        with self._lock:
+            self.written += written
+
+    def drain(self):
+        for future in self._futures:
+            future.result()
+        self._futures.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def summary(self) -> str:
+        if not self._requested:
+            return ''
+        if not stl_analysis.is_available():
+            return 'STL previews skipped: NumPy is not installed.'
+        text = f"{self.written} STL previews written."
+        if self.errors:
+            text += f"\n{len(self.errors)} failed: {', '.join(self.errors)}"
+        return text
@@ -0,0 +1,100 @@
+import adsk.fusion
+from typing import List, Sequence
+
+from . import stl_analysis
+from .stl_analysis import np
+
+# How STL files are produced
+STL_ENGINE_FUSION = 'fusion' # Fusion's STL export (original behaviour)
+STL_ENGINE_MESH = 'mesh' # Tessellate the bodies through the mesh API and write the file directly
+
+# Triangle refinement of the mesh engine, names of adsk.fusion.TriangleMeshQualityOptions
+MESH_REFINEMENTS = {
+    'low': 'LowQualityTriangleMesh',
+    'normal': 'NormalQualityTriangleMesh',
+    'high': 'HighQualityTriangleMesh',
+    'very_high': 'VeryHighQualityTriangleMesh',
+}
+
+# Output units of the mesh engine; the API works in centimeters
+STL_UNIT_SCALES = {
+    'mm': 10.0,
+    'cm': 1.0,
+    'm': 0.01,
+    'in': 1 / 2.54,
+}
+
+STL_HEADER = b'AutoExporter mesh STL'
+
+
+def subtree_bodies(bodies: adsk.fusion.BRepBodies, occurrences: adsk.fusion.OccurrenceList) -> List[adsk.fusion.BRepBody]:
+    """Return ``bodies`` and the bodies of ``occurrences`` and their children
+    whose light bulbs are on, the geometry Fusion's STL export of an
+    occurrence contains. (The export of the root component only has its own
+    bodies.)"""
+    result = [bodies.item(i) for i in range(bodies.count)]
+    for i in range(occurrences.count):
+        occ = occurrences.item(i)
+        if occ.isLightBulbOn:
+            result += subtree_bodies(occ.bRepBodies, occ.childOccurrences)
+    return result
+
+
+class StlMeshEngine:
+    """Write STL files from the tessellation of the visible bodies.
+
+    The meshes of all bodies of an occurrence and its visible children (see
+    ``subtree_bodies``) are calculated with the chosen
+    refinement, packed into one (n, 3, 3) triangle array and written as binary
+    STL at once. No light bulbs are touched, and the array is handed on to the
+    statistics and previews, so they do not read the file back. Needs NumPy;
+    without it Fusion's STL export is used.
+    """
+
+    def __init__(self, enabled: bool, refinement: str = 'normal', units: str = 'mm'):
+        self._requested = enabled
+        self.refinement = refinement
+        self.units = units
+        self.scale = STL_UNIT_SCALES[units]
+        self.bodies = 0
+        self.triangle_count = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._requested and stl_analysis.is_available()
+
+    @property
+    def settings(self) -> str:
+        """Part of the export settings, as the engine changes the STL files."""
+        return f"{STL_ENGINE_MESH}:{self.refinement}:{self.units}" if self.enabled else ''
+
+    def triangles(self, bodies: Sequence[adsk.fusion.BRepBody]) -> 'np.ndarray':
+        """Return the triangles of the visible ``bodies`` in the output units."""
+        quality = getattr(adsk.fusion.TriangleMeshQualityOptions, MESH_REFINEMENTS[self.refinement])
+        chunks: List['np.ndarray'] = []
+        for body in bodies:
+            if not body.isLightBulbOn:
+                continue
+            calculator = body.meshManager.createMeshCalculator()
+            calculator.setQuality(quality)
+            mesh = calculator.calculate()
+            nodes = np.asarray(mesh.nodeCoordinatesAsFloat, dtype=np.float32).reshape(-1, 3)
+            indices = np.asarray(mesh.nodeIndices, dtype=np.int64).reshape(-1, 3)
+            chunks.append(nodes[indices])
+            self.bodies += 1
+        if not chunks:
+            return np.zeros((0, 3, 3), dtype=np.float32)
+        triangles = np.concatenate(chunks)
+        triangles *= self.scale
+        self.triangle_count += len(triangles)
+        return triangles
+
+    def write(self, file_name: str, triangles: 'np.ndarray'):
+        stl_analysis.write_binary_stl(file_name, triangles, STL_HEADER)
+
+    def summary(self) -> str:
+        if not self._requested:
+            return ''
+        if not stl_analysis.is_available():
+            return "Mesh STL engine skipped: NumPy is not installed, Fusion's STL export was used."
+        return f"Mesh STL engine: {self.triangle_count} triangles of {self.bodies} bodies ({self.refinement} refinement, {self.units})."
@@ -0,0 +1,249 @@
+import adsk.core
+import adsk.fusion
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def occurrence_key(occ: adsk.fusion.Occurrence) -> str:
+    """Return a key identifying an occurrence within the assembly context.
+
+    Occurrences handed out by the selection input and by walking the tree are
+    different Python wrappers, so they are matched by their full path name.
+    """
+    return occ.fullPathName
+
+
+class OccurrenceTree:
+    """Flat index of all occurrences below a root component.
+
+    The tree is walked once in depth-first pre-order. Each occurrence gets an
+    integer index; the descendants of occurrence ``i`` are exactly the indices
+    ``i + 1 .. subtree_end[i] - 1`` and its ancestors are reachable through
+    ``parents``. This makes ancestor/descendant queries independent of the
+    Fusion API.
+    """
+
+    def __init__(self, root: adsk.fusion.Component):
+        self.occurrences: List[adsk.fusion.Occurrence] = []
+        self.parents: List[int] = []
+        self.depths: List[int] = []
+        self.subtree_end: List[int] = []
+        self.keys: List[str] = []
+        self._index_by_key: Dict[str, int] = {}
+
+        occs = root.occurrences
+        for i in range(occs.count):
+            self._add(occs.item(i), -1, 0)
+
+    def _add(self, occurrence: adsk.fusion.Occurrence, parent: int, depth: int):
+        index = len(self.occurrences)
+        self.occurrences.append(occurrence)
+        self.parents.append(parent)
+        self.depths.append(depth)
+        self.subtree_end.append(index + 1)
+        key = occurrence_key(occurrence)
+        self.keys.append(key)
+        self._index_by_key[key] = index
+
+        children = occurrence.childOccurrences
+        for i in range(children.count):
+            self._add(children.item(i), index, depth + 1)
+        self.subtree_end[index] = len(self.occurrences)
+
+    def __len__(self) -> int:
+        return len(self.occurrences)
+
+    def index_of(self, occ: adsk.fusion.Occurrence) -> Optional[int]:
+        return self._index_by_key.get(occurrence_key(occ))
+
+    def ancestors(self, index: int) -> List[int]:
+        """Return the indices of all parents of an occurrence, innermost first."""
+        result = []
+        parent = self.parents[index]
+        while parent >= 0:
+            result.append(parent)
+            parent = self.parents[parent]
+        return result
+
+    def descendants(self, index: int) -> range:
+        return range(index + 1, self.subtree_end[index])
+
+    def visible_set(self, index: int, include_descendants: bool) -> Set[int]:
+        """Return the occurrences that must be visible to show one occurrence.
+
+        These are the occurrence itself and all of its parents, plus all of its
+        children if ``include_descendants`` is set.
+        """
+        visible = set(self.ancestors(index))
+        visible.add(index)
+        if include_descendants:
+            visible.update(self.descendants(index))
+        return visible
+
+
+class VisibilityStateEngine:
+    """Write light bulb states through a cache of the last known state.
+
+    Each occurrence and component folder flag is read from Fusion at most once;
+    afterwards the engine knows the current state and skips every write that
+    would not change it. The states found on first access are remembered so the
+    user's visibility can be restored when the export is done.
+    """
+
+    def __init__(self):
+        self._occurrences: Dict[str, adsk.fusion.Occurrence] = {}
+        self._occurrence_state: Dict[str, bool] = {}
+        self._occurrence_original: Dict[str, bool] = {}
+        self._components: Dict[str, adsk.fusion.Component] = {}
+        self._folder_state: Dict[Tuple[str, str], bool] = {}
+        self._folder_original: Dict[Tuple[str, str], bool] = {}
+        self.writes_issued = 0
+        self.writes_avoided = 0
+
+    def set_light_bulb(self, occ: adsk.fusion.Occurrence, state: bool, key: Optional[str] = None):
+        if key is None:
+            key = occurrence_key(occ)
+        current = self._occurrence_state.get(key)
+        if current is None:
+            current = occ.isLightBulbOn
+            self._occurrences.setdefault(key, occ)
+            self._occurrence_original.setdefault(key, current)
+        if current == state:
+            self.writes_avoided += 1
+        else:
+            occ.isLightBulbOn = state
+            self.writes_issued += 1
+        self._occurrence_state[key] = state
+
+    def set_folders(self, component: adsk.fusion.Component, flags: Dict[str, bool]):
+        """Set folder light bulb flags (attribute name -> state) of a component."""
+        component_id = component.id
+        self._components.setdefault(component_id, component)
+        for attribute, state in flags.items():
+            key = (component_id, attribute)
+            current = self._folder_state.get(key)
+            if current is None:
+                current = getattr(component, attribute)
+                self._folder_original.setdefault(key, current)
+            if current == state:
+                self.writes_avoided += 1
+            else:
+                setattr(component, attribute, state)
+                self.writes_issued += 1
+            self._folder_state[key] = state
+
+    def forget_current(self):
+        """Drop the cached states so they are read again on next access."""
+        self._occurrence_state.clear()
+        self._folder_state.clear()
+
+    def restore(self):
+        """Restore all touched light bulbs to the state found on first access."""
+        for key, original in self._occurrence_original.items():
+            self.set_light_bulb(self._occurrences[key], original, key)
+        for (component_id, attribute), original in self._folder_original.items():
+            self.set_folders(self._components[component_id], {attribute: original})
+
+    def summary(self) -> str:
+        return f"{self.writes_issued} visibility changes applied, {self.writes_avoided} avoided."
+
+
+# Folder flags used for every component while exporting
+COMPONENT_FOLDER_FLAGS = {
+    'isJointsFolderLightBulbOn': False,
+    'isOriginFolderLightBulbOn': False,
+    'isSketchFolderLightBulbOn': False,
+    'isBodiesFolderLightBulbOn': True,
+    'isConstructionFolderLightBulbOn': True,
+}
+
+
+def root_folder_flags(show_bodies: bool) -> Dict[str, bool]:
+    """Return the folder flags used for the root component while rendering."""
+    return {
+        'isJointsFolderLightBulbOn': False,
+        'isOriginFolderLightBulbOn': False,
+        'isSketchFolderLightBulbOn': False,
+        'isBodiesFolderLightBulbOn': show_bodies,
+        'isConstructionFolderLightBulbOn': False,
+    }
+
+
+class VisibilityPlanner:
+    """Compute and apply the light bulb changes between consecutive exports.
+
+    The planner remembers which occurrences it made visible last, so switching
+    from one export to the next only touches the occurrences whose state
+    differs. The first application after construction visits every occurrence,
+    as the state left by the user is unknown; the state engine then only writes
+    the light bulbs that actually differ.
+    """
+
+    def __init__(self, root: adsk.fusion.Component, state: Optional[VisibilityStateEngine] = None):
+        self.root = root
+        self.state = state if state is not None else VisibilityStateEngine()
+        self._tree: Optional[OccurrenceTree] = None
+        self._visible: Optional[Set[int]] = None
+
+    @classmethod
+    def for_root(cls, root: adsk.fusion.Component) -> 'VisibilityPlanner':
+        return cls(root)
+
+    @property
+    def tree(self) -> OccurrenceTree:
+        """The occurrence index, built on first use so runs without any
+        visibility changes never walk the tree."""
+        if self._tree is None:
+            self._tree = OccurrenceTree(self.root)
+        return self._tree
+
+    def plan(self, visible: Set[int]) -> List[Tuple[int, bool]]:
+        """Return the (index, light bulb state) changes needed to reach ``visible``."""
+        if self._visible is None:
+            return [(i, i in visible) for i in range(len(self.tree))]
+        changes = [(i, True) for i in visible - self._visible]
+        changes += [(i, False) for i in self._visible - visible]
+        changes.sort()
+        return changes
+
+    def apply(self, visible: Set[int]):
+        """Make exactly the occurrences in ``visible`` light bulb on."""
+        first_pass = self._visible is None
+        for index, state in self.plan(visible):
+            occurrence = self.tree.occurrences[index]
+            if first_pass:
+                self.state.set_folders(occurrence.component, COMPONENT_FOLDER_FLAGS)
+            self.state.set_light_bulb(occurrence, state)
+        self._visible = visible
+
+    def invalidate(self):
+        """Forget the last applied state, e.g. after visibility was changed elsewhere."""
+        self._visible = None
+        self.state.forget_current()
+
+    def show_only(self, occ: adsk.fusion.Occurrence, include_descendants: bool) -> bool:
+        """Show the given occurrence and its parents, hide everything else.
+
+        Returns False if the occurrence is not part of the indexed tree.
+        """
+        index = self.tree.index_of(occ)
+        if index is None:
+            return False
+        self.apply(self.tree.visible_set(index, include_descendants))
+        return True
+
+    def restore(self):
+        """Restore the visibility found before the first change."""
+        self.state.restore()
+        self._visible = None
+
+    def show_all(self):
+        self.apply(set(range(len(self.tree))))
+
+    def hide_all(self):
+        self.apply(set())
+
+
+def set_component_folders(component: adsk.fusion.Component):
+    """Show bodies and construction geometry of a component, hide the rest."""
+    for attribute, state in COMPONENT_FOLDER_FLAGS.items():
+        setattr(component, attribute, state)
@@ -26,6 +26,35 @@ IMAGE_WIDTH_KEY = 'image_width'
 IMAGE_HEIGHT_KEY = 'image_height'
 INCLUDE_REFERENCED_COMPONENTS_KEY = 'include_referenced_components'
 INCLUDE_FLAGGED_COMPONENTS_KEY = 'include_flagged_components'
+STL_MODE_KEY = 'stl_mode'
+INCREMENTAL_EXPORT_KEY = 'incremental_export'
+PROFILE_EXPORT_KEY = 'profile_export'
+PNG_TRIM_KEY = 'png_trim'
+PNG_TRANSPARENT_KEY = 'png_transparent'
+PNG_COMPRESS_KEY = 'png_compress'
+STL_STATS_KEY = 'stl_stats'
+STL_LOD_KEY = 'stl_lod'
+STL_LOD_SUB_PATH_KEY = 'stl_lod_sub_path'
+STL_LOD_LEVELS_KEY = 'stl_lod_levels'
+CONTACT_SHEET_KEY = 'contact_sheet'
+CONTACT_SHEET_COLUMNS_KEY = 'contact_sheet_columns'
+FIT_CAMERA_KEY = 'fit_camera'
+RESUME_EXPORT_KEY = 'resume_export'
+EXPORT_FORMATS_KEY = 'export_formats'
+ARCHIVE_FORMAT_KEY = 'archive_format'
+BATCH_SOURCE_KEY = 'batch_source'
+BATCH_SUBFOLDERS_KEY = 'batch_subfolders'
+EXPORT_BOM_KEY = 'export_bom'
+EXPORT_ON_SAVE_KEY = 'export_on_save'
+EXPORT_ON_SAVE_DELAY_KEY = 'export_on_save_delay'
+LAST_EXPORT_FOLDER_KEY = 'last_export_folder'
+ONLY_EDITED_KEY = 'only_edited'
+GIT_STAGE_KEY = 'git_stage'
+PNG_SIZES_KEY = 'png_sizes'
+PNG_VIEWS_KEY = 'png_views'
+STL_ENGINE_KEY = 'stl_engine'
+STL_REFINEMENT_KEY = 'stl_refinement'
+STL_UNITS_KEY = 'stl_units'
 
 
 EXPORT_STL_DEFAULT_VALUE = True
@@ -41,6 +70,35 @@ IMAGE_WIDTH_DEFAULT_VALUE = 800
 IMAGE_HEIGHT_DEFAULT_VALUE = 600
 INCLUDE_REFERENCED_COMPONENTS_DEFAULT_VALUE = False
 INCLUDE_FLAGGED_COMPONENTS_DEFAULT_VALUE = False
+STL_MODE_DEFAULT_VALUE = 'visibility'
+INCREMENTAL_EXPORT_DEFAULT_VALUE = False
+PROFILE_EXPORT_DEFAULT_VALUE = False
+PNG_TRIM_DEFAULT_VALUE = False
+PNG_TRANSPARENT_DEFAULT_VALUE = False
+PNG_COMPRESS_DEFAULT_VALUE = False
+STL_STATS_DEFAULT_VALUE = False
+STL_LOD_DEFAULT_VALUE = False
+STL_LOD_SUB_PATH_DEFAULT_VALUE = '/stl_preview'
+STL_LOD_LEVELS_DEFAULT_VALUE = '0.1'
+CONTACT_SHEET_DEFAULT_VALUE = False
+CONTACT_SHEET_COLUMNS_DEFAULT_VALUE = 8
+FIT_CAMERA_DEFAULT_VALUE = False
+RESUME_EXPORT_DEFAULT_VALUE = False
+EXPORT_FORMATS_DEFAULT_VALUE = []
+ARCHIVE_FORMAT_DEFAULT_VALUE = ''
+BATCH_SOURCE_DEFAULT_VALUE = 'open'
+BATCH_SUBFOLDERS_DEFAULT_VALUE = False
+EXPORT_BOM_DEFAULT_VALUE = False
+EXPORT_ON_SAVE_DEFAULT_VALUE = 'prompt'
+EXPORT_ON_SAVE_DELAY_DEFAULT_VALUE = 10
+LAST_EXPORT_FOLDER_DEFAULT_VALUE = ''
+ONLY_EDITED_DEFAULT_VALUE = False
+GIT_STAGE_DEFAULT_VALUE = False
+PNG_SIZES_DEFAULT_VALUE = ''
+PNG_VIEWS_DEFAULT_VALUE = ''
+STL_ENGINE_DEFAULT_VALUE = 'fusion'
+STL_REFINEMENT_DEFAULT_VALUE = 'normal'
+STL_UNITS_DEFAULT_VALUE = 'mm'
 
 
 